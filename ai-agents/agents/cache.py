@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from monitoring.metrics import MODEL_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def cache_key(model: str, system_message: Optional[str], prompt: str, **params) -> str:
+    """Content address of a model call.
+
+    Whitespace is collapsed so that re-indented prompts (the f-string
+    templates in sentinel.py) hash the same.
+    """
+    material = json.dumps({
+        'model': model,
+        'system': _WHITESPACE.sub(' ', system_message or '').strip(),
+        'prompt': _WHITESPACE.sub(' ', prompt).strip(),
+        'params': params,
+    }, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier cache of model responses: in-process LRU in front of SQLite.
+
+    The disk tier is shared by every worker pointing at the same file, so a
+    retried n8n workflow hits the cache no matter which worker serves it.
+    Expired rows are swept from a put at most every sweep_interval seconds.
+    """
+
+    def __init__(self, db_path: Optional[str], max_entries: int = 512, ttl_seconds: int = 86400,
+                 sweep_interval: float = 300):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'bypassed': 0, 'saved_tokens': 0}
+
+        if self.db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = self._connect()
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                '  key TEXT PRIMARY KEY, content TEXT NOT NULL, tokens INTEGER NOT NULL, '
+                '  expires_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_responses_expires_at ON responses (expires_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _count(self, outcome: str, tokens: int = 0):
+        with self._lock:
+            if outcome in ('memory_hits', 'disk_hits'):
+                self._stats['saved_tokens'] += tokens
+            self._stats[outcome] += 1
+        MODEL_CACHE_REQUESTS.labels(outcome).inc()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return {'content', 'tokens'} for a fresh entry, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry['expires_at'] > now:
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    entry = None
+        if entry is not None:
+            self._count('memory_hits', entry['tokens'])
+            return entry
+
+        if self.db_path:
+            try:
+                row = self._connect().execute(
+                    'SELECT content, tokens, expires_at FROM responses WHERE key = ? AND expires_at > ?',
+                    (key, now),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Model cache read failed: {e}")
+                row = None
+            if row is not None:
+                entry = {'content': row[0], 'tokens': row[1], 'expires_at': row[2]}
+                self._remember(key, entry)
+                self._count('disk_hits', entry['tokens'])
+                return entry
+
+        self._count('misses')
+        return None
+
+    def put(self, key: str, content: str, tokens: int = 0):
+        entry = {'content': content, 'tokens': tokens, 'expires_at': time.time() + self.ttl_seconds}
+        self._remember(key, entry)
+        if self.db_path:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    'INSERT OR REPLACE INTO responses (key, content, tokens, expires_at) VALUES (?, ?, ?, ?)',
+                    (key, content, tokens, entry['expires_at']),
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Model cache write failed: {e}")
+            self._sweep()
+
+    def _sweep(self):
+        """Delete expired rows, at most once per sweep_interval per process"""
+        now = time.time()
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + self.sweep_interval
+        try:
+            self._connect().execute('DELETE FROM responses WHERE expires_at <= ?', (now,))
+        except sqlite3.Error as e:
+            logger.warning(f"Model cache sweep failed: {e}")
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_bypass(self):
+        self._count('bypassed')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._entries)
+        hits = stats['memory_hits'] + stats['disk_hits']
+        lookups = hits + stats['misses']
+        stats['hits'] = hits
+        stats['hit_ratio'] = round(hits / lookups, 3) if lookups else 0.0
+        return stats
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    dedupe_key TEXT UNIQUE,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    callback_status TEXT NOT NULL DEFAULT 'pending',
+    callback_attempts INTEGER NOT NULL DEFAULT 0,
+    next_callback_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS ix_jobs_callback ON jobs (callback_status, next_callback_at);
+"""
+
+
+class JobStore:
+    """Persistent job queue in SQLite (WAL), shared by every worker process.
+
+    Jobs are claimed with a lease; a job whose worker died is picked up
+    again once the lease expires, up to max_attempts.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 300, max_attempts: int = 3):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def submit(self, payload: Dict[str, Any], dedupe_key: Optional[str] = None,
+               callback: bool = True) -> Dict[str, Any]:
+        """Queue a job; a retry with the same dedupe_key returns the existing job instead"""
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        cursor = conn.execute(
+            'INSERT OR IGNORE INTO jobs (id, dedupe_key, status, payload, callback_status, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (job_id, dedupe_key, 'queued', json.dumps(payload), 'pending' if callback else 'skipped', now, now),
+        )
+        if cursor.rowcount == 0:
+            job = self.get_by_dedupe_key(dedupe_key)
+            job['duplicate'] = True
+            return job
+        job = self.get(job_id)
+        job['duplicate'] = False
+        return job
+
+    def _row_to_job(self, row: sqlite3.Row, include_payload: bool = False) -> Dict[str, Any]:
+        job = {
+            'id': row['id'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'callback': {'status': row['callback_status'], 'attempts': row['callback_attempts']},
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+        }
+        if include_payload:
+            job['payload'] = json.loads(row['payload'])
+        return job
+
+    def get(self, job_id: str, include_payload: bool = False) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._row_to_job(row, include_payload) if row else None
+
+    def get_by_dedupe_key(self, dedupe_key: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute('SELECT * FROM jobs WHERE dedupe_key = ?', (dedupe_key,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Lease the oldest runnable job: queued, or running with an expired lease"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Workers that died mid-job too often: give up on the job
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Worker lost the job too many times', "
+                "lease_until = NULL, next_callback_at = ?, updated_at = ? "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                (now, now, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (now + self.lease_seconds, now, row['id']),
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return self.get(row['id'], include_payload=True) if row is not None else None
+
+    def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        now = time.time()
+        self._connect().execute(
+            'UPDATE jobs SET status = ?, result = ?, error = ?, lease_until = NULL, '
+            'next_callback_at = ?, updated_at = ? WHERE id = ?',
+            ('failed' if error else 'succeeded', json.dumps(result) if result is not None else None,
+             error, now, now, job_id),
+        )
+
+    def claim_callback(self) -> Optional[Dict[str, Any]]:
+        """Lease a finished job whose callback is due"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE callback_status = 'pending' AND status IN ('succeeded', 'failed') "
+                "AND next_callback_at <= ? ORDER BY next_callback_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                # Push the next attempt out so other workers skip it while it is in flight
+                conn.execute(
+                    'UPDATE jobs SET next_callback_at = ?, callback_attempts = callback_attempts + 1 WHERE id = ?',
+                    (now + self.lease_seconds, row['id']),
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return self.get(row['id'], include_payload=True) if row is not None else None
+
+    def record_callback(self, job_id: str, delivered: bool, retry_in: float):
+        job = self.get(job_id)
+        if delivered:
+            status, next_at = 'delivered', None
+        elif job['callback']['attempts'] >= self.max_attempts:
+            status, next_at = 'failed', None
+        else:
+            status, next_at = 'pending', time.time() + retry_in
+        self._connect().execute(
+            'UPDATE jobs SET callback_status = ?, next_callback_at = ?, updated_at = ? WHERE id = ?',
+            (status, next_at, time.time(), job_id),
+        )
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._connect().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def purge(self, older_than_seconds: float) -> int:
+        """Delete finished jobs whose callback is settled"""
+        cursor = self._connect().execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND callback_status != 'pending' "
+            "AND updated_at < ?",
+            (time.time() - older_than_seconds,),
+        )
+        return cursor.rowcount
+
+
+class JobRunner:
+    """Background worker threads that run queued jobs and deliver callbacks"""
+
+    def __init__(self, store: JobStore, handler: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 deliver: Callable[[Dict[str, Any]], bool], workers: int = 2,
+                 poll_interval: float = 1.0, callback_retry_seconds: float = 30,
+                 retention_seconds: float = 7 * 86400):
+        self.store = store
+        self.handler = handler
+        self.deliver = deliver
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.callback_retry_seconds = callback_retry_seconds
+        self.retention_seconds = retention_seconds
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._last_purge = 0.0
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Job runner started with {self.workers} workers")
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, payload: Dict[str, Any], dedupe_key: Optional[str] = None,
+               callback: bool = True) -> Dict[str, Any]:
+        job = self.store.submit(payload, dedupe_key, callback)
+        self._wakeup.set()
+        return job
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                worked = self._run_one_job() or self._deliver_one_callback()
+                if time.time() - self._last_purge > 3600:
+                    self._last_purge = time.time()
+                    self.store.purge(self.retention_seconds)
+            except Exception as e:
+                logger.error(f"Job worker error: {e}")
+                worked = False
+            if not worked:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _run_one_job(self) -> bool:
+        job = self.store.claim()
+        if job is None:
+            return False
+        logger.info(f"Running job {job['id']} (attempt {job['attempts']})")
+        try:
+            result = self.handler(job['payload'])
+            error = result.get('error') if isinstance(result, dict) else None
+            self.store.finish(job['id'], result=result, error=error)
+        except Exception as e:
+            logger.error(f"Job {job['id']} failed: {e}")
+            self.store.finish(job['id'], error=str(e))
+        return True
+
+    def _deliver_one_callback(self) -> bool:
+        job = self.store.claim_callback()
+        if job is None:
+            return False
+        try:
+            delivered = self.deliver(job)
+        except Exception as e:
+            logger.error(f"Callback for job {job['id']} failed: {e}")
+            delivered = False
+        # Back off linearly with each failed attempt
+        self.store.record_callback(job['id'], delivered, self.callback_retry_seconds * job['callback']['attempts'])
+        return True
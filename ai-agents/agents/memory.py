@@ -1,75 +1,112 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
 import os
+import threading
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from config.models import config
+from .similarity import SimilarityIndex
+from .storage import SQLiteMemoryStore
+
+# Interaction types whose input payload goes into the similarity index
+INDEXED_TYPES = ('site_analysis',)
 
 class AgentMemory:
     def __init__(self, memory_path: str = None):
         self.memory_path = memory_path or config.agent_memory_path
-        self.memory = self._load_memory()
-    
-    def _load_memory(self) -> Dict[str, Any]:
-        """Load memory from JSON file"""
-        try:
-            if os.path.exists(self.memory_path):
-                with open(self.memory_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Error loading memory: {e}")
-        
-        # Return default memory structure
-        return {
-            "interactions": [],
-            "workflows": {},
-            "site_data": {},
-            "last_updated": datetime.now().isoformat()
-        }
-    
-    def _save_memory(self):
-        """Save memory to JSON file"""
-        try:
-            self.memory["last_updated"] = datetime.now().isoformat()
-            with open(self.memory_path, 'w', encoding='utf-8') as f:
-                json.dump(self.memory, f, indent=2)
-        except Exception as e:
-            print(f"Error saving memory: {e}")
-    
-    def store_interaction(self, interaction: Dict[str, Any]):
-        """Store an interaction in memory"""
-        if "interactions" not in self.memory:
-            self.memory["interactions"] = []
-        
-        interaction["id"] = len(self.memory["interactions"]) + 1
+        self.db_path = self._db_path(self.memory_path)
+        self.store = SQLiteMemoryStore(
+            self.db_path,
+            max_interactions=config.memory_max_interactions,
+            max_interaction_bytes=config.memory_max_interaction_bytes,
+            max_workflows=config.memory_max_workflows,
+            max_workflow_bytes=config.memory_max_workflow_bytes,
+        )
+        # One-off import of the old single-file JSON memory
+        if self.db_path != self.memory_path:
+            self.store.import_legacy_json(self.memory_path)
+
+        self.index = SimilarityIndex(
+            dimensions=config.similarity_dimensions,
+            max_items=config.memory_max_interactions
+        ) if config.similarity_enabled else None
+        self._indexed_up_to = 0
+        self._index_lock = threading.Lock()
+        self._sync_index()
+
+    @staticmethod
+    def _db_path(memory_path: str) -> str:
+        """agent_memory.json -> agent_memory.db (kept next to the old file)"""
+        root, ext = os.path.splitext(memory_path)
+        return memory_path if ext == '.db' else root + '.db'
+
+    def store_interaction(self, interaction: Dict[str, Any]) -> int:
+        """Store an interaction in memory and return its id"""
         interaction["timestamp"] = datetime.now().isoformat()
-        
-        self.memory["interactions"].append(interaction)
-        
-        # Keep only last 1000 interactions
-        if len(self.memory["interactions"]) > 1000:
-            self.memory["interactions"] = self.memory["interactions"][-1000:]
-        
-        self._save_memory()
-    
+        interaction["id"] = self.store.append_interaction(interaction)
+        self._sync_index()
+        return interaction["id"]
+
+    def _sync_index(self):
+        """Index interactions written since the last sync, including other workers'"""
+        if self.index is None:
+            return
+        with self._index_lock:
+            start = self._indexed_up_to
+            for interaction_type in INDEXED_TYPES:
+                for interaction in self.store.iter_interactions(start, interaction_type):
+                    # Reused analyses would only add near-duplicates of their source,
+                    # triaged ones must not be served for a payload that skipped triage,
+                    # and failed ones hold an error message, not an analysis
+                    if (interaction.get("reused_from") is None and not interaction.get("triaged")
+                            and not interaction.get("failed")):
+                        self.index.add(
+                            interaction["id"],
+                            interaction.get("input"),
+                            created_at=datetime.fromisoformat(interaction["timestamp"]).timestamp()
+                        )
+                    self._indexed_up_to = max(self._indexed_up_to, interaction["id"])
+
+    def find_similar(self, data: Dict[str, Any], k: int = 5, min_score: float = 0.0,
+                     max_age_seconds: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Past indexed interactions most similar to data: [{'id', 'score', 'interaction'}]"""
+        if self.index is None:
+            return []
+        self._sync_index()
+        matches = []
+        for match in self.index.search(data, k=k, min_score=min_score, max_age_seconds=max_age_seconds):
+            interaction = self.store.get_interaction(match["id"])
+            if interaction is None:
+                # Dropped by retention since it was indexed
+                self.index.remove(match["id"])
+                continue
+            matches.append({**match, "interaction": interaction})
+        return matches
+
     def get_recent_interactions(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get recent interactions"""
-        interactions = self.memory.get("interactions", [])
-        return interactions[-limit:] if interactions else []
-    
+        """Get recent interactions, oldest first"""
+        return list(reversed(self.store.query_interactions(limit=limit)))
+
+    def query_interactions(self, limit: int = 10, interaction_type: Optional[str] = None,
+                           since: Optional[str] = None, until: Optional[str] = None,
+                           before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Page through interactions newest first, optionally filtered by type and time"""
+        return self.store.query_interactions(limit, interaction_type, since, until, before_id)
+
+    def count_interactions(self) -> int:
+        return self.store.count_interactions()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.store.stats()
+
     def store_workflow_data(self, workflow_id: str, data: Dict[str, Any]):
         """Store workflow-specific data"""
-        if "workflows" not in self.memory:
-            self.memory["workflows"] = {}
-        
-        self.memory["workflows"][workflow_id] = {
+        self.store.put_workflow(workflow_id, {
             **data,
             "last_updated": datetime.now().isoformat()
-        }
-        self._save_memory()
-    
+        })
+
     def get_workflow_data(self, workflow_id: str) -> Optional[Dict[str, Any]]:
         """Get workflow data"""
-        return self.memory.get("workflows", {}).get(workflow_id)
\ No newline at end of file
+        return self.store.get_workflow(workflow_id)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import math
+from typing import Any, Dict, Tuple
+
+from config.models import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:  # optional; fall back to a character estimate
+    tiktoken = None
+
+_encoding = None
+
+# (max list items, max string characters) tried in order until the payload fits
+TRUNCATION_STEPS = ((50, 1000), (20, 500), (10, 200), (5, 100), (2, 50), (1, 20))
+
+
+def count_tokens(text: str) -> int:
+    """Token count for the configured model, or ~4 characters per token without tiktoken"""
+    global _encoding
+    if tiktoken is not None and _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model(config.openai_model)
+        except Exception:
+            try:
+                _encoding = tiktoken.get_encoding('cl100k_base')
+            except Exception:
+                # Encodings are downloaded on first use; offline hosts estimate instead
+                _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _summarize_numbers(values: list) -> Dict[str, Any]:
+    count = len(values)
+    mean = sum(values) / count
+    return {
+        '_summary': 'numeric_array',
+        'count': count,
+        'min': min(values),
+        'max': max(values),
+        'mean': round(mean, 3),
+        'std': round(math.sqrt(sum((v - mean) ** 2 for v in values) / count), 3),
+        'first': values[0],
+        'last': values[-1],
+    }
+
+
+def prune(data: Any, array_threshold: int) -> Any:
+    """Drop nulls and empty containers; replace long numeric arrays by statistics"""
+    if isinstance(data, dict):
+        pruned = {}
+        for key, value in data.items():
+            value = prune(value, array_threshold)
+            if value is None or value == {} or value == [] or value == '':
+                continue
+            pruned[key] = value
+        return pruned
+    if isinstance(data, (list, tuple)):
+        if len(data) > array_threshold and all(_is_number(v) for v in data):
+            return _summarize_numbers(list(data))
+        items = [prune(item, array_threshold) for item in data]
+        return [item for item in items if item is not None and item != {} and item != []]
+    return data
+
+
+def truncate(data: Any, max_items: int, max_chars: int) -> Any:
+    """Keep the first max_items of every list and max_chars of every string, with markers"""
+    if isinstance(data, dict):
+        return {key: truncate(value, max_items, max_chars) for key, value in data.items()}
+    if isinstance(data, list):
+        kept = [truncate(item, max_items, max_chars) for item in data[:max_items]]
+        if len(data) > max_items:
+            kept.append(f'...[{len(data) - max_items} more items truncated]')
+        return kept
+    if isinstance(data, str) and len(data) > max_chars:
+        return data[:max_chars] + f'...[{len(data) - max_chars} chars truncated]'
+    return data
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def compact_json(data: Any, max_tokens: int = None) -> Tuple[str, Dict[str, Any]]:
+    """Serialize a site payload for a prompt within a token budget.
+
+    Compact separators and pruning always apply; list and string
+    truncation only kick in when the payload is still over budget, and the
+    output is cut with a marker as a last resort. Same input, same output.
+    """
+    max_tokens = max_tokens or config.prompt_max_payload_tokens
+    original_tokens = count_tokens(json.dumps(data, indent=2, default=str))
+
+    compacted = prune(data, config.prompt_array_summary_threshold)
+    text = _dumps(compacted)
+    tokens = count_tokens(text)
+    truncated = None
+
+    if tokens > max_tokens:
+        for max_items, max_chars in TRUNCATION_STEPS:
+            text = _dumps(truncate(compacted, max_items, max_chars))
+            tokens = count_tokens(text)
+            truncated = f'lists>{max_items} items, strings>{max_chars} chars'
+            if tokens <= max_tokens:
+                break
+        else:
+            # Shrink proportionally until the hard cut fits
+            marker = '...[payload truncated to fit token budget]'
+            keep = len(text)
+            while tokens > max_tokens and keep > 0:
+                keep = int(keep * max_tokens / tokens * 0.95)
+                candidate = text[:keep] + marker
+                tokens = count_tokens(candidate)
+            text = candidate
+            truncated = 'hard cut'
+
+    stats = {
+        'original_tokens': original_tokens,
+        'tokens': tokens,
+        'truncated': truncated,
+    }
+    if truncated:
+        logger.warning(f"Prompt payload truncated ({truncated}): {original_tokens} -> {tokens} tokens")
+    else:
+        logger.debug(f"Prompt payload compacted: {original_tokens} -> {tokens} tokens")
+    return text, stats
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from config.models import ModelProvider, config
+from monitoring.metrics import track_outbound
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelResponse:
+    content: str
+    provider: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    latency: float = 0.0
+    hedged: bool = False
+
+
+class ProviderUnavailable(Exception):
+    """Every configured provider failed or has its circuit open"""
+
+
+# ----------------------------------------------------------------------
+# Providers
+# ----------------------------------------------------------------------
+class OpenAIProvider:
+    """OpenAI and any OpenAI-compatible server (LOCAL via base_url)"""
+
+    def __init__(self, name: str, model: str, api_key: str, base_url: Optional[str] = None, client=None):
+        from openai import OpenAI
+
+        self.name = name
+        self.model = model
+        self.client = client or OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                 timeout: float) -> ModelResponse:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout
+        )
+        usage = response.usage
+        return ModelResponse(
+            content=response.choices[0].message.content,
+            provider=self.name,
+            model=self.model,
+            prompt_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
+            completion_tokens=getattr(usage, 'completion_tokens', 0) or 0,
+            total_tokens=getattr(usage, 'total_tokens', 0) or 0,
+        )
+
+    def stream(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+               timeout: float) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            stream=True
+        )
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Client went away mid-stream: stop reading from the provider too
+            stream.response.close()
+
+
+class AzureOpenAIProvider(OpenAIProvider):
+    def __init__(self, name: str, deployment: str, api_key: str, endpoint: str, api_version: str):
+        from openai import AzureOpenAI
+
+        super().__init__(name, deployment, api_key, client=AzureOpenAI(
+            api_key=api_key, azure_endpoint=endpoint, api_version=api_version, max_retries=0
+        ))
+
+
+class AnthropicProvider:
+    """Anthropic text completions (the API available in anthropic 0.7.x)"""
+
+    def __init__(self, name: str, model: str, api_key: str):
+        import anthropic
+
+        self.name = name
+        self.model = model
+        self._anthropic = anthropic
+        self.client = anthropic.Anthropic(api_key=api_key, max_retries=0)
+
+    def _prompt(self, messages: List[Dict[str, str]]) -> str:
+        parts = []
+        for message in messages:
+            # No system role in the completions API; it goes first as human text
+            marker = self._anthropic.AI_PROMPT if message['role'] == 'assistant' else self._anthropic.HUMAN_PROMPT
+            parts.append(f"{marker} {message['content']}")
+        return ''.join(parts) + self._anthropic.AI_PROMPT
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                 timeout: float) -> ModelResponse:
+        completion = self.client.completions.create(
+            model=self.model,
+            prompt=self._prompt(messages),
+            max_tokens_to_sample=max_tokens,
+            temperature=temperature,
+            timeout=timeout
+        )
+        return ModelResponse(content=completion.completion, provider=self.name, model=self.model)
+
+    def stream(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+               timeout: float) -> Iterator[str]:
+        stream = self.client.completions.create(
+            model=self.model,
+            prompt=self._prompt(messages),
+            max_tokens_to_sample=max_tokens,
+            temperature=temperature,
+            timeout=timeout,
+            stream=True
+        )
+        try:
+            for completion in stream:
+                if completion.completion:
+                    yield completion.completion
+        finally:
+            stream.response.close()
+
+
+# ----------------------------------------------------------------------
+# Health tracking
+# ----------------------------------------------------------------------
+class ProviderHealth:
+    """Latency/error EWMAs, a latency sample window and a circuit breaker.
+
+    closed -> open after `failure_threshold` consecutive failures or when
+    the error EWMA passes `error_rate_threshold`; open -> half_open after
+    `cooldown` seconds, where a single probe decides whether it closes.
+    Calls that started before the circuit opened still count towards the
+    EWMAs but never change its state.
+    """
+
+    def __init__(self, alpha: float, failure_threshold: int, error_rate_threshold: float,
+                 cooldown: float, window: int = 200):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.cooldown = cooldown
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.samples = deque(maxlen=window)
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = 'half_open'
+            # One probe at a time; a probe that never reported back is abandoned after a cooldown
+            now = time.monotonic()
+            if self.state == 'half_open' and (self._probe_started is None or now - self._probe_started >= self.cooldown):
+                self._probe_started = now
+                return True
+            return False
+
+    def record(self, ok: bool, latency: float):
+        with self._lock:
+            # A straggler from before the circuit opened says nothing about recovery
+            stale = self.state != 'closed' and time.monotonic() - latency < self.opened_at
+            self.requests += 1
+            self.error_ewma = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * self.error_ewma
+            if ok:
+                self.samples.append(latency)
+                self.latency_ewma = latency if self.latency_ewma is None else (
+                    self.alpha * latency + (1 - self.alpha) * self.latency_ewma
+                )
+                self.consecutive_failures = 0
+                if self.state == 'half_open' and not stale:
+                    logger.info("Provider circuit closed after successful probe")
+                    self.state = 'closed'
+            else:
+                self.failures += 1
+                self.consecutive_failures += 1
+                tripped = not stale and (
+                    self.state == 'half_open'
+                    or self.consecutive_failures >= self.failure_threshold
+                    or (self.requests >= self.failure_threshold and self.error_ewma >= self.error_rate_threshold)
+                )
+                if tripped and self.state != 'open':
+                    logger.warning(f"Provider circuit opened after {self.consecutive_failures} consecutive failures "
+                                   f"(error rate {self.error_ewma:.2f})")
+                    self.state = 'open'
+                    self.opened_at = time.monotonic()
+            if not stale:
+                self._probe_started = None
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if len(self.samples) < 10:
+                return None
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p95 = self.percentile(95)
+        return {
+            'state': self.state,
+            'requests': self.requests,
+            'failures': self.failures,
+            'error_rate_ewma': round(self.error_ewma, 3),
+            'latency_ewma_ms': round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            'latency_p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+# ----------------------------------------------------------------------
+# Router
+# ----------------------------------------------------------------------
+class ProviderRouter:
+    """Send each model call to the healthiest provider, hedging slow calls.
+
+    Providers are tried in priority order (ties broken by latency EWMA),
+    skipping open circuits. If the first attempt has not answered after
+    the provider's p-th latency percentile, a hedge goes to the next
+    provider (or the same one if it is alone) and the first success wins.
+    Hedges are capped at `hedge_max_ratio` of calls so an outage cannot
+    double the load.
+    """
+
+    def __init__(self, providers: List[Any], hedge_enabled: bool = True, hedge_percentile: float = 95,
+                 hedge_min_delay: float = 1.0, hedge_max_ratio: float = 0.1, alpha: float = 0.2,
+                 failure_threshold: int = 5, error_rate_threshold: float = 0.5, cooldown: float = 30,
+                 max_workers: Optional[int] = None):
+        if not providers:
+            raise ValueError("At least one model provider must be configured")
+        self.providers = providers
+        self.priority = {provider.name: index for index, provider in enumerate(providers)}
+        self.health = {
+            provider.name: ProviderHealth(alpha, failure_threshold, error_rate_threshold, cooldown)
+            for provider in providers
+        }
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_ratio = hedge_max_ratio
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self._lock = threading.Lock()
+        # Losing hedges keep running to completion, so size for two per call plus headroom
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or max(8, 4 * len(providers)),
+                                            thread_name_prefix='model-call')
+
+    @classmethod
+    def from_config(cls, settings=config) -> 'ProviderRouter':
+        providers = build_providers(settings)
+        return cls(
+            providers,
+            hedge_enabled=settings.router_hedge_enabled,
+            hedge_percentile=settings.router_hedge_percentile,
+            hedge_min_delay=settings.router_hedge_min_delay_seconds,
+            hedge_max_ratio=settings.router_hedge_max_ratio,
+            alpha=settings.router_ewma_alpha,
+            failure_threshold=settings.router_breaker_failures,
+            error_rate_threshold=settings.router_breaker_error_rate,
+            cooldown=settings.router_breaker_cooldown_seconds,
+            # Batch items call the router concurrently on top of request threads
+            max_workers=max(8, 4 * len(providers)) + 2 * settings.batch_concurrency,
+        )
+
+    @property
+    def primary(self):
+        return self.providers[0]
+
+    def _candidates(self) -> List[Any]:
+        """Available providers, best first; every provider if all circuits are open"""
+        def rank(provider):
+            latency = self.health[provider.name].latency_ewma
+            return self.priority[provider.name], latency if latency is not None else 0.0
+
+        available = [p for p in sorted(self.providers, key=rank) if self.health[p.name].available()]
+        return available or sorted(self.providers, key=rank)
+
+    def _attempt(self, provider, messages, temperature, max_tokens, timeout) -> ModelResponse:
+        start = time.perf_counter()
+        try:
+            with track_outbound(provider.name):
+                response = provider.complete(messages, temperature, max_tokens, timeout)
+        except Exception:
+            self.health[provider.name].record(False, time.perf_counter() - start)
+            raise
+        response.latency = time.perf_counter() - start
+        self.health[provider.name].record(True, response.latency)
+        return response
+
+    def _hedge_delay(self, provider) -> Optional[float]:
+        if not self.hedge_enabled:
+            return None
+        with self._lock:
+            if self.calls and self.hedges / self.calls >= self.hedge_max_ratio:
+                return None
+        threshold = self.health[provider.name].percentile(self.hedge_percentile)
+        return None if threshold is None else max(threshold, self.hedge_min_delay)
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                 timeout: float, deadline: Optional[float] = None) -> ModelResponse:
+        """First successful answer; deadline (time.monotonic()) caps the whole call.
+
+        Each attempt gets `timeout`, cut to what is left before the deadline,
+        and no failover or hedge starts once it has passed.
+        """
+        def attempt_timeout() -> Optional[float]:
+            if deadline is None:
+                return timeout
+            remaining = deadline - time.monotonic()
+            return min(timeout, remaining) if remaining > 0 else None
+
+        with self._lock:
+            self.calls += 1
+        candidates = self._candidates()
+        errors = []
+        index = 0
+        while index < len(candidates):
+            provider = candidates[index]
+            index += 1
+            budget = attempt_timeout()
+            if budget is None:
+                errors.append('deadline exceeded')
+                break
+            if errors:
+                with self._lock:
+                    self.failovers += 1
+            pending = {self._executor.submit(self._attempt, provider, messages, temperature, max_tokens, budget): False}
+
+            delay = self._hedge_delay(provider)
+            done, _ = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            budget = attempt_timeout()
+            if not done and delay is not None and budget is not None:
+                hedge_target = candidates[index] if index < len(candidates) else provider
+                if hedge_target is not provider:
+                    index += 1
+                logger.info(f"Hedging slow {provider.name} call to {hedge_target.name} after {delay:.2f}s")
+                with self._lock:
+                    self.hedges += 1
+                pending[self._executor.submit(
+                    self._attempt, hedge_target, messages, temperature, max_tokens, budget
+                )] = True
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    hedged = pending.pop(future)
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        errors.append(str(e))
+                        continue
+                    if hedged:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    response.hedged = hedged
+                    return response
+        raise ProviderUnavailable('; '.join(errors) or 'No model provider available')
+
+    def stream(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+               timeout: float) -> Iterator[str]:
+        """Stream from the best provider; fail over only before the first chunk arrives"""
+        with self._lock:
+            self.calls += 1
+        errors = []
+        for provider in self._candidates():
+            start = time.perf_counter()
+            try:
+                with track_outbound(provider.name):
+                    chunks = provider.stream(messages, temperature, max_tokens, timeout)
+                    first = next(chunks, None)
+            except Exception as e:
+                self.health[provider.name].record(False, time.perf_counter() - start)
+                errors.append(str(e))
+                continue
+            self.health[provider.name].record(True, time.perf_counter() - start)
+            if first is not None:
+                yield first
+            yield from chunks
+            return
+        raise ProviderUnavailable('; '.join(errors) or 'No model provider available')
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'failovers': self.failovers,
+            'providers': {name: health.snapshot() for name, health in self.health.items()},
+        }
+
+
+def build_providers(settings=config) -> List[Any]:
+    """Providers with credentials configured, in MODEL_PROVIDER_PRIORITY order"""
+    factories = {
+        ModelProvider.OPENAI: lambda: settings.openai_api_key and OpenAIProvider(
+            'openai', settings.openai_model, settings.openai_api_key, settings.openai_base_url
+        ),
+        ModelProvider.AZURE_OPENAI: lambda: settings.azure_openai_api_key and settings.azure_openai_endpoint and AzureOpenAIProvider(
+            'azure_openai', settings.azure_openai_deployment, settings.azure_openai_api_key,
+            settings.azure_openai_endpoint, settings.azure_openai_api_version
+        ),
+        ModelProvider.ANTHROPIC: lambda: settings.anthropic_api_key and AnthropicProvider(
+            'anthropic', settings.anthropic_model, settings.anthropic_api_key
+        ),
+        ModelProvider.LOCAL: lambda: settings.local_model_base_url and OpenAIProvider(
+            'local', settings.local_model, 'not-needed', settings.local_model_base_url
+        ),
+    }
+    order = [name.strip() for name in settings.provider_priority.split(',') if name.strip()]
+    if not order:
+        order = [settings.provider.value]
+
+    providers = []
+    for name in order:
+        try:
+            provider = factories[ModelProvider(name)]()
+        except Exception as e:
+            logger.error(f"Could not set up model provider {name}: {e}")
+            continue
+        if provider:
+            providers.append(provider)
+        else:
+            logger.warning(f"Model provider {name} is missing credentials; skipping")
+    return providers
@@ -2,24 +2,39 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import asyncio
+import contextvars
 import os
 import requests
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import time
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from openai import OpenAI
 from config.models import config
+from monitoring.metrics import track_outbound
+from .cache import ResponseCache, cache_key
 from .memory import AgentMemory
+from .prompting import compact_json, count_tokens
+from .similarity import readings_match
+from .providers import ProviderRouter
+from .triage import NORMAL, SiteTriage
+from .usage import usage_context, usage_tracker
 
-# Set up logging
-logging.basicConfig(level=config.log_level)
 logger = logging.getLogger(__name__)
 
 class SiteSupervisorAgent:
     def __init__(self, memory: AgentMemory):
         self.memory = memory
-        self.client = OpenAI(api_key=config.openai_api_key)
+        self.router = ProviderRouter.from_config()
+        self.cache = ResponseCache(
+            config.model_cache_path or None,
+            max_entries=config.model_cache_max_entries,
+            ttl_seconds=config.model_cache_ttl_seconds
+        ) if config.model_cache_enabled else None
+        self.triage = SiteTriage.from_config() if config.triage_enabled else None
+        self.reused_analyses = 0
         
         self.n8n_config = {
             'webhook_url': config.n8n_webhook_url,
@@ -28,35 +43,166 @@ class SiteSupervisorAgent:
         
         logger.info(f"SiteSupervisorAgent initialized with model: {config.openai_model}")
     
-    def _call_model(self, prompt: str, system_message: str = None) -> str:
-        """Call OpenAI model with proper error handling"""
+    def _lookup_cache(self, prompt: str, system_message: str = None, use_cache: bool = True):
+        """Return (cache key, cached content); the key is None when caching is off or bypassed"""
+        if self.cache is None:
+            return None, None
+        if not use_cache:
+            self.cache.record_bypass()
+            return None, None
+        key = cache_key(config.openai_model, system_message, prompt,
+                        temperature=config.temperature, max_tokens=config.max_tokens)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info(f"Model response served from cache ({cached['tokens']} tokens saved)")
+            return key, cached['content']
+        return key, None
+
+    @staticmethod
+    def _build_messages(prompt: str, system_message: str = None) -> List[Dict[str, str]]:
         messages = []
         
         if system_message:
             messages.append({"role": "system", "content": system_message})
         
         messages.append({"role": "user", "content": prompt})
-        
+        return messages
+
+    def _complete(self, prompt: str, system_message: str = None, use_cache: bool = True,
+                  timeout: float = None) -> str:
+        """Answer from the response cache or the provider router; raises on failure.
+
+        Identical calls are answered from the response cache unless
+        use_cache is False; failed calls are never cached.
+        """
+        key, cached = self._lookup_cache(prompt, system_message, use_cache)
+        if cached is not None:
+            usage_tracker.record(config.openai_model, 'cache', cache_hit=True)
+            return cached
+
+        start = time.perf_counter()
         try:
-            response = self.client.chat.completions.create(
-                model=config.openai_model,
-                messages=messages,
+            response = self.router.complete(
+                self._build_messages(prompt, system_message),
                 temperature=config.temperature,
                 max_tokens=config.max_tokens,
-                timeout=config.timeout
+                timeout=min(timeout, config.timeout) if timeout else config.timeout,
+                # A caller's timeout bounds the whole call, failovers and hedges included
+                deadline=time.monotonic() + timeout if timeout else None
             )
-            
-            content = response.choices[0].message.content
-            logger.info(f"OpenAI API call successful. Tokens used: {response.usage.total_tokens}")
-            return content
-            
+        except Exception:
+            usage_tracker.record(config.openai_model, 'router', latency=time.perf_counter() - start, ok=False)
+            raise
+
+        content = response.content
+        prompt_tokens, completion_tokens = response.prompt_tokens, response.completion_tokens
+        if not response.total_tokens:
+            # The Anthropic completions API reports no usage; count locally
+            prompt_tokens = count_tokens((system_message or '') + prompt)
+            completion_tokens = count_tokens(content or '')
+        usage_tracker.record(
+            response.model, response.provider,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency=time.perf_counter() - start,
+            hedged=response.hedged
+        )
+        if key is not None and content:
+            self.cache.put(key, content, prompt_tokens + completion_tokens)
+        return content
+
+    def _call_model(self, prompt: str, system_message: str = None, use_cache: bool = True) -> str:
+        """Call the model with proper error handling; failures come back as the error text"""
+        try:
+            return self._complete(prompt, system_message, use_cache)
         except Exception as e:
             error_msg = f"Error calling OpenAI API: {str(e)}"
             logger.error(error_msg)
             return error_msg
     
-    def analyze_site_data(self, site_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze construction site data"""
+    def _triage_analysis(self, site_data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Return (templated analysis for a clearly normal payload or None, triage verdict or None)"""
+        if self.triage is None or not isinstance(site_data, dict):
+            return None, None
+        started = time.perf_counter()
+        verdict = self.triage.evaluate(site_data)
+        if verdict["decision"] != NORMAL:
+            logger.info(f"Triage: {verdict['decision']} ({verdict['reason']}), sending to model")
+            return None, verdict
+
+        result = SiteTriage.templated_analysis(verdict, started)
+        self.memory.store_interaction({
+            "type": "site_analysis",
+            "input": site_data,
+            "output": result,
+            "processing_time": result["metadata"]["processing_time_seconds"],
+            "triaged": True
+        })
+        return result, verdict
+
+    def _analysis_without_model(self, site_data: Dict[str, Any], use_cache: bool,
+                                triage: bool) -> Optional[Dict[str, Any]]:
+        """Triage, then similarity reuse; None when the model has to answer.
+
+        A payload whose triage flagged a reading or keyword (anomalous, or
+        near a threshold) always goes to the model: reusing an earlier
+        analysis is exactly what triage exists to prevent for it.
+        """
+        verdict = None
+        if triage:
+            triaged, verdict = self._triage_analysis(site_data)
+            if triaged is not None:
+                return triaged
+        if verdict is not None and (verdict["findings"] or verdict["keywords"]):
+            return None
+        if use_cache:
+            return self._reuse_similar_analysis(site_data)
+        return None
+
+    def _reuse_similar_analysis(self, site_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return a recent analysis of a near-identical payload, if there is one"""
+        matches = self.memory.find_similar(
+            site_data,
+            k=3,
+            min_score=config.similarity_threshold,
+            max_age_seconds=config.similarity_max_age_seconds
+        )
+        match = next((
+            m for m in matches
+            if not m["interaction"].get("failed")
+            and "analysis" in (m["interaction"].get("output") or {})
+            and readings_match(site_data, m["interaction"].get("input"), config.similarity_numeric_tolerance)
+        ), None)
+        if match is None:
+            return None
+
+        prior = match["interaction"]["output"]
+
+        self.reused_analyses += 1
+        logger.info(f"Reusing analysis {match['id']} (similarity {match['score']})")
+        result = {
+            "analysis": prior["analysis"],
+            "metadata": {
+                **prior.get("metadata", {}),
+                "processing_time_seconds": 0.0,
+                "timestamp": datetime.now().isoformat(),
+                "reused_from": match["id"],
+                "similarity": match["score"]
+            }
+        }
+        self.memory.store_interaction({
+            "type": "site_analysis",
+            "input": site_data,
+            "output": result,
+            "processing_time": 0.0,
+            "reused_from": match["id"]
+        })
+        return result
+
+    @staticmethod
+    def _analysis_prompt(site_data: Dict[str, Any]):
+        """System message and prompt for a site analysis"""
+        payload, _ = compact_json(site_data)
         system_message = """You are SiteSupervisor AI, an expert construction site monitoring assistant. 
         Your role is to analyze site data, identify issues, and provide actionable recommendations.
         
@@ -73,7 +219,7 @@ class SiteSupervisorAgent:
         Analyze this construction site data and provide a comprehensive assessment:
         
         SITE DATA:
-        {json.dumps(site_data, indent=2)}
+        {payload}
         
         Please provide a thorough analysis covering:
         1. Safety compliance and potential hazards
@@ -84,11 +230,38 @@ class SiteSupervisorAgent:
         
         Be specific, actionable, and professional in your assessment.
         """
-        
+        return system_message, prompt
+
+    def analyze_site_data(self, site_data: Dict[str, Any], use_cache: bool = True,
+                          triage: bool = True) -> Dict[str, Any]:
+        """Analyze construction site data"""
+        with usage_context(action='analyze'):
+            return self._analyze_site_data(site_data, use_cache, triage)
+
+    def _analyze_site_data(self, site_data: Dict[str, Any], use_cache: bool, triage: bool) -> Dict[str, Any]:
+        shortcut = self._analysis_without_model(site_data, use_cache, triage)
+        if shortcut is not None:
+            return shortcut
+
+        system_message, prompt = self._analysis_prompt(site_data)
         start_time = datetime.now()
-        analysis_text = self._call_model(prompt, system_message)
+        failed = False
+        try:
+            analysis_text = self._complete(prompt, system_message, use_cache=use_cache)
+        except Exception as e:
+            analysis_text = f"Error calling OpenAI API: {str(e)}"
+            logger.error(analysis_text)
+            failed = True
         processing_time = (datetime.now() - start_time).total_seconds()
-        
+        return self._record_analysis(site_data, analysis_text, processing_time, failed=failed)
+
+    def _record_analysis(self, site_data: Dict[str, Any], analysis_text: str,
+                         processing_time: float, failed: bool = False) -> Dict[str, Any]:
+        """Parse the model's answer and store the interaction.
+
+        failed marks the error text of a model call that raised; such rows
+        are kept for the history but never indexed or reused.
+        """
         try:
             # Try to parse JSON response
             analysis_data = json.loads(analysis_text)
@@ -109,14 +282,102 @@ class SiteSupervisorAgent:
         }
         
         # Store in memory
-        self.memory.store_interaction({
+        interaction = {
             "type": "site_analysis",
             "input": site_data,
             "output": result,
             "processing_time": processing_time
-        })
+        }
+        if failed:
+            interaction["failed"] = True
+        self.memory.store_interaction(interaction)
         
         return result
+
+    def _analyze_item_sync(self, site_data: Dict[str, Any], use_cache: bool, triage: bool,
+                           deadline: float) -> Dict[str, Any]:
+        """One batch item, run on a worker thread: triage/reuse, model call, memory write"""
+        shortcut = self._analysis_without_model(site_data, use_cache, triage)
+        if shortcut is not None:
+            return shortcut
+        system_message, prompt = self._analysis_prompt(site_data)
+        started = time.monotonic()
+        if deadline - started <= 0:
+            raise TimeoutError()
+        analysis_text = self._complete(prompt, system_message, use_cache=use_cache, timeout=deadline - started)
+        return self._record_analysis(site_data, analysis_text, time.monotonic() - started)
+
+    async def _analyze_item(self, executor: ThreadPoolExecutor, semaphore: asyncio.Semaphore, index: int,
+                            site_data: Dict[str, Any], use_cache: bool, triage: bool,
+                            item_timeout: float, deadline: float) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            if not isinstance(site_data, dict) or not site_data:
+                raise ValueError("Item must be a non-empty object")
+            await semaphore.acquire()
+            # Time spent queued for a slot counts against the batch deadline
+            timeout = min(item_timeout, deadline - loop.time())
+            if timeout <= 0:
+                semaphore.release()
+                raise asyncio.TimeoutError()
+            # copy_context carries the batch's usage_context into the worker thread
+            call = loop.run_in_executor(
+                executor, contextvars.copy_context().run,
+                self._analyze_item_sync, site_data, use_cache, triage, time.monotonic() + timeout
+            )
+            # The slot is given back when the thread finishes, not when wait_for gives
+            # up on it, so the executor (one thread per slot) never queues an item
+            call.add_done_callback(lambda future: (semaphore.release(), future.cancelled() or future.exception()))
+            result = await asyncio.wait_for(asyncio.shield(call), timeout=timeout)
+            return {"index": index, "success": True, "result": result}
+        except (asyncio.TimeoutError, TimeoutError):
+            error = f"Timed out after {loop.time() - started:.1f}s"
+        except Exception as e:
+            error = str(e)
+        logger.error(f"Batch item {index} failed: {error}")
+        return {"index": index, "success": False, "error": error}
+
+    async def _analyze_batch(self, items: List[Dict[str, Any]], use_cache: bool, triage: bool, concurrency: int,
+                             item_timeout: float, batch_timeout: float) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(concurrency)
+        deadline = asyncio.get_running_loop().time() + batch_timeout
+        # Per batch, so concurrent batches never queue behind each other's items. Leaving
+        # the block waits for timed-out calls, which the router stops at their deadline
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch-item') as executor:
+            return await asyncio.gather(*(
+                self._analyze_item(executor, semaphore, index, site_data, use_cache, triage, item_timeout, deadline)
+                for index, site_data in enumerate(items)
+            ))
+
+    def analyze_batch(self, items: List[Dict[str, Any]], use_cache: bool = True,
+                      concurrency: int = None, item_timeout: float = None,
+                      triage: bool = True) -> Dict[str, Any]:
+        """Analyze many sites concurrently; results come back in input order.
+
+        Wall time is bounded by the slowest item (plus queueing when there
+        are more items than concurrency slots) rather than the sum.
+        """
+        concurrency = max(1, min(concurrency or config.batch_concurrency, config.batch_concurrency))
+        item_timeout = min(item_timeout or config.batch_item_timeout_seconds, config.batch_item_timeout_seconds)
+        start = time.perf_counter()
+        with usage_context(action='analyze_batch'):
+            results = asyncio.run(self._analyze_batch(
+                items, use_cache, triage, concurrency, item_timeout, config.batch_timeout_seconds
+            ))
+        succeeded = sum(1 for item in results if item["success"])
+        triaged = sum(1 for item in results if item["success"] and item["result"]["metadata"].get("triage"))
+        return {
+            "results": results,
+            "summary": {
+                "total": len(results),
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+                "triaged": triaged,
+                "concurrency": concurrency,
+                "wall_time_seconds": round(time.perf_counter() - start, 3)
+            }
+        }
     
     def process_n8n_data(self, n8n_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process data received from n8n webhook"""
@@ -124,17 +385,20 @@ class SiteSupervisorAgent:
             action = n8n_data.get('action', 'analyze')
             site_data = n8n_data.get('data', {})
             workflow_id = n8n_data.get('workflow_id', 'unknown')
+            use_cache = n8n_data.get('cache', True) is not False
+            triage = n8n_data.get('triage', True) is not False
             
             logger.info(f"Processing n8n request: action={action}, workflow_id={workflow_id}")
             
-            if action == 'analyze':
-                result = self.analyze_site_data(site_data)
-            elif action == 'inspect':
-                result = self.perform_site_inspection(site_data)
-            elif action == 'report':
-                result = self.generate_daily_report(site_data)
-            else:
-                result = {'error': f'Unknown action: {action}'}
+            with usage_context(workflow_id=workflow_id):
+                if action == 'analyze':
+                    result = self.analyze_site_data(site_data, use_cache=use_cache, triage=triage)
+                elif action == 'inspect':
+                    result = self.perform_site_inspection(site_data, use_cache=use_cache)
+                elif action == 'report':
+                    result = self.generate_daily_report(site_data, use_cache=use_cache)
+                else:
+                    result = {'error': f'Unknown action: {action}'}
             
             # Store workflow interaction
             self.memory.store_workflow_data(workflow_id, {
@@ -150,8 +414,10 @@ class SiteSupervisorAgent:
             logger.error(error_msg)
             return {'error': error_msg}
     
-    def perform_site_inspection(self, inspection_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Perform detailed site inspection analysis"""
+    @staticmethod
+    def _inspection_prompt(inspection_data: Dict[str, Any]):
+        """System message and prompt for a site inspection"""
+        payload, _ = compact_json(inspection_data)
         system_message = """You are a construction site safety inspector. Analyze inspection data 
         and provide detailed safety assessments and compliance checks."""
         
@@ -159,21 +425,31 @@ class SiteSupervisorAgent:
         Perform a comprehensive safety inspection analysis:
         
         INSPECTION DATA:
-        {json.dumps(inspection_data, indent=2)}
+        {payload}
         
         Provide detailed safety assessment including compliance status, violations found, 
         and corrective actions required.
         """
-        
-        analysis = self._call_model(prompt, system_message)
-        
+        return system_message, prompt
+
+    @staticmethod
+    def _inspection_result(analysis: str) -> Dict[str, Any]:
         return {
             "inspection_report": analysis,
             "timestamp": datetime.now().isoformat()
         }
+
+    def perform_site_inspection(self, inspection_data: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        """Perform detailed site inspection analysis"""
+        system_message, prompt = self._inspection_prompt(inspection_data)
+        with usage_context(action='inspect'):
+            analysis = self._call_model(prompt, system_message, use_cache=use_cache)
+        return self._inspection_result(analysis)
     
-    def generate_daily_report(self, daily_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate daily site report"""
+    @staticmethod
+    def _report_prompt(daily_data: Dict[str, Any]):
+        """System message and prompt for a daily report"""
+        payload, _ = compact_json(daily_data)
         system_message = """You are a construction project manager. Generate comprehensive 
         daily reports summarizing site progress, issues, and next steps."""
         
@@ -181,19 +457,125 @@ class SiteSupervisorAgent:
         Generate a professional daily construction report:
         
         DAILY DATA:
-        {json.dumps(daily_data, indent=2)}
+        {payload}
         
         Include: work completed, workforce present, issues encountered, safety observations, 
         and plan for next day.
         """
-        
-        report = self._call_model(prompt, system_message)
-        
+        return system_message, prompt
+
+    @staticmethod
+    def _report_result(report: str) -> Dict[str, Any]:
         return {
             "daily_report": report,
             "report_date": datetime.now().isoformat(),
             "generated_by": "SiteSupervisor AI"
         }
+
+    def generate_daily_report(self, daily_data: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        """Generate daily site report"""
+        system_message, prompt = self._report_prompt(daily_data)
+        with usage_context(action='report'):
+            report = self._call_model(prompt, system_message, use_cache=use_cache)
+        return self._report_result(report)
+
+    def _stream_model(self, prompt: str, system_message: str = None, use_cache: bool = True,
+                      action: str = None) -> Iterator[str]:
+        """Yield the completion text as it arrives.
+
+        A cache hit is yielded as a single chunk; a complete stream is
+        cached like any other call. Errors propagate to the caller. The
+        action is passed explicitly: a context variable set inside a
+        generator would leak into the caller between yields.
+        """
+        key, cached = self._lookup_cache(prompt, system_message, use_cache)
+        if cached is not None:
+            usage_tracker.record(config.openai_model, 'cache', cache_hit=True, action=action)
+            yield cached
+            return
+
+        messages = self._build_messages(prompt, system_message)
+        start = time.perf_counter()
+        parts = []
+        try:
+            for delta in self.router.stream(
+                messages,
+                temperature=config.temperature,
+                max_tokens=config.max_tokens,
+                timeout=config.timeout
+            ):
+                parts.append(delta)
+                yield delta
+        except Exception:
+            usage_tracker.record(config.openai_model, 'router', latency=time.perf_counter() - start, ok=False,
+                                 action=action)
+            raise
+
+        content = ''.join(parts)
+        # Streamed responses carry no usage block, so tokens are counted locally
+        prompt_tokens = sum(count_tokens(message['content']) for message in messages)
+        completion_tokens = count_tokens(content)
+        usage_tracker.record(
+            config.openai_model, 'router',
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency=time.perf_counter() - start,
+            action=action
+        )
+        if key is not None and content:
+            # Same total as _complete, so saved_tokens does not depend on which endpoint filled the entry
+            self.cache.put(key, content, prompt_tokens + completion_tokens)
+
+    def stream_action(self, action: str, data: Dict[str, Any], use_cache: bool = True,
+                      triage: bool = True) -> Iterator[Dict[str, Any]]:
+        """Run analyze/inspect/report, yielding {'event', 'data'} items for SSE.
+
+        Events: start, token (one per model delta), result (the same payload
+        the non-streaming call returns) and error. The assembled result is
+        stored in memory only once the stream completes.
+        """
+        builders = {
+            'analyze': self._analysis_prompt,
+            'inspect': self._inspection_prompt,
+            'report': self._report_prompt,
+        }
+        if action not in builders:
+            yield {'event': 'error', 'data': {'error': f'Unknown action: {action}'}}
+            return
+
+        yield {'event': 'start', 'data': {'action': action, 'model': config.openai_model}}
+
+        if action == 'analyze':
+            shortcut = self._analysis_without_model(data, use_cache, triage)
+            if shortcut is not None:
+                yield {'event': 'result', 'data': shortcut}
+                return
+
+        system_message, prompt = builders[action](data)
+        start_time = datetime.now()
+        parts = []
+        try:
+            for delta in self._stream_model(prompt, system_message, use_cache=use_cache, action=action):
+                parts.append(delta)
+                yield {'event': 'token', 'data': {'text': delta}}
+        except Exception as e:
+            logger.error(f"Error streaming from model provider: {e}")
+            yield {'event': 'error', 'data': {'error': f"Error calling OpenAI API: {str(e)}"}}
+            return
+
+        text = ''.join(parts)
+        processing_time = (datetime.now() - start_time).total_seconds()
+        if action == 'analyze':
+            result = self._record_analysis(data, text, processing_time)
+        else:
+            result = self._inspection_result(text) if action == 'inspect' else self._report_result(text)
+            self.memory.store_interaction({
+                "type": "site_inspection" if action == 'inspect' else "daily_report",
+                "input": data,
+                "output": result,
+                "processing_time": processing_time
+            })
+        yield {'event': 'result', 'data': result}
     
     def trigger_n8n_workflow(self, workflow_data: Dict[str, Any]) -> bool:
         """Trigger an n8n workflow from the agent"""
@@ -207,12 +589,14 @@ class SiteSupervisorAgent:
                 'X-N8N-API-KEY': self.n8n_config.get('api_key', '')
             }
             
-            response = requests.post(
-                self.n8n_config['webhook_url'],
-                json=workflow_data,
-                headers=headers,
-                timeout=30
-            )
+            with track_outbound('n8n') as call:
+                response = requests.post(
+                    self.n8n_config['webhook_url'],
+                    json=workflow_data,
+                    headers=headers,
+                    timeout=30
+                )
+                call['ok'] = response.status_code == 200
             
             success = response.status_code == 200
             if success:
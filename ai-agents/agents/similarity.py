@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import math
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r'[a-z0-9_]+')
+
+
+def _round_number(value: float) -> str:
+    """Two significant figures, so 92.4 and 92.6 degrees land on the same token"""
+    if value == 0 or not math.isfinite(value):
+        return str(value)
+    return f'{value:.1e}'
+
+
+def tokenize(data: Any, prefix: str = '') -> Iterable[str]:
+    """Flatten a site payload into path=value tokens plus free-text words.
+
+    Keys give structure (equipment.status=down), words cover descriptions
+    and notes, numbers are coarsened so close readings still match.
+    """
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from tokenize(value, f'{prefix}.{key}' if prefix else str(key))
+    elif isinstance(data, (list, tuple)):
+        for item in data:
+            yield from tokenize(item, prefix)
+    elif isinstance(data, bool) or data is None:
+        yield f'{prefix}={data}'
+    elif isinstance(data, (int, float)):
+        yield f'{prefix}={_round_number(float(data))}'
+    else:
+        text = str(data).lower()
+        words = _WORD.findall(text)
+        if len(words) <= 3:
+            yield f'{prefix}={text}'
+        for word in words:
+            yield word
+            yield f'{prefix}:{word}'
+
+
+def numeric_fields(data: Any, prefix: str = '') -> Dict[str, float]:
+    """Every numeric leaf of a payload by exact path (equipment[3].temperature)"""
+    fields = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            fields.update(numeric_fields(value, f'{prefix}.{key}' if prefix else str(key)))
+    elif isinstance(data, (list, tuple)):
+        for index, item in enumerate(data):
+            fields.update(numeric_fields(item, f'{prefix}[{index}]'))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        fields[prefix] = float(data)
+    return fields
+
+
+def readings_match(a: Any, b: Any, tolerance: float) -> bool:
+    """True when both payloads have the same numeric fields, each within a relative tolerance.
+
+    Cosine similarity is dominated by the fields that did not change; this
+    is the check that one changed reading cannot slip through.
+    """
+    fields_a, fields_b = numeric_fields(a), numeric_fields(b)
+    if fields_a.keys() != fields_b.keys():
+        return False
+    return all(
+        abs(value - fields_b[path]) <= tolerance * max(abs(value), abs(fields_b[path]))
+        for path, value in fields_a.items()
+    )
+
+
+def _bucket(token: str, dimensions: int) -> Tuple[int, float]:
+    digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+    value = int.from_bytes(digest, 'little')
+    # Signed hashing keeps collisions from only ever adding similarity
+    return value % dimensions, (1.0 if value >> 63 else -1.0)
+
+
+class SimilarityIndex:
+    """Hashed TF-IDF vectors of past payloads with brute-force cosine search.
+
+    Rows hold log-scaled term frequencies; IDF weights come from running
+    document frequencies and are applied at query time, so adding a
+    payload is O(tokens) and never rewrites existing rows. Squared rows are
+    kept alongside so a search is two matrix-vector products.
+    """
+
+    def __init__(self, dimensions: int = 1024, max_items: int = 10000):
+        self.dimensions = dimensions
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((256, dimensions), dtype=np.float32)
+        self._squares = np.zeros((256, dimensions), dtype=np.float32)
+        self._ids = np.zeros(256, dtype=np.int64)
+        self._created = np.zeros(256, dtype=np.float64)
+        self._doc_freq = np.zeros(dimensions, dtype=np.float32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def vectorize(self, data: Any) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in tokenize(data):
+            index, sign = _bucket(token, self.dimensions)
+            vector[index] += sign
+        # Sublinear TF: a list of 40 identical machines should not drown everything else
+        return np.sign(vector) * np.log1p(np.abs(vector))
+
+    def add(self, item_id: int, data: Any, created_at: Optional[float] = None):
+        vector = self.vectorize(data)
+        with self._lock:
+            if self._size == len(self._ids):
+                self._grow()
+            self._vectors[self._size] = vector
+            self._squares[self._size] = vector * vector
+            self._ids[self._size] = item_id
+            self._created[self._size] = created_at or time.time()
+            self._doc_freq += vector != 0
+            self._size += 1
+            if self._size > self.max_items * 1.25:
+                self._drop_oldest(self._size - self.max_items)
+
+    def _grow(self):
+        capacity = len(self._ids) * 2
+        self._vectors = np.resize(self._vectors, (capacity, self.dimensions))
+        self._squares = np.resize(self._squares, (capacity, self.dimensions))
+        self._ids = np.resize(self._ids, capacity)
+        self._created = np.resize(self._created, capacity)
+
+    def _drop_oldest(self, count: int):
+        self._doc_freq -= (self._vectors[:count] != 0).sum(axis=0)
+        keep = slice(count, self._size)
+        self._size -= count
+        self._vectors[:self._size] = self._vectors[keep].copy()
+        self._squares[:self._size] = self._squares[keep].copy()
+        self._ids[:self._size] = self._ids[keep].copy()
+        self._created[:self._size] = self._created[keep].copy()
+
+    def remove(self, item_id: int):
+        """Forget an item whose interaction no longer exists (memory retention)"""
+        with self._lock:
+            positions = np.nonzero(self._ids[:self._size] == item_id)[0]
+            for position in positions:
+                self._doc_freq -= self._vectors[position] != 0
+                self._vectors[position] = 0
+                self._squares[position] = 0
+                self._ids[position] = -1
+
+    def search(self, data: Any, k: int = 5, min_score: float = 0.0,
+               max_age_seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Top-k [{'id', 'score'}] by cosine similarity, best first"""
+        query = self.vectorize(data)
+        with self._lock:
+            if self._size == 0:
+                return []
+            idf = np.log((1.0 + self._size) / (1.0 + self._doc_freq)) + 1.0
+            idf_squared = idf * idf
+            query_norm = np.sqrt(np.dot(query * query, idf_squared))
+            if query_norm == 0:
+                return []
+            # cos(v*idf, q*idf) without materialising the weighted matrix
+            dots = self._vectors[:self._size] @ (query * idf_squared)
+            norms = np.sqrt(self._squares[:self._size] @ idf_squared)
+            scores = dots / np.maximum(norms * query_norm, 1e-12)
+            scores[self._ids[:self._size] < 0] = -1.0
+            if max_age_seconds:
+                scores[self._created[:self._size] < time.time() - max_age_seconds] = -1.0
+            ids = self._ids[:self._size].copy()
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {'id': int(ids[position]), 'score': round(float(scores[position]), 4)}
+            for position in top if scores[position] >= min_score and ids[position] >= 0
+        ]
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT,
+    timestamp TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_interactions_type_id ON interactions (type, id);
+CREATE INDEX IF NOT EXISTS ix_interactions_created_at ON interactions (created_at);
+
+CREATE TABLE IF NOT EXISTS workflows (
+    workflow_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_workflows_updated_at ON workflows (updated_at);
+"""
+
+
+def _pack(data: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(data, separators=(',', ':'), default=str).encode('utf-8'), 6)
+
+
+def _unpack(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob))
+
+
+def _to_epoch(value: Optional[str]) -> Optional[float]:
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+class SQLiteMemoryStore:
+    """Interaction log and workflow map in SQLite (WAL mode).
+
+    Safe for several processes sharing one file: every write is a short
+    transaction, ids come from AUTOINCREMENT so they only ever grow, and
+    payloads are zlib-compressed JSON.
+    """
+
+    def __init__(self, db_path: str, max_interactions: int = 10000,
+                 max_interaction_bytes: int = 256 * 1024 * 1024,
+                 max_workflows: int = 5000, max_workflow_bytes: int = 64 * 1024 * 1024,
+                 retention_every: int = 100):
+        self.db_path = db_path
+        self.max_interactions = max_interactions
+        self.max_interaction_bytes = max_interaction_bytes
+        self.max_workflows = max_workflows
+        self.max_workflow_bytes = max_workflow_bytes
+        self.retention_every = retention_every
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections must not be shared"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Interactions
+    # ------------------------------------------------------------------
+    def append_interaction(self, interaction: Dict[str, Any]) -> int:
+        """Append an interaction and return its id"""
+        now = time.time()
+        timestamp = interaction.get('timestamp') or datetime.fromtimestamp(now).isoformat()
+        body = {k: v for k, v in interaction.items() if k not in ('id', 'timestamp')}
+        payload = _pack(body)
+
+        conn = self._connect()
+        cursor = conn.execute(
+            'INSERT INTO interactions (type, timestamp, created_at, size, payload) VALUES (?, ?, ?, ?, ?)',
+            (interaction.get('type'), timestamp, _to_epoch(timestamp) or now, len(payload), payload),
+        )
+        self._maybe_apply_retention()
+        return cursor.lastrowid
+
+    def _row_to_interaction(self, row: sqlite3.Row) -> Dict[str, Any]:
+        interaction = _unpack(row['payload'])
+        interaction['id'] = row['id']
+        interaction['timestamp'] = row['timestamp']
+        return interaction
+
+    def query_interactions(self, limit: int = 10, interaction_type: Optional[str] = None,
+                           since: Optional[str] = None, until: Optional[str] = None,
+                           before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest-first page of interactions; pass the last id as before_id for the next page"""
+        clauses, params = [], []
+        if interaction_type:
+            clauses.append('type = ?')
+            params.append(interaction_type)
+        if since:
+            clauses.append('created_at >= ?')
+            params.append(_to_epoch(since))
+        if until:
+            clauses.append('created_at < ?')
+            params.append(_to_epoch(until))
+        if before_id:
+            clauses.append('id < ?')
+            params.append(before_id)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._connect().execute(
+            f'SELECT id, timestamp, payload FROM interactions {where} ORDER BY id DESC LIMIT ?',
+            (*params, limit),
+        ).fetchall()
+        return [self._row_to_interaction(row) for row in rows]
+
+    def get_interaction(self, interaction_id: int) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            'SELECT id, timestamp, payload FROM interactions WHERE id = ?', (interaction_id,)
+        ).fetchone()
+        return self._row_to_interaction(row) if row else None
+
+    def iter_interactions(self, after_id: int = 0, interaction_type: Optional[str] = None,
+                          batch_size: int = 500):
+        """Yield interactions with id > after_id oldest first, in batches (used to build indexes)"""
+        conn = self._connect()
+        type_clause = 'AND type = ?' if interaction_type else ''
+        type_params = (interaction_type,) if interaction_type else ()
+        while True:
+            rows = conn.execute(
+                f'SELECT id, timestamp, payload FROM interactions WHERE id > ? {type_clause} ORDER BY id LIMIT ?',
+                (after_id, *type_params, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._row_to_interaction(row)
+            after_id = rows[-1]['id']
+
+    def count_interactions(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM interactions').fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Workflows
+    # ------------------------------------------------------------------
+    def put_workflow(self, workflow_id: str, data: Dict[str, Any]):
+        payload = _pack(data)
+        self._connect().execute(
+            'INSERT INTO workflows (workflow_id, updated_at, size, payload) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(workflow_id) DO UPDATE SET updated_at = excluded.updated_at, '
+            'size = excluded.size, payload = excluded.payload',
+            (workflow_id, time.time(), len(payload), payload),
+        )
+        self._maybe_apply_retention()
+
+    def get_workflow(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            'SELECT payload FROM workflows WHERE workflow_id = ?', (workflow_id,)
+        ).fetchone()
+        return _unpack(row['payload']) if row else None
+
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+    def _maybe_apply_retention(self):
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.retention_every == 0
+        if due:
+            self.apply_retention()
+
+    def apply_retention(self) -> Dict[str, int]:
+        """Drop the oldest interactions and least recently updated workflows over the limits"""
+        conn = self._connect()
+        removed = {'interactions': 0, 'workflows': 0}
+        for table, order, max_rows, max_bytes in (
+            ('interactions', 'id', self.max_interactions, self.max_interaction_bytes),
+            ('workflows', 'updated_at', self.max_workflows, self.max_workflow_bytes),
+        ):
+            # Newest rows first: keep while within both the row and byte budget
+            cutoff = conn.execute(
+                f'SELECT {order} FROM ('
+                f'  SELECT {order}, SUM(size) OVER (ORDER BY {order} DESC) AS running, '
+                f'         ROW_NUMBER() OVER (ORDER BY {order} DESC) AS position '
+                f'  FROM {table}'
+                f') WHERE running > ? OR position > ? ORDER BY {order} DESC LIMIT 1',
+                (max_bytes, max_rows),
+            ).fetchone()
+            if cutoff is not None:
+                cursor = conn.execute(f'DELETE FROM {table} WHERE {order} <= ?', (cutoff[0],))
+                removed[table] = cursor.rowcount
+        if removed['interactions'] or removed['workflows']:
+            logger.info(f"Memory retention removed {removed['interactions']} interactions, "
+                        f"{removed['workflows']} workflows")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        interactions = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0), MAX(id) FROM interactions').fetchone()
+        workflows = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM workflows').fetchone()
+        return {
+            'interactions': interactions[0],
+            'interaction_bytes': interactions[1],
+            'last_interaction_id': interactions[2],
+            'workflows': workflows[0],
+            'workflow_bytes': workflows[1],
+        }
+
+    # ------------------------------------------------------------------
+    # Migration from the old single JSON file
+    # ------------------------------------------------------------------
+    def import_legacy_json(self, json_path: str) -> int:
+        """Load interactions/workflows from the old agent_memory.json once, then rename it"""
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            logger.error(f"Could not import legacy memory file {json_path}: {e}")
+            return 0
+
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another worker may have imported it while we were waiting for the lock
+            if conn.execute('SELECT COUNT(*) FROM interactions').fetchone()[0] == 0:
+                for interaction in legacy.get('interactions', []):
+                    timestamp = interaction.get('timestamp') or datetime.now().isoformat()
+                    body = {k: v for k, v in interaction.items() if k not in ('id', 'timestamp')}
+                    payload = _pack(body)
+                    conn.execute(
+                        'INSERT INTO interactions (type, timestamp, created_at, size, payload) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (interaction.get('type'), timestamp, _to_epoch(timestamp), len(payload), payload),
+                    )
+                for workflow_id, data in legacy.get('workflows', {}).items():
+                    payload = _pack(data)
+                    conn.execute(
+                        'INSERT OR IGNORE INTO workflows (workflow_id, updated_at, size, payload) '
+                        'VALUES (?, ?, ?, ?)',
+                        (workflow_id, _to_epoch(data.get('last_updated')) or time.time(), len(payload), payload),
+                    )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        imported = len(legacy.get('interactions', []))
+        os.replace(json_path, json_path + '.migrated')
+        logger.info(f"Imported {imported} interactions from {json_path}")
+        return imported
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from config.models import config
+from monitoring.metrics import TRIAGE_DECISIONS
+
+logger = logging.getLogger(__name__)
+
+NORMAL = 'normal'
+AMBIGUOUS = 'ambiguous'
+ANOMALOUS = 'anomalous'
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class SiteTriage:
+    """Rule check in front of the model for routine site snapshots.
+
+    Each rule bounds a metric ({"metric", "min"|"max", "keys", "message"});
+    readings are collected wherever the metric's keys appear in the payload.
+    A payload is normal only if it has at least one reading, every reading
+    is clear of its bound by more than margin, and no escalation keyword
+    appears. Anything past a bound is anomalous; anything else (near a
+    bound, non-numeric, no readings) is ambiguous. Only normal payloads
+    skip the model.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], margin: float = 0.1, keywords: List[str] = None):
+        self.rules = rules
+        self.margin = margin
+        self.keywords = [keyword.lower() for keyword in (keywords or [])]
+        self._rules_by_key = {}
+        for rule in rules:
+            for key in rule.get('keys') or [rule['metric']]:
+                self._rules_by_key[key.lower()] = rule
+        self._lock = threading.Lock()
+        self._counts = {NORMAL: 0, AMBIGUOUS: 0, ANOMALOUS: 0}
+
+    @classmethod
+    def from_config(cls, settings=config) -> 'SiteTriage':
+        try:
+            rules = json.loads(settings.triage_rules)
+        except ValueError:
+            logger.error("TRIAGE_RULES is not valid JSON; every payload will go to the model")
+            rules = []
+        keywords = [keyword.strip() for keyword in settings.triage_escalate_keywords.split(',') if keyword.strip()]
+        return cls(rules, margin=settings.triage_margin, keywords=keywords)
+
+    def _collect(self, data: Any, readings: List[tuple], keywords: set, path: str = ''):
+        if isinstance(data, dict):
+            for key, value in data.items():
+                child = f'{path}.{key}' if path else str(key)
+                rule = self._rules_by_key.get(str(key).lower())
+                if rule is not None and not isinstance(value, (dict, list)):
+                    readings.append((child, rule, value))
+                elif rule is not None and isinstance(value, list) and all(_is_number(v) for v in value):
+                    readings.extend((f'{child}[{i}]', rule, v) for i, v in enumerate(value))
+                else:
+                    self._collect(value, readings, keywords, child)
+        elif isinstance(data, list):
+            for index, item in enumerate(data):
+                self._collect(item, readings, keywords, f'{path}[{index}]')
+        elif isinstance(data, str) and self.keywords:
+            text = data.lower()
+            keywords.update(keyword for keyword in self.keywords if keyword in text)
+
+    def _check(self, path: str, rule: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        """Grade one reading; score is its value as a fraction of the bound (1.0 = at the bound)"""
+        finding = {'path': path, 'metric': rule['metric'], 'value': value}
+        if not _is_number(value):
+            return {**finding, 'status': AMBIGUOUS, 'score': None}
+        scores = []
+        if 'max' in rule:
+            scores.append(value / rule['max'] if rule['max'] else float('inf') if value > 0 else 0.0)
+        if 'min' in rule:
+            scores.append(rule['min'] / value if value > 0 else float('inf'))
+        score = max(scores) if scores else 0.0
+        if score > 1.0:
+            status = ANOMALOUS
+            finding['message'] = rule.get('message', f"{rule['metric']} out of range")
+        elif score > 1.0 - self.margin:
+            status = AMBIGUOUS
+        else:
+            status = NORMAL
+        return {**finding, 'status': status, 'score': round(score, 3)}
+
+    def evaluate(self, data: Any) -> Dict[str, Any]:
+        """{'decision', 'score', 'checked', 'findings', 'keywords', 'reason'} for a site payload"""
+        readings, keywords = [], set()
+        self._collect(data, readings, keywords)
+        findings = [self._check(path, rule, value) for path, rule, value in readings]
+        statuses = {finding['status'] for finding in findings}
+        scores = [finding['score'] for finding in findings if finding['score'] is not None]
+
+        if ANOMALOUS in statuses or keywords:
+            decision = ANOMALOUS
+            reason = 'keywords' if ANOMALOUS not in statuses else 'threshold exceeded'
+        elif not findings:
+            decision, reason = AMBIGUOUS, 'no monitored readings'
+        elif AMBIGUOUS in statuses:
+            decision, reason = AMBIGUOUS, 'reading near threshold'
+        else:
+            decision, reason = NORMAL, 'all readings within range'
+
+        with self._lock:
+            self._counts[decision] += 1
+        TRIAGE_DECISIONS.labels(decision).inc()
+        return {
+            'decision': decision,
+            'reason': reason,
+            'score': round(max(scores), 3) if scores else None,
+            'checked': len(findings),
+            # Normal readings are summarized by the count; only the rest are listed
+            'findings': [finding for finding in findings if finding['status'] != NORMAL],
+            'keywords': sorted(keywords),
+        }
+
+    @staticmethod
+    def templated_analysis(verdict: Dict[str, Any], started: float) -> Dict[str, Any]:
+        """The analyze response for a normal payload, in the model's JSON format"""
+        return {
+            'analysis': {
+                'safety_analysis': {'issues': [], 'risk_level': 'low', 'recommendations': []},
+                'progress_analysis': {'status': 'not_assessed', 'completion_estimate': '', 'bottlenecks': []},
+                'resource_analysis': {'equipment_issues': [], 'staffing_issues': [], 'material_issues': []},
+                'overall_risk_score': 0,
+                'priority_actions': [],
+                'summary': f"All {verdict['checked']} monitored readings within normal ranges.",
+            },
+            'metadata': {
+                'processing_time_seconds': round(time.perf_counter() - started, 6),
+                'model_used': 'triage',
+                'timestamp': datetime.now().isoformat(),
+                'triage': verdict,
+            },
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        evaluated = sum(counts.values())
+        return {
+            'evaluated': evaluated,
+            'skipped': counts[NORMAL],
+            'skip_ratio': round(counts[NORMAL] / evaluated, 4) if evaluated else 0.0,
+            'ambiguous': counts[AMBIGUOUS],
+            'anomalous': counts[ANOMALOUS],
+        }
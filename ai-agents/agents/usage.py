@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from config.models import config
+from monitoring.metrics import MODEL_CALLS, MODEL_COST, MODEL_TOKENS
+
+logger = logging.getLogger(__name__)
+
+current_action: ContextVar[str] = ContextVar('current_action', default='unknown')
+current_workflow_id: ContextVar[Optional[str]] = ContextVar('current_workflow_id', default=None)
+
+# Workflow ids come from n8n payloads; bound how many get their own bucket
+MAX_WORKFLOWS = 500
+OTHER_WORKFLOWS = '_other'
+
+
+@contextmanager
+def usage_context(action: Optional[str] = None, workflow_id: Optional[str] = None) -> Iterator[None]:
+    """Attribute model calls made inside the block to an action and/or n8n workflow.
+
+    Values left as None keep whatever an outer block set. Context variables
+    follow asyncio tasks, so batch items inherit the batch's context.
+    """
+    tokens = []
+    if action is not None:
+        tokens.append((current_action, current_action.set(action)))
+    if workflow_id is not None:
+        tokens.append((current_workflow_id, current_workflow_id.set(workflow_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def _new_bucket() -> Dict[str, Any]:
+    return {
+        'calls': 0, 'errors': 0, 'cache_hits': 0, 'hedged': 0,
+        'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0,
+        'latency_sum': 0.0, 'latency_max': 0.0,
+    }
+
+
+def _add(bucket: Dict[str, Any], record: Dict[str, Any]):
+    bucket['calls'] += 1
+    bucket['errors'] += 0 if record['ok'] else 1
+    bucket['cache_hits'] += 1 if record['cache_hit'] else 0
+    bucket['hedged'] += 1 if record['hedged'] else 0
+    bucket['prompt_tokens'] += record['prompt_tokens']
+    bucket['completion_tokens'] += record['completion_tokens']
+    bucket['cost_usd'] += record['cost_usd']
+    bucket['latency_sum'] += record['latency']
+    bucket['latency_max'] = max(bucket['latency_max'], record['latency'])
+
+
+def _render(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    calls = bucket['calls']
+    return {
+        'calls': calls,
+        'errors': bucket['errors'],
+        'cache_hits': bucket['cache_hits'],
+        'hedged': bucket['hedged'],
+        'prompt_tokens': bucket['prompt_tokens'],
+        'completion_tokens': bucket['completion_tokens'],
+        'total_tokens': bucket['prompt_tokens'] + bucket['completion_tokens'],
+        'cost_usd': round(bucket['cost_usd'], 4),
+        'latency_avg_ms': round(bucket['latency_sum'] / calls * 1000, 1) if calls else 0.0,
+        'latency_max_ms': round(bucket['latency_max'] * 1000, 1),
+    }
+
+
+class UsageTracker:
+    """In-process totals of model calls by action, workflow and model.
+
+    record() is a dict update under a lock plus three Prometheus counter
+    increments, so it runs on every call. Totals are per worker process;
+    Prometheus (/metrics) aggregates across workers.
+    """
+
+    def __init__(self, pricing: Dict[str, Any] = None):
+        self.pricing = pricing or {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._total = _new_bucket()
+        self._by_action: Dict[str, Dict[str, Any]] = {}
+        self._by_model: Dict[str, Dict[str, Any]] = {}
+        self._by_workflow: Dict[str, Dict[str, Any]] = {}
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """USD from MODEL_PRICING: {"model": [prompt $/1k tokens, completion $/1k tokens]}"""
+        price = self.pricing.get(model)
+        if price is None:
+            # Dated snapshots (gpt-4-0613) fall back to their family price
+            price = next((p for name, p in sorted(self.pricing.items(), key=lambda item: -len(item[0]))
+                          if model.startswith(name)), None)
+        if price is None:
+            return 0.0
+        return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1000
+
+    def record(self, model: str, provider: str, prompt_tokens: int = 0, completion_tokens: int = 0,
+               latency: float = 0.0, cache_hit: bool = False, hedged: bool = False, ok: bool = True,
+               action: Optional[str] = None, workflow_id: Optional[str] = None) -> Dict[str, Any]:
+        record = {
+            'action': action or current_action.get(),
+            'workflow_id': workflow_id or current_workflow_id.get(),
+            'model': model,
+            'provider': provider,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'latency': latency,
+            'cache_hit': cache_hit,
+            'hedged': hedged,
+            'ok': ok,
+            # A cache hit costs nothing; its tokens are reported as saved by the cache
+            'cost_usd': 0.0 if cache_hit else self.cost(model, prompt_tokens, completion_tokens),
+        }
+
+        with self._lock:
+            _add(self._total, record)
+            _add(self._by_action.setdefault(record['action'], _new_bucket()), record)
+            _add(self._by_model.setdefault(model, _new_bucket()), record)
+            if record['workflow_id']:
+                workflow = record['workflow_id']
+                if workflow not in self._by_workflow and len(self._by_workflow) >= MAX_WORKFLOWS:
+                    workflow = OTHER_WORKFLOWS
+                _add(self._by_workflow.setdefault(workflow, _new_bucket()), record)
+
+        outcome = 'cache_hit' if cache_hit else ('success' if ok else 'error')
+        MODEL_CALLS.labels(record['action'], model, outcome).inc()
+        if not cache_hit:
+            MODEL_TOKENS.labels(record['action'], model, 'prompt').inc(prompt_tokens)
+            MODEL_TOKENS.labels(record['action'], model, 'completion').inc(completion_tokens)
+            MODEL_COST.labels(record['action'], model).inc(record['cost_usd'])
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Model call {json.dumps(record, separators=(',', ':'))}")
+        return record
+
+    def totals(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**_render(self._total), 'since': self.started_at}
+
+    def snapshot(self, top_workflows: int = 50) -> Dict[str, Any]:
+        with self._lock:
+            workflows = sorted(self._by_workflow.items(), key=lambda item: item[1]['cost_usd'], reverse=True)
+            return {
+                'since': self.started_at,
+                'total': _render(self._total),
+                'by_action': {name: _render(bucket) for name, bucket in self._by_action.items()},
+                'by_model': {name: _render(bucket) for name, bucket in self._by_model.items()},
+                'by_workflow': {name: _render(bucket) for name, bucket in workflows[:top_workflows]},
+            }
+
+
+def _load_pricing() -> Dict[str, Any]:
+    try:
+        return json.loads(config.model_pricing)
+    except ValueError:
+        logger.error("MODEL_PRICING is not valid JSON; costs will be reported as 0")
+        return {}
+
+
+usage_tracker = UsageTracker(_load_pricing())
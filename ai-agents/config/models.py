@@ -19,11 +19,75 @@ class ModelConfig(BaseSettings):
     openai_api_key: str = ""
     openai_model: str = "gpt-4"
     openai_base_url: str = "https://api.openai.com/v1"
+
+    # Other providers (used when listed in provider_priority)
+    azure_openai_endpoint: str = ""
+    azure_openai_api_key: str = ""
+    azure_openai_deployment: str = "gpt-4"
+    azure_openai_api_version: str = "2023-05-15"
+    anthropic_api_key: str = ""
+    anthropic_model: str = "claude-2"
+    local_model_base_url: str = ""
+    local_model: str = "llama3"
+
+    # Provider routing: comma-separated failover order, e.g. "openai,azure_openai,local"
+    provider_priority: str = ""
+    router_hedge_enabled: bool = True
+    router_hedge_percentile: float = 95
+    router_hedge_min_delay_seconds: float = 1.0
+    router_hedge_max_ratio: float = 0.1
+    router_ewma_alpha: float = 0.2
+    router_breaker_failures: int = 5
+    router_breaker_error_rate: float = 0.5
+    router_breaker_cooldown_seconds: float = 30
     
     # Model Parameters
     temperature: float = 0.1
     max_tokens: int = 2000
     timeout: int = 30
+
+    # USD per 1k tokens as [prompt, completion], for usage accounting
+    model_pricing: str = (
+        '{"gpt-4": [0.03, 0.06], "gpt-4-32k": [0.06, 0.12], "gpt-4-turbo": [0.01, 0.03], '
+        '"gpt-4o": [0.005, 0.015], "gpt-4o-mini": [0.00015, 0.0006], "gpt-3.5-turbo": [0.0005, 0.0015]}'
+    )
+
+    # Pre-triage of /api/analyze payloads: clearly normal readings skip the model.
+    # Default bounds match the backend's sentinel_agent; margin widens them into
+    # an "ambiguous" band that still goes to the model.
+    triage_enabled: bool = True
+    triage_rules: str = (
+        '[{"metric": "temperature", "max": 90, "message": "High engine temperature detected."}, '
+        '{"metric": "oil_pressure", "min": 30, "message": "Low oil pressure warning."}, '
+        '{"metric": "vibration", "max": 5, "message": "Abnormal vibration detected - check suspension."}]'
+    )
+    triage_margin: float = 0.1
+    triage_escalate_keywords: str = "incident,injury,accident,fire,leak,collapse,failure,emergency,alarm"
+
+    # Model response cache (set model_cache_path empty for memory only)
+    model_cache_enabled: bool = True
+    model_cache_path: str = "./model_cache.db"
+    model_cache_max_entries: int = 512
+    model_cache_ttl_seconds: int = 86400
+
+    # Site payloads embedded in prompts (compacted, then truncated to this budget)
+    prompt_max_payload_tokens: int = 4000
+    prompt_array_summary_threshold: int = 20
+
+    # POST /api/analyze/batch (keep batch_timeout_seconds under the gunicorn timeout)
+    batch_max_items: int = 100
+    batch_concurrency: int = 8
+    batch_item_timeout_seconds: float = 60
+    batch_timeout_seconds: float = 100
+
+    # Async /webhook/n8n jobs (?async=true or Prefer: respond-async)
+    jobs_enabled: bool = True
+    job_store_path: str = "./agent_jobs.db"
+    job_workers: int = 2
+    job_lease_seconds: float = 300
+    job_max_attempts: int = 3
+    job_callback_retry_seconds: float = 30
+    job_retention_seconds: float = 7 * 86400
     
     # Application Settings
     flask_env: str = "development"
@@ -31,6 +95,29 @@ class ModelConfig(BaseSettings):
     flask_port: int = 5000
     agent_memory_path: str = "./agent_memory.json"
     log_level: str = "INFO"
+
+    # Logging (monitoring/logging_setup.py): queued, rotated by size or age
+    log_file: str = "logs/app.log"
+    log_json: bool = False
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_backup_count: int = 5
+    log_rotate_seconds: float = 86400
+    log_debug_sample_rate: float = 1.0
+    log_queue_size: int = 10000
+
+    # Memory retention (SQLite store next to agent_memory_path)
+    memory_max_interactions: int = 10000
+    memory_max_interaction_bytes: int = 256 * 1024 * 1024
+    memory_max_workflows: int = 5000
+    memory_max_workflow_bytes: int = 64 * 1024 * 1024
+
+    # Reuse of past analyses for near-identical site payloads
+    similarity_enabled: bool = True
+    similarity_dimensions: int = 1024
+    similarity_threshold: float = 0.97
+    similarity_max_age_seconds: int = 6 * 3600
+    # Every numeric field must also be within this relative difference to reuse
+    similarity_numeric_tolerance: float = 0.02
     
     # Security
     api_key: str = "default-api-key-change-in-production"
@@ -40,7 +127,14 @@ class ModelConfig(BaseSettings):
     n8n_base_url: str = "http://localhost:5678"
     n8n_api_key: str = "default-n8n-key"
     n8n_webhook_url: str = "http://localhost:5678/webhook/site-supervisor"
-    
+
+    # n8n REST client (integration/n8n_integration.py)
+    n8n_pool_size: int = 10
+    n8n_max_retries: int = 3
+    n8n_retry_backoff_seconds: float = 0.5
+    n8n_workflow_cache_ttl_seconds: float = 300
+    n8n_batch_concurrency: int = 4
+
     @validator("openai_api_key")
     def validate_openai_key(cls, v):
         if not v:
@@ -0,0 +1,17 @@
+# gunicorn.conf.py - loaded automatically when gunicorn starts from this directory
+import os
+import shutil
+
+
+def on_starting(server):
+    # Stale files from a previous run would be aggregated into /metrics
+    metrics_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
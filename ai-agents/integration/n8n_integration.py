@@ -5,70 +5,153 @@ import os
 import requests
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config.models import config
+from monitoring.metrics import track_outbound
 
 logger = logging.getLogger(__name__)
 
 class N8NIntegration:
-    def __init__(self):
-        self.base_url = config.n8n_base_url
-        self.api_key = config.n8n_api_key
-        
-    def get_workflows(self) -> List[Dict[str, Any]]:
+    """Client for the n8n REST API.
+
+    All calls share one pooled keep-alive session. Connection errors are
+    retried for every request; 429/5xx responses only for reads, since
+    re-running a workflow is not safe. Workflow metadata is cached for
+    n8n_workflow_cache_ttl_seconds.
+    """
+
+    def __init__(self, base_url: str = None, api_key: str = None, cache_ttl: float = None):
+        self.base_url = (base_url or config.n8n_base_url).rstrip('/')
+        self.api_key = api_key or config.n8n_api_key
+        self.cache_ttl = config.n8n_workflow_cache_ttl_seconds if cache_ttl is None else cache_ttl
+        self.session = self._build_session()
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._cache_lock = threading.Lock()
+
+    def _build_session(self) -> requests.Session:
+        retry = Retry(
+            total=config.n8n_max_retries,
+            backoff_factor=config.n8n_retry_backoff_seconds,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=config.n8n_pool_size,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'X-N8N-API-KEY': self.api_key})
+        return session
+
+    def close(self):
+        self.session.close()
+
+    def _get_cached(self, path: str, refresh: bool = False) -> Any:
+        """GET path as JSON through the TTL cache; serves a stale copy if n8n is unreachable"""
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(path)
+        if entry is not None and not refresh and now - entry[0] < self.cache_ttl:
+            return entry[1]
+
+        try:
+            with track_outbound('n8n') as call:
+                response = self.session.get(f'{self.base_url}{path}', timeout=10)
+                call['ok'] = response.status_code == 200
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            if entry is None:
+                raise
+            logger.warning(f"n8n unreachable, serving cached {path} from {now - entry[0]:.0f}s ago")
+            return entry[1]
+
+        with self._cache_lock:
+            self._cache[path] = (now, data)
+        return data
+
+    def invalidate_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    def get_workflows(self, refresh: bool = False) -> List[Dict[str, Any]]:
         """Get list of all n8n workflows"""
         try:
-            headers = {'X-N8N-API-KEY': self.api_key}
-            response = requests.get(f'{self.base_url}/rest/workflows', headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                return response.json().get('data', [])
-            else:
-                logger.error(f"Failed to get workflows: {response.status_code}")
-                return []
-                
+            return self._get_cached('/rest/workflows', refresh).get('data', [])
         except Exception as e:
             logger.error(f"Error getting workflows: {e}")
             return []
-    
-    def execute_workflow(self, workflow_id: str, data: Dict[str, Any]) -> bool:
-        """Execute a specific n8n workflow"""
+
+    def get_workflow(self, workflow_id: str, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Get a single workflow's metadata"""
         try:
-            headers = {
-                'X-N8N-API-KEY': self.api_key,
-                'Content-Type': 'application/json'
-            }
-            
-            payload = {
-                'workflow_id': workflow_id,
-                'data': data
-            }
-            
-            response = requests.post(
-                f'{self.base_url}/rest/workflows/{workflow_id}/run',
-                json=payload,
-                headers=headers,
-                timeout=30
-            )
-            
-            success = response.status_code == 200
-            if success:
-                logger.info(f"Successfully executed workflow {workflow_id}")
-            else:
-                logger.error(f"Failed to execute workflow {workflow_id}: {response.status_code}")
-            
-            return success
-            
+            return self._get_cached(f'/rest/workflows/{workflow_id}', refresh).get('data')
+        except Exception as e:
+            logger.error(f"Error getting workflow {workflow_id}: {e}")
+            return None
+
+    def _run_workflow(self, workflow_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        payload = {
+            'workflow_id': workflow_id,
+            'data': data
+        }
+        start = time.perf_counter()
+        try:
+            with track_outbound('n8n') as call:
+                response = self.session.post(
+                    f'{self.base_url}/rest/workflows/{workflow_id}/run',
+                    json=payload,
+                    timeout=30
+                )
+                call['ok'] = response.status_code == 200
+            result = {'success': response.status_code == 200, 'status_code': response.status_code}
         except Exception as e:
             logger.error(f"Error executing workflow: {e}")
-            return False
-    
+            result = {'success': False, 'status_code': None, 'error': str(e)}
+
+        if result['success']:
+            logger.info(f"Successfully executed workflow {workflow_id}")
+        elif result['status_code'] is not None:
+            logger.error(f"Failed to execute workflow {workflow_id}: {result['status_code']}")
+        result['workflow_id'] = workflow_id
+        result['latency'] = round(time.perf_counter() - start, 4)
+        return result
+
+    def execute_workflow(self, workflow_id: str, data: Dict[str, Any]) -> bool:
+        """Execute a specific n8n workflow"""
+        return self._run_workflow(workflow_id, data)['success']
+
+    def execute_workflows(self, runs: List[Dict[str, Any]], concurrency: int = None) -> List[Dict[str, Any]]:
+        """Execute many workflow runs ({'workflow_id', 'data'}) with bounded concurrency.
+
+        Results come back in input order as
+        {'workflow_id', 'success', 'status_code', 'latency'[, 'error']}.
+        """
+        if not runs:
+            return []
+        # More threads than pooled connections would just wait on the pool
+        concurrency = min(concurrency or config.n8n_batch_concurrency, config.n8n_pool_size, len(runs))
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='n8n-run') as executor:
+            return list(executor.map(
+                lambda run: self._run_workflow(run['workflow_id'], run.get('data', {})), runs
+            ))
+
     def test_connection(self) -> bool:
         """Test connection to n8n instance"""
         try:
-            headers = {'X-N8N-API-KEY': self.api_key}
-            response = requests.get(f'{self.base_url}/rest/health', headers=headers, timeout=10)
+            with track_outbound('n8n') as call:
+                response = self.session.get(f'{self.base_url}/rest/health', timeout=10)
+                call['ok'] = response.status_code == 200
             return response.status_code == 200
         except Exception as e:
             logger.error(f"n8n connection test failed: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -1,36 +1,74 @@
 
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import logging
 import os
 import hmac
 import hashlib
+import json
 from datetime import datetime
 
 from agents.sentinel import SiteSupervisorAgent
+from agents.jobs import JobRunner, JobStore
 from agents.memory import AgentMemory
+from agents.usage import usage_tracker
 from config.models import config
+from monitoring.logging_setup import setup_logging
+from monitoring.metrics import init_metrics
 
 # Configure logging
-logging.basicConfig(
+setup_logging(
     level=config.log_level,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/app.log'),
-        logging.StreamHandler()
-    ]
+    log_file=config.log_file,
+    json_format=config.log_json,
+    max_bytes=config.log_max_bytes,
+    backup_count=config.log_backup_count,
+    rotate_seconds=config.log_rotate_seconds,
+    debug_sample_rate=config.log_debug_sample_rate,
+    queue_size=config.log_queue_size
 )
 
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+init_metrics(app)
 
 # Initialize components
 memory = AgentMemory()
 agent = SiteSupervisorAgent(memory)
 
+def deliver_job_result(job):
+    """Report a finished async webhook job back to n8n"""
+    payload = job['payload']
+    return agent.trigger_n8n_workflow({
+        'event': 'job.finished',
+        'job_id': job['id'],
+        'status': job['status'],
+        'success': job['status'] == 'succeeded',
+        'action': payload.get('action', 'analyze'),
+        'workflow_id': payload.get('workflow_id', 'unknown'),
+        'workflow_run_id': payload.get('workflow_run_id', 'unknown'),
+        'result': job['result'],
+        'error': job['error'],
+        'timestamp': datetime.now().isoformat()
+    })
+
+job_runner = None
+if config.jobs_enabled:
+    job_runner = JobRunner(
+        JobStore(config.job_store_path, lease_seconds=config.job_lease_seconds,
+                 max_attempts=config.job_max_attempts),
+        handler=agent.process_n8n_data,
+        deliver=deliver_job_result,
+        workers=config.job_workers,
+        callback_retry_seconds=config.job_callback_retry_seconds,
+        retention_seconds=config.job_retention_seconds
+    )
+    # Also resumes jobs left queued or running by a previous process
+    job_runner.start()
+
 def verify_webhook_signature(payload: bytes, signature: str) -> bool:
     """Verify webhook signature for security"""
     expected_signature = hmac.new(
@@ -40,6 +78,23 @@ def verify_webhook_signature(payload: bytes, signature: str) -> bool:
     ).hexdigest()
     return hmac.compare_digest(expected_signature, signature)
 
+def cache_bypassed() -> bool:
+    """Clients skip the model response cache with Cache-Control: no-cache or ?cache=false"""
+    cache_control = request.headers.get('Cache-Control', '').lower()
+    return 'no-cache' in cache_control or request.args.get('cache', '').lower() in ('false', '0', 'no')
+
+def triage_bypassed() -> bool:
+    """Clients send routine-looking payloads to the model anyway with ?triage=false"""
+    return request.args.get('triage', '').lower() in ('false', '0', 'no')
+
+def async_requested(payload) -> bool:
+    """n8n opts into job mode with ?async=true, Prefer: respond-async or "async": true"""
+    return (
+        request.args.get('async', '').lower() in ('true', '1', 'yes')
+        or 'respond-async' in request.headers.get('Prefer', '')
+        or payload.get('async') is True
+    )
+
 def require_api_key(f):
     """Decorator to require API key for protected endpoints"""
     from functools import wraps
@@ -73,13 +128,67 @@ def analyze_site():
         
         logger.info(f"Analyzing site data: {len(str(data))} characters")
         
-        result = agent.analyze_site_data(data)
+        result = agent.analyze_site_data(data, use_cache=not cache_bypassed(), triage=not triage_bypassed())
         return jsonify(result)
         
     except Exception as e:
         logger.error(f"Error in analyze_site: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/<any(analyze, inspect, report):action>/stream', methods=['POST'])
+@require_api_key
+def stream_action(action):
+    """Stream analyze/inspect/report output as Server-Sent Events"""
+    data = request.json
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    logger.info(f"Streaming {action} for {len(str(data))} characters of site data")
+    use_cache, triage = not cache_bypassed(), not triage_bypassed()
+    
+    def events():
+        for item in agent.stream_action(action, data, use_cache=use_cache, triage=triage):
+            yield f"event: {item['event']}\ndata: {json.dumps(item['data'])}\n\n"
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop nginx from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/analyze/batch', methods=['POST'])
+@require_api_key
+def analyze_batch():
+    """Analyze several sites concurrently; results keep the input order"""
+    try:
+        data = request.json or {}
+        items = data.get('items') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Provide a non-empty "items" list'}), 400
+        if len(items) > config.batch_max_items:
+            return jsonify({'error': f'At most {config.batch_max_items} items per batch'}), 413
+        
+        options = data if isinstance(data, dict) else {}
+        concurrency, item_timeout = options.get('concurrency'), options.get('timeout')
+        for value in (concurrency, item_timeout):
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0):
+                return jsonify({'error': 'concurrency and timeout must be positive numbers'}), 400
+        
+        logger.info(f"Analyzing batch of {len(items)} sites")
+        
+        result = agent.analyze_batch(
+            items,
+            use_cache=not cache_bypassed(),
+            concurrency=int(concurrency) if concurrency else None,
+            item_timeout=item_timeout,
+            triage=not triage_bypassed()
+        )
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Error in analyze_batch: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/webhook/n8n', methods=['POST'])
 def n8n_webhook():
     """n8n webhook endpoint"""
@@ -95,6 +204,26 @@ def n8n_webhook():
         
         logger.info(f"Received n8n webhook: {n8n_data.get('action', 'unknown')}")
         
+        if cache_bypassed():
+            n8n_data['cache'] = False
+        if triage_bypassed():
+            n8n_data['triage'] = False
+        
+        if job_runner is not None and async_requested(n8n_data):
+            run_id = n8n_data.get('workflow_run_id')
+            # n8n retries reuse the run id, so they map onto the same job
+            dedupe_key = run_id and f"{n8n_data.get('workflow_id', 'unknown')}:{run_id}:{n8n_data.get('action', 'analyze')}"
+            job = job_runner.submit(n8n_data, dedupe_key, callback=n8n_data.get('callback', True) is not False)
+            return jsonify({
+                'success': True,
+                'job_id': job['id'],
+                'status': job['status'],
+                'duplicate': job['duplicate'],
+                'status_url': f"/api/jobs/{job['id']}",
+                'workflow_run_id': run_id or 'unknown',
+                'timestamp': datetime.now().isoformat()
+            }), 202, {'Location': f"/api/jobs/{job['id']}"}
+        
         result = agent.process_n8n_data(n8n_data)
         
         response = {
@@ -116,15 +245,84 @@ def n8n_webhook():
 @app.route('/api/memory/interactions', methods=['GET'])
 @require_api_key
 def get_recent_interactions():
-    """Get recent interactions from memory"""
+    """Get interactions from memory, newest first, with optional filters"""
     try:
         limit = min(int(request.args.get('limit', 10)), 100)
-        interactions = memory.get_recent_interactions(limit)
-        return jsonify({'interactions': interactions, 'count': len(interactions)})
+        before_id = request.args.get('before_id', type=int)
+        since = request.args.get('since')
+        until = request.args.get('until')
+        try:
+            for value in (since, until):
+                if value:
+                    datetime.fromisoformat(value)
+        except ValueError:
+            return jsonify({'error': 'since/until must be ISO 8601 timestamps'}), 400
+
+        interactions = memory.query_interactions(
+            limit=limit,
+            interaction_type=request.args.get('type'),
+            since=since,
+            until=until,
+            before_id=before_id
+        )
+        return jsonify({
+            'interactions': interactions,
+            'count': len(interactions),
+            'next_before_id': interactions[-1]['id'] if len(interactions) == limit else None
+        })
     except Exception as e:
         logger.error(f"Error getting interactions: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/memory/similar', methods=['POST'])
+@require_api_key
+def find_similar_interactions():
+    """Find past analyses of payloads similar to the posted site data"""
+    try:
+        data = request.json
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        k = min(int(request.args.get('k', 5)), 20)
+        min_score = float(request.args.get('min_score', 0.0))
+        matches = memory.find_similar(data, k=k, min_score=min_score)
+        return jsonify({
+            'matches': [
+                {
+                    'id': match['id'],
+                    'score': match['score'],
+                    'timestamp': match['interaction']['timestamp'],
+                    'output': match['interaction'].get('output')
+                }
+                for match in matches
+            ],
+            'count': len(matches)
+        })
+    except Exception as e:
+        logger.error(f"Error finding similar interactions: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@require_api_key
+def get_job(job_id):
+    """Status and result of an async webhook job"""
+    if job_runner is None:
+        return jsonify({'error': 'Async jobs are disabled'}), 404
+    job = job_runner.store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/usage', methods=['GET'])
+@require_api_key
+def get_usage():
+    """Model calls, tokens, cost and latency by action, model and workflow"""
+    try:
+        top = min(int(request.args.get('top', 50)), 500)
+        return jsonify(usage_tracker.snapshot(top_workflows=top))
+    except Exception as e:
+        logger.error(f"Error getting usage: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/status', methods=['GET'])
 @require_api_key
 def get_status():
@@ -133,7 +331,19 @@ def get_status():
         'status': 'running',
         'model': config.openai_model,
         'model_provider': config.provider,
-        'memory_entries': len(memory.memory.get('interactions', [])),
+        'memory_entries': memory.count_interactions(),
+        'memory': memory.stats(),
+        'model_cache': agent.cache.stats() if agent.cache else {'enabled': False},
+        'providers': agent.router.stats(),
+        'jobs': job_runner.store.counts() if job_runner is not None else {'enabled': False},
+        'similarity': {
+            'enabled': memory.index is not None,
+            'indexed': len(memory.index) if memory.index is not None else 0,
+            'threshold': config.similarity_threshold,
+            'reused_analyses': agent.reused_analyses
+        },
+        'triage': agent.triage.stats() if agent.triage else {'enabled': False},
+        'usage': usage_tracker.totals(),
         'startup_time': datetime.now().isoformat()
     })
 
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_state: Dict[str, Any] = {'handler': None, 'listener': None, 'handlers': (), 'queue_size': 0}
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra= fields become top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith('_'):
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RotatingLogFileHandler(RotatingFileHandler):
+    """Rolls over at max_bytes or every interval_seconds, whichever comes first.
+
+    Both triggers keep the app.log.1 ... app.log.N naming.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 0, backup_count: int = 5, interval_seconds: float = 0):
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.interval_seconds = interval_seconds
+        started = os.stat(filename).st_mtime if os.path.exists(filename) else time.time()
+        self.rollover_at = started + interval_seconds if interval_seconds else None
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return 1
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        if self.interval_seconds:
+            self.rollover_at = time.time() + self.interval_seconds
+
+
+class DebugSampler(logging.Filter):
+    """Pass every record above DEBUG and every Nth DEBUG record per call site"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counts: Dict[tuple, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        if not self.every:
+            return False
+        site = (record.pathname, record.lineno)
+        count = self._counts.get(site, 0)
+        self._counts[site] = count + 1
+        return count % self.every == 0
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full.
+
+    The number dropped is logged as a warning once the queue has drained.
+    """
+
+    def __init__(self, log_queue: Optional[queue.Queue]):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback while args and exc_info are still
+        # valid; formatting is left to the listener's handlers
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            if self._unreported and self.queue.qsize() <= self.queue.maxsize // 2:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    'name': __name__,
+                    'levelno': logging.WARNING,
+                    'levelname': 'WARNING',
+                    'msg': f'Dropped {self._unreported} log records (queue full)',
+                }))
+                self._unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+
+def _start_listener():
+    log_queue = queue.Queue(maxsize=_state['queue_size'])
+    listener = QueueListener(log_queue, *_state['handlers'], respect_handler_level=True)
+    listener.start()
+    _state['handler'].queue = log_queue
+    _state['listener'] = listener
+
+
+def _restart_after_fork():
+    # The listener thread does not survive fork and the queue's lock may have
+    # been held when it happened, so the child gets fresh ones
+    if _state['handler'] is not None:
+        _state['listener'] = None
+        _start_listener()
+
+
+def _stop_listener():
+    if _state['listener'] is not None:
+        _state['listener'].stop()
+        _state['listener'] = None
+
+
+def setup_logging(level: str = 'INFO', log_file: Optional[str] = None, json_format: bool = False,
+                  max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, rotate_seconds: float = 86400,
+                  debug_sample_rate: float = 1.0, queue_size: int = 10000):
+    """Route the root logger through a queue to stdout and, if log_file is set, a rotating file.
+
+    Request threads only enqueue; a background listener does the I/O.
+    Calling again replaces the earlier setup.
+    """
+    with _lock:
+        root = logging.getLogger()
+        if _state['handler'] is not None:
+            _stop_listener()
+            root.removeHandler(_state['handler'])
+
+        formatter = JsonFormatter() if json_format else logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        handlers = [logging.StreamHandler(sys.stdout)]
+        if log_file:
+            handlers.append(RotatingLogFileHandler(log_file, max_bytes, backup_count, rotate_seconds))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        queue_handler = NonBlockingQueueHandler(None)  # queue set by _start_listener
+        queue_handler.addFilter(DebugSampler(debug_sample_rate))
+        _state.update(handler=queue_handler, handlers=tuple(handlers), queue_size=queue_size)
+        _start_listener()
+
+        root.addHandler(queue_handler)
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(_stop_listener)
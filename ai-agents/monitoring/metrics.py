@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from flask import Flask, Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set, gunicorn workers share mmap files and
+# /metrics aggregates them (see gunicorn.conf.py).
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by route',
+    ['method', 'route', 'status'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'HTTP requests currently being served',
+    ['method', 'route'],
+    multiprocess_mode='livesum',
+)
+OUTBOUND_LATENCY = Histogram(
+    'outbound_request_duration_seconds',
+    'Latency of calls to external services',
+    ['service'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+OUTBOUND_REQUESTS = Counter(
+    'outbound_requests_total',
+    'Calls to external services by outcome',
+    ['service', 'outcome'],
+)
+MODEL_CALLS = Counter(
+    'model_calls_total',
+    'Model calls by agent action, model and outcome',
+    ['action', 'model', 'outcome'],
+)
+MODEL_TOKENS = Counter(
+    'model_tokens_total',
+    'Tokens sent to and received from model providers',
+    ['action', 'model', 'kind'],
+)
+MODEL_COST = Counter(
+    'model_cost_usd_total',
+    'Estimated model spend in USD (MODEL_PRICING)',
+    ['action', 'model'],
+)
+TRIAGE_DECISIONS = Counter(
+    'triage_decisions_total',
+    'Site payloads by pre-triage decision (normal ones skip the model)',
+    ['decision'],
+)
+MODEL_CACHE_REQUESTS = Counter(
+    'model_cache_requests_total',
+    'Model response cache lookups by outcome',
+    ['outcome'],
+)
+
+
+@contextmanager
+def track_outbound(service: str) -> Iterator[Dict[str, bool]]:
+    """Time a call to an external service (openai, n8n).
+
+    Set ``call["ok"] = False`` inside the block to record a handled failure.
+    """
+    call = {'ok': True}
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call['ok'] = False
+        raise
+    finally:
+        OUTBOUND_LATENCY.labels(service).observe(time.perf_counter() - start)
+        OUTBOUND_REQUESTS.labels(service, 'success' if call['ok'] else 'error').inc()
+
+
+def _route_label() -> str:
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+def init_metrics(app: Flask) -> None:
+    """Register request instrumentation and the /metrics endpoint"""
+
+    @app.before_request
+    def start_request_metrics():
+        if request.path == '/metrics':
+            return
+        g.metrics_route = _route_label()
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_PROGRESS.labels(request.method, g.metrics_route).inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'metrics_start' in g:
+            REQUEST_LATENCY.labels(request.method, g.metrics_route, str(response.status_code)).observe(
+                time.perf_counter() - g.metrics_start
+            )
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        if 'metrics_route' in g:
+            REQUESTS_IN_PROGRESS.labels(request.method, g.pop('metrics_route')).dec()
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus metrics endpoint"""
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+        return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+# config.models validates the key at import time
+os.environ.setdefault('OPENAI_API_KEY', 'sk-test')
+os.environ.setdefault('LOG_FILE', '')
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Local stand-ins for model providers, for exercising the service offline.
+
+    from agents.providers import ProviderRouter
+    from tests.stubs import StubProvider
+
+    router = ProviderRouter([
+        StubProvider('primary', latency=0.05, slow_rate=0.1, slow_latency=2.0),
+        StubProvider('backup', latency=0.08),
+    ], hedge_min_delay=0.1)
+
+The n8n stub lives with the backend's in scripts/stub_servers.py
+(start_stub('n8n') serves the /rest/* routes N8NIntegration calls).
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from agents.providers import ModelResponse
+
+
+class StubProviderError(Exception):
+    pass
+
+
+class StubProvider:
+    """Provider with scripted latency and failures.
+
+    latency: base seconds per call (jittered by +/- jitter)
+    fail_rate: probability a call raises StubProviderError
+    slow_rate / slow_latency: probability and duration of a tail-latency call
+    down: while True, every call fails immediately (toggle to simulate an outage)
+    """
+
+    def __init__(self, name: str, latency: float = 0.05, jitter: float = 0.0, fail_rate: float = 0.0,
+                 slow_rate: float = 0.0, slow_latency: float = 1.0, content: Optional[str] = None,
+                 seed: int = 0):
+        self.name = name
+        self.model = f'{name}-stub'
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.content = content or '{"overall_risk_score": 1, "priority_actions": []}'
+        self.down = False
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _plan(self):
+        with self._lock:
+            self.calls += 1
+            roll, slow_roll, jitter_roll = self._random.random(), self._random.random(), self._random.random()
+        if self.down or roll < self.fail_rate:
+            return None
+        if slow_roll < self.slow_rate:
+            return self.slow_latency
+        return max(0.0, self.latency + (jitter_roll * 2 - 1) * self.jitter)
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                 timeout: float) -> ModelResponse:
+        delay = self._plan()
+        if delay is None:
+            raise StubProviderError(f'{self.name} unavailable')
+        if delay > timeout:
+            time.sleep(timeout)
+            raise StubProviderError(f'{self.name} timed out')
+        time.sleep(delay)
+        prompt_tokens = sum(len(message['content']) for message in messages) // 4
+        completion_tokens = len(self.content) // 4
+        return ModelResponse(
+            content=self.content,
+            provider=self.name,
+            model=self.model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+
+    def stream(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+               timeout: float) -> Iterator[str]:
+        delay = self._plan()
+        if delay is None:
+            raise StubProviderError(f'{self.name} unavailable')
+        words = self.content.split(' ')
+        for index, word in enumerate(words):
+            time.sleep(delay / len(words))
+            yield word if index == len(words) - 1 else word + ' '
+
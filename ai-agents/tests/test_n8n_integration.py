@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+
+import pytest
+
+from config.models import config
+from integration.n8n_integration import N8NIntegration
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+from stub_servers import start_stub  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    server = start_stub('n8n', latency_ms=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def n8n(server, monkeypatch):
+    monkeypatch.setattr(config, 'n8n_max_retries', 2)
+    monkeypatch.setattr(config, 'n8n_retry_backoff_seconds', 0)
+    client = N8NIntegration(base_url=server.url, api_key='test', cache_ttl=0.2)
+    yield client
+    client.close()
+
+
+def test_sequential_calls_reuse_one_connection(n8n, server):
+    for _ in range(20):
+        assert n8n.test_connection()
+
+    assert server.stats['requests'] == 20
+    assert server.stats['connections'] == 1
+
+
+def test_execute_workflows_bounded_by_pool(n8n, server):
+    runs = [{'workflow_id': str(i % 5 + 1), 'data': {'i': i}} for i in range(50)]
+    results = n8n.execute_workflows(runs, concurrency=4)
+
+    assert [result['workflow_id'] for result in results] == [run['workflow_id'] for run in runs]
+    assert all(result['success'] for result in results)
+    assert len(server.stats['runs']) == 50
+    assert server.stats['connections'] <= 4
+
+
+def test_reads_are_retried_on_5xx(n8n, server):
+    server.error_rate = 1.0
+
+    assert n8n.get_workflows() == []
+    assert server.stats['requests'] == config.n8n_max_retries + 1
+
+
+def test_runs_are_not_retried_on_5xx(n8n, server):
+    server.error_rate = 1.0
+
+    assert not n8n.execute_workflow('1', {'site_id': 'S1'})
+    assert server.stats['requests'] == 1
+
+
+def test_workflows_cached_for_ttl(n8n, server):
+    workflows = n8n.get_workflows()
+    assert len(workflows) == 20
+    assert n8n.get_workflows() == workflows
+    assert n8n.get_workflow('3')['name'] == 'Workflow 3'
+    assert server.stats['requests'] == 2
+
+    n8n.get_workflows(refresh=True)
+    assert server.stats['requests'] == 3
+
+    time.sleep(0.25)
+    n8n.get_workflows()
+    assert server.stats['requests'] == 4
+
+    n8n.invalidate_cache()
+    n8n.get_workflow('3')
+    assert server.stats['requests'] == 5
+
+
+def test_stale_workflows_served_when_unreachable(n8n, server):
+    workflows = n8n.get_workflows()
+    server.error_rate = 1.0
+    time.sleep(0.25)
+
+    assert n8n.get_workflows() == workflows
+    assert n8n.get_workflow('3') is None
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+
+import pytest
+
+from agents.providers import ProviderHealth, ProviderRouter, ProviderUnavailable
+from tests.stubs import StubProvider
+
+MESSAGES = [{'role': 'user', 'content': 'status?'}]
+
+
+def _complete(router, timeout=5):
+    return router.complete(MESSAGES, temperature=0, max_tokens=10, timeout=timeout)
+
+
+def _warm_up(router, calls=10):
+    # The hedge delay needs a latency window before it kicks in
+    for _ in range(calls):
+        _complete(router)
+
+
+def test_tail_latency_triggers_hedge():
+    primary = StubProvider('primary', latency=0.01)
+    backup = StubProvider('backup', latency=0.01)
+    router = ProviderRouter([primary, backup], hedge_min_delay=0.05, hedge_max_ratio=1.0)
+    _warm_up(router)
+    assert backup.calls == 0
+
+    primary.latency = 1.0
+    started = time.perf_counter()
+    response = _complete(router)
+
+    assert time.perf_counter() - started < 0.5
+    assert response.hedged
+    assert response.provider == 'backup'
+    assert router.stats()['hedges'] == 1
+    assert router.stats()['hedge_wins'] == 1
+
+
+def test_hedges_respect_max_ratio():
+    primary = StubProvider('primary', latency=0.01)
+    backup = StubProvider('backup', latency=0.01)
+    router = ProviderRouter([primary, backup], hedge_min_delay=0.05, hedge_max_ratio=0.05)
+    _warm_up(router)
+
+    primary.latency = 0.2
+    assert _complete(router).hedged
+    assert not _complete(router).hedged
+
+
+def test_consecutive_failures_open_circuit():
+    primary = StubProvider('primary', latency=0.0)
+    backup = StubProvider('backup', latency=0.0)
+    router = ProviderRouter([primary, backup], hedge_enabled=False, failure_threshold=3, cooldown=60)
+
+    primary.down = True
+    for _ in range(3):
+        assert _complete(router).provider == 'backup'
+    assert router.health['primary'].state == 'open'
+
+    calls = primary.calls
+    assert _complete(router).provider == 'backup'
+    assert primary.calls == calls
+    assert router.stats()['failovers'] == 3
+
+
+def test_probe_after_cooldown_closes_circuit():
+    primary = StubProvider('primary', latency=0.0)
+    backup = StubProvider('backup', latency=0.0)
+    router = ProviderRouter([primary, backup], hedge_enabled=False, failure_threshold=2, cooldown=0.1)
+
+    primary.down = True
+    _complete(router)
+    _complete(router)
+    assert router.health['primary'].state == 'open'
+
+    primary.down = False
+    assert _complete(router).provider == 'backup'
+    time.sleep(0.15)
+    calls = primary.calls
+    assert _complete(router).provider == 'primary'
+    assert primary.calls == calls + 1
+    assert router.health['primary'].state == 'closed'
+
+
+def test_failed_probe_reopens_circuit():
+    primary = StubProvider('primary', latency=0.0)
+    backup = StubProvider('backup', latency=0.0)
+    router = ProviderRouter([primary, backup], hedge_enabled=False, failure_threshold=2, cooldown=0.1)
+
+    primary.down = True
+    _complete(router)
+    _complete(router)
+    opened_at = router.health['primary'].opened_at
+
+    time.sleep(0.15)
+    assert _complete(router).provider == 'backup'
+    assert router.health['primary'].state == 'open'
+    assert router.health['primary'].opened_at > opened_at
+
+
+def test_straggler_success_does_not_close_circuit():
+    health = ProviderHealth(alpha=0.2, failure_threshold=2, error_rate_threshold=0.5, cooldown=0.1)
+    health.record(False, 0.01)
+    health.record(False, 0.01)
+    assert health.state == 'open'
+
+    # Started before the circuit opened
+    health.record(True, 1.0)
+    assert health.state == 'open'
+
+    time.sleep(0.15)
+    assert health.available()
+    health.record(True, 1.0)
+    assert health.state == 'half_open'
+    health.record(True, 0.01)
+    assert health.state == 'closed'
+
+
+def test_stream_fails_over_before_first_chunk():
+    primary = StubProvider('primary', latency=0.0)
+    backup = StubProvider('backup', latency=0.0, content='all clear')
+    router = ProviderRouter([primary, backup], hedge_enabled=False)
+
+    primary.down = True
+    chunks = list(router.stream(MESSAGES, temperature=0, max_tokens=10, timeout=5))
+
+    assert ''.join(chunks) == 'all clear'
+    assert primary.calls == 1
+    assert router.health['primary'].failures == 1
+
+
+def test_all_providers_down_raises():
+    primary = StubProvider('primary', latency=0.0)
+    primary.down = True
+    router = ProviderRouter([primary], hedge_enabled=False)
+
+    with pytest.raises(ProviderUnavailable, match='primary unavailable'):
+        _complete(router)
+
+
+def test_deadline_stops_failover():
+    primary = StubProvider('primary', latency=1.0)
+    backup = StubProvider('backup', latency=1.0)
+    router = ProviderRouter([primary, backup], hedge_enabled=False)
+
+    started = time.perf_counter()
+    with pytest.raises(ProviderUnavailable, match='deadline exceeded'):
+        router.complete(MESSAGES, temperature=0, max_tokens=10, timeout=5, deadline=time.monotonic() + 0.2)
+
+    assert time.perf_counter() - started < 0.5
+    assert backup.calls == 0
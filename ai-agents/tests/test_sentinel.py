@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+import pytest
+
+from agents.memory import AgentMemory
+from agents.providers import ProviderRouter
+from agents.sentinel import SiteSupervisorAgent
+from config.models import config
+from tests.stubs import StubProvider
+
+SITE = {'site_id': 'S1', 'progress': 'slab poured on level 3', 'crew': 12}
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'model_cache_enabled', False)
+    monkeypatch.setattr(config, 'triage_enabled', False)
+    agent = SiteSupervisorAgent(AgentMemory(str(tmp_path / 'agent_memory.db')))
+    agent.provider = StubProvider('primary', latency=0.0)
+    agent.router = ProviderRouter([agent.provider], hedge_enabled=False)
+    return agent
+
+
+def test_similar_payload_reuses_analysis(agent):
+    first = agent.analyze_site_data(SITE)
+    second = agent.analyze_site_data(dict(SITE))
+
+    assert agent.provider.calls == 1
+    assert second['analysis'] == first['analysis']
+    assert second['metadata']['reused_from'] == 1
+
+
+def test_failed_analysis_is_not_reused(agent):
+    agent.provider.down = True
+    failed = agent.analyze_site_data(SITE)
+    assert failed['analysis']['analysis'].startswith('Error calling OpenAI API')
+    assert agent.memory.get_recent_interactions(1)[0]['failed']
+
+    agent.provider.down = False
+    retried = agent.analyze_site_data(dict(SITE))
+
+    assert agent.provider.calls == 2
+    assert 'reused_from' not in retried['metadata']
+    assert retried['analysis']['overall_risk_score'] == 1
+    assert agent.memory.find_similar(SITE)[0]['id'] == 2
+
+
+
+def test_streamed_call_caches_prompt_and_completion_tokens(agent):
+    from agents.cache import ResponseCache
+    from agents.prompting import count_tokens
+
+    agent.cache = ResponseCache(None)
+    system_message, prompt = agent._analysis_prompt(SITE)
+    content = ''.join(agent._stream_model(prompt, system_message, action='analyze'))
+    key, cached = agent._lookup_cache(prompt, system_message)
+
+    assert cached == content
+    assert agent.cache.get(key)['tokens'] == count_tokens(system_message) + count_tokens(prompt) + count_tokens(content)
+
+
+def _batch(count):
+    return [{'site_id': f'S{index}', 'progress': f'batch item {index}'} for index in range(count)]
+
+
+def test_concurrent_batches_do_not_share_slots(agent, monkeypatch):
+    monkeypatch.setattr(config, 'batch_concurrency', 2)
+    agent.provider.latency = 0.2
+    results = []
+
+    def run():
+        results.append(agent.analyze_batch(_batch(4), use_cache=False, item_timeout=0.35))
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [batch['summary']['succeeded'] for batch in results] == [4, 4]
+
+
+def test_timed_out_item_releases_its_slot(agent, monkeypatch):
+    monkeypatch.setattr(config, 'batch_concurrency', 1)
+    agent.provider.latency = 1.0
+
+    started = time.perf_counter()
+    batch = agent.analyze_batch(_batch(2), use_cache=False, item_timeout=0.2)
+
+    assert batch['summary']['failed'] == 2
+    assert all('timed out' in item['error'].lower() for item in batch['results'])
+    # The first call stops at its deadline, so the second item is not stuck behind it
+    assert time.perf_counter() - started < 0.8
@@ -1,4 +1,5 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+import logging
 from functools import wraps
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -8,14 +9,28 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from config import Config
 from datetime import datetime
 from utils.ai_agents import sentinel_agent, quartermaster_agent, chancellor_agent, foreman_agent
-from utils.notification import notify_event
+from utils.notification import notify_event, notify_group
 from utils.automation import trigger_workflow
 from utils.analytics import get_dashboard_stats, get_trend_data, generate_analytics_insight
+from utils.approval import load_approval_rules, apply_approval_rules
+from utils.db_routing import RoutingSession, init_db_routing
+from utils.logging_setup import init_logging
+from utils.metrics import init_metrics
+from utils.sql_profiler import init_sql_profiler
+from utils.rate_limit import rate_limited, init_rate_limiting
+from utils.singleflight import coalesced, init_singleflight
+from utils.serializers import serialize_rows, requested_fields, json_response, format_datetime, dumps
+from utils.compression import init_compression
+from utils.partitions import (
+    ensure_partitions, archive_partitions, iter_archived_rows, iter_hot_rows
+)
 from sqlalchemy import inspect
+import click
 
+logger = logging.getLogger(__name__)
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # reads may go to a replica
 migrate = Migrate()
 jwt = JWTManager()
 
@@ -48,9 +63,25 @@ def role_required(*roles):
         return wrapper
     return decorator
 
+def create_missing_tables():
+    """
+    Create any missing tables straight from the models (dev/SQLite only).
+    Deployed databases are managed by migrations.
+    """
+    existing = set(inspect(db.engine).get_table_names())
+    missing = [name for name in db.metadata.tables if name not in existing]
+    if not missing:
+        print("✅ Tables already exist, skipping creation.")
+        return
+    print(f"📦 Creating missing tables: {', '.join(missing)}")
+    db.create_all()
+    print("✅ Tables created successfully!")
+
+
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    init_logging(app)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # ✅ Performance improvement
 
     # Initialize extensions
@@ -59,20 +90,32 @@ def create_app():
             r"/api/*": {
                 "origins": ["*"],
                 "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-                "allow_headers": ["Content-Type", "Authorization", "Accept"]
+                "allow_headers": ["Content-Type", "Authorization", "Accept"],
+                "expose_headers": ["X-Query-Count", "Server-Timing", "Retry-After",
+                                   "X-RateLimit-Limit", "X-RateLimit-Remaining"]
             }
         },
         supports_credentials=True)
+    init_metrics(app)  # before db.init_app so the engine gets the instrumented pool
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    init_db_routing(app)
+    init_sql_profiler(app)
+    init_rate_limiting(app, db)
+    init_singleflight(app, db)
+    init_compression(app)
 
     # Import models
     from models.project import Project 
     from models.supplier import Supplier
     from models.maintenance import MaintenanceRecord
-    from models.finance import Invoice
+    from models.finance import Invoice, InvoiceApprovalAudit
     from models.user import User, UserRole
+    from models.rate_limit import RateLimitBucket  # noqa: F401 - shared rate limit buckets
+    from models.singleflight import SingleFlightResult  # noqa: F401 - cross-worker coalescing
+
+    approval_rules = load_approval_rules(app.config.get("INVOICE_APPROVAL_RULES"))
 
 
 
@@ -199,9 +242,9 @@ def create_app():
                 "critical_maintenance_reported",
                 {"vehicle_id": vehicle_id, "description": description, "severity": severity}
             )
-            notify_event(
-                "email",
-                "maintenance-team@example.com",
+            notify_group(
+                "maintenance-oncall",
+                ["email", "sms"],
                 "⚠️ Critical Maintenance Alert",
                 f"Vehicle {vehicle_id} reported a CRITICAL issue: {description}"
             )
@@ -213,19 +256,22 @@ def create_app():
     #@jwt_required()
     @cross_origin()
     def get_maintenance():
-        records = MaintenanceRecord.query.order_by(MaintenanceRecord.created_at.desc()).all()
-        results = [
+        # description is a large Text column: only sent with ?include=description
+        results = serialize_rows(
+            db,
             {
-                "id": r.id,
-                "vehicle_id": r.vehicle_id,
-                "description": r.description,
-                "severity": r.severity,
-                "status": r.status,
-                "created_at": r.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            }
-            for r in records
-        ]
-        return jsonify(results), 200
+                "id": MaintenanceRecord.id,
+                "vehicle_id": MaintenanceRecord.vehicle_id,
+                "description": MaintenanceRecord.description,
+                "severity": MaintenanceRecord.severity,
+                "status": MaintenanceRecord.status,
+                "created_at": MaintenanceRecord.created_at,
+            },
+            deferred={"description"},
+            order_by=MaintenanceRecord.created_at.desc(),
+            formatters={"created_at": format_datetime},
+        )
+        return json_response(results)
 
 
     @app.route("/api/maintenance/<int:id>", methods=["PATCH"])
@@ -294,18 +340,14 @@ def create_app():
     @app.route("/api/suppliers", methods=["GET"])
     
     def get_suppliers():
-        suppliers = Supplier.query.all()
-        results = [
-            {
-                "id": s.id,
-                "name": s.name,
-                "contact": s.contact,
-                "rating": s.rating,
-                "last_bid_price": s.last_bid_price,
-            }
-            for s in suppliers
-        ]
-        return jsonify(results), 200
+        results = serialize_rows(db, {
+            "id": Supplier.id,
+            "name": Supplier.name,
+            "contact": Supplier.contact,
+            "rating": Supplier.rating,
+            "last_bid_price": Supplier.last_bid_price,
+        })
+        return json_response(results)
 
 
     @app.route("/api/suppliers/<int:id>", methods=["PATCH"])
@@ -367,24 +409,60 @@ def create_app():
             db.session.rollback()
             return jsonify({"error": str(e)}), 500
 
-        return jsonify({"message": "Invoice created successfully"}), 201
+        # ✅ Evaluate auto-approval rules for the new invoice right away
+        try:
+            run_auto_approval(invoice_ids=[invoice.id])
+        except Exception as e:
+            logger.warning(f"⚠️ Auto-approval failed for invoice {invoice.id}: {e}")
+
+        db.session.refresh(invoice)
+        return jsonify({
+            "message": "Invoice created successfully",
+            "id": invoice.id,
+            "status": invoice.status,
+            "approval_level": invoice.approval_level,
+        }), 201
+
+
+    @app.route("/api/finance/invoices/auto-approve", methods=["POST"])
+
+    # @role_required("manager", "admin")
+    def auto_approve_invoices():
+        # Scheduled entry point (n8n cron) - evaluates every pending invoice
+        try:
+            summary = run_auto_approval()
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+        return jsonify(summary), 200
+
+
+    @app.route("/api/finance/invoices/<int:id>/audit", methods=["GET"])
+
+    def get_invoice_audit(id):
+        entries = (
+            InvoiceApprovalAudit.query
+            .filter_by(invoice_id=id)
+            .order_by(InvoiceApprovalAudit.created_at.desc())
+            .all()
+        )
+        return jsonify([e.to_dict() for e in entries]), 200
 
 
     @app.route("/api/finance/invoices", methods=["GET"])
     
     def get_invoices():
-        invoices = Invoice.query.all()
-        results = [
+        results = serialize_rows(
+            db,
             {
-                "id": i.id,
-                "supplier_id": i.supplier_id,
-                "amount": i.amount,
-                "status": i.status,
-                "created_at": i.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            }
-            for i in invoices
-        ]
-        return jsonify(results), 200
+                "id": Invoice.id,
+                "supplier_id": Invoice.supplier_id,
+                "amount": Invoice.amount,
+                "status": Invoice.status,
+                "created_at": Invoice.created_at,
+            },
+            formatters={"created_at": format_datetime},
+        )
+        return json_response(results)
 
 
     @app.route("/api/finance/invoices/<int:id>", methods=["PATCH"])
@@ -449,6 +527,55 @@ def create_app():
 
         return jsonify({"message": "Invoice deleted successfully"}), 200
 
+    def run_auto_approval(invoice_ids=None):
+        """
+        Apply the configured approval rules and announce bulk decisions.
+        """
+        summary = apply_approval_rules(db, approval_rules, invoice_ids=invoice_ids)
+        if summary["matched"]:
+            trigger_workflow("invoices_auto_processed", summary)
+        return summary
+
+    @app.cli.command("auto-approve-invoices")
+    def auto_approve_invoices_command():
+        """Evaluate all pending invoices against the auto-approval rules."""
+        summary = run_auto_approval()
+        print(f"✅ Auto-approval: {summary['approved']} approved, "
+              f"{summary['rejected']} rejected, {summary['routed']} routed")
+
+    @app.cli.command("ensure-partitions")
+    @click.option("--months-ahead", type=int, default=None, help="defaults to PARTITION_MONTHS_AHEAD")
+    def ensure_partitions_command(months_ahead):
+        """Create upcoming monthly partitions (PostgreSQL only)."""
+        if db.engine.dialect.name != "postgresql":
+            print("ℹ️ Partitioning requires PostgreSQL, nothing to do.")
+            return
+        months_ahead = app.config["PARTITION_MONTHS_AHEAD"] if months_ahead is None else months_ahead
+        created = ensure_partitions(db, months_ahead=months_ahead)
+        print(f"✅ Created {len(created)} partitions: {', '.join(created) or '-'}")
+
+    @app.cli.command("archive-partitions")
+    @click.option("--retention-months", type=int, default=None, help="defaults to ARCHIVE_RETENTION_MONTHS")
+    @click.option("--dry-run", is_flag=True, help="list partitions that would be archived")
+    def archive_partitions_command(retention_months, dry_run):
+        """Move monthly partitions past the retention window to ARCHIVE_DIR."""
+        if db.engine.dialect.name != "postgresql":
+            print("ℹ️ Partitioning requires PostgreSQL, nothing to do.")
+            return
+        retention_months = app.config["ARCHIVE_RETENTION_MONTHS"] if retention_months is None else retention_months
+        archived = archive_partitions(
+            db, app.config["ARCHIVE_DIR"], retention_months=retention_months, dry_run=dry_run
+        )
+        for entry in archived:
+            if dry_run:
+                print(f"🧊 Would archive {entry['partition']} → {entry['path']}")
+        print(f"✅ {'Would archive' if dry_run else 'Archived'} {len(archived)} partitions")
+
+    @app.cli.command("create-tables")
+    def create_tables_command():
+        """Create tables from the models for a local dev database."""
+        create_missing_tables()
+
     # -----------------------------------------
     # PROJECT ROUTES
     # -----------------------------------------
@@ -488,18 +615,19 @@ def create_app():
     @app.route("/api/projects", methods=["GET"])
     #@jwt_required()
     def get_projects():
-        projects = Project.query.all()
-        results = [
+        # description is a large Text column: only sent with ?include=description
+        results = serialize_rows(
+            db,
             {
-                "id": p.id,
-                "name": p.name,
-                "description": p.description,
-                "status": p.status,
-                "completion_forecast": p.completion_forecast,
-            }
-            for p in projects
-        ]
-        return jsonify(results), 200
+                "id": Project.id,
+                "name": Project.name,
+                "description": Project.description,
+                "status": Project.status,
+                "completion_forecast": Project.completion_forecast,
+            },
+            deferred={"description"},
+        )
+        return json_response(results)
 
 
     @app.route("/api/projects/<int:id>", methods=["PATCH"])
@@ -545,6 +673,7 @@ def create_app():
     # AI AGENT SIMULATION ROUTES
     # -----------------------------------------
     @app.route("/api/ai/sentinel", methods=["POST"])
+    @rate_limited("ai")
     #@jwt_required()
     def simulate_sentinel():
         sensor_data = request.get_json()
@@ -553,6 +682,8 @@ def create_app():
 
 
     @app.route("/api/ai/quartermaster", methods=["GET"])
+    @rate_limited("ai")
+    @coalesced
     #@jwt_required()
     def simulate_quartermaster():
         suppliers = Supplier.query.all()
@@ -565,6 +696,8 @@ def create_app():
 
 
     @app.route("/api/ai/chancellor", methods=["GET"])
+    @rate_limited("ai")
+    @coalesced
     #@jwt_required()
     def simulate_chancellor():
         invoices = Invoice.query.all()
@@ -574,6 +707,8 @@ def create_app():
 
 
     @app.route("/api/ai/foreman", methods=["GET"])
+    @rate_limited("ai")
+    @coalesced
     #@jwt_required()
     def simulate_foreman():
         projects = Project.query.all()
@@ -585,6 +720,7 @@ def create_app():
     # TEST ROUTES
     # -----------------------------------------
     @app.route("/api/notify/test", methods=["POST"])
+    @rate_limited("notify")
     def test_notify():
         data = request.get_json()
         channel = data.get("channel", "email")
@@ -594,7 +730,21 @@ def create_app():
         result = notify_event(channel, recipient, subject, message)
         return jsonify(result), 200
 
+    @app.route("/api/notify/group", methods=["POST"])
+    @rate_limited("notify")
+    def notify_group_route():
+        data = request.get_json() or {}
+        recipients = data.get("recipients") or data.get("group")
+        if not recipients:
+            return jsonify({"error": "recipients or group is required"}), 400
+        channels = data.get("channels", ["email"])
+        subject = data.get("subject", "SiteSupervisor Notification")
+        message = data.get("message", "")
+        summary = notify_group(recipients, channels, subject, message)
+        return jsonify(summary), 200
+
     @app.route("/api/automation/test", methods=["POST"])
+    @rate_limited("automation")
     def test_automation():
         data = request.get_json()
         event_name = data.get("event", "test_event")
@@ -603,10 +753,56 @@ def create_app():
         return jsonify(result), 200
     
     
+    # -----------------------------------------
+    # EXPORT ROUTES (hot tables + archived partitions)
+    # -----------------------------------------
+    export_datasets = {
+        "maintenance": ("maintenance_records", MaintenanceRecord),
+        "invoices": ("invoices", Invoice),
+    }
+
+    @app.route("/api/export/<dataset>", methods=["GET"])
+    #@jwt_required()
+    # @role_required("manager", "admin")
+    def export_dataset(dataset):
+        """
+        Stream a dataset as NDJSON, archived months first, then live rows.
+        Optional ?from=YYYY-MM-DD&to=YYYY-MM-DD (to is exclusive) and ?fields=.
+        """
+        if dataset not in export_datasets:
+            return jsonify({"error": f"Unknown dataset, use one of: {', '.join(export_datasets)}"}), 404
+        table, model = export_datasets[dataset]
+
+        try:
+            start = datetime.strptime(request.args["from"], "%Y-%m-%d") if request.args.get("from") else None
+            end = datetime.strptime(request.args["to"], "%Y-%m-%d") if request.args.get("to") else None
+        except ValueError:
+            return jsonify({"error": "from/to must be YYYY-MM-DD"}), 400
+
+        columns = {column.name: getattr(model, column.name) for column in model.__table__.columns}
+        names = requested_fields(columns)
+        fields = {name: columns[name] for name in names}
+
+        def generate():
+            for row in iter_archived_rows(app.config["ARCHIVE_DIR"], table, start, end):
+                item = {name: row.get(name) for name in names}
+                if "created_at" in item:
+                    item["created_at"] = format_datetime(item["created_at"])
+                yield dumps(item) + b"\n"
+            for item in iter_hot_rows(db, fields, model.created_at, start, end):
+                if "created_at" in item:
+                    item["created_at"] = format_datetime(item["created_at"])
+                yield dumps(item) + b"\n"
+
+        response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+        response.headers["Content-Disposition"] = f"attachment; filename={dataset}.ndjson"
+        return response
+
     # -----------------------------------------
     # ADVANCED ANALYTICS ROUTE
     # -----------------------------------------
     @app.route("/api/analytics/overview", methods=["GET"])
+    @coalesced
     def get_analytics_overview():
         try:
             total_projects = Project.query.count()
@@ -622,7 +818,7 @@ def create_app():
             }), 200
 
         except Exception as e:
-            print("Analytics error:", e)
+            logger.error(f"Analytics error: {e}")
             return jsonify({"error": str(e)}), 500
 
             
@@ -637,15 +833,12 @@ def create_app():
     return app
 
 
+# Importing this module must stay free of I/O: gunicorn --preload imports it
+# once in the master and forks workers from it. Schema changes go through
+# `flask db upgrade` (or `flask create-tables` for a throwaway dev database).
 app = create_app()
-with app.app_context():
-    inspector = inspect(db.engine)
-    if not inspector.get_table_names():
-        print("📦 No tables found. Creating all tables...")
-        db.create_all()
-        print("✅ Tables created successfully!")
-    else:
-        print("✅ Tables already exist, skipping creation.")
 
 if __name__ == "__main__":
+    with app.app_context():
+        create_missing_tables()
     app.run(host="0.0.0.0", port=5000)
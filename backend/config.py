@@ -10,3 +10,73 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     N8N_WEBHOOK_URL = os.getenv("N8N_WEBHOOK_URL")
+
+    # Read replicas (comma-separated URIs) - see utils/db_routing.py
+    SQLALCHEMY_REPLICA_URIS = [
+        uri.strip() for uri in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if uri.strip()
+    ]
+    REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+    REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "5"))
+    REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+    # Per-request SQL profiler (X-Query-Count / Server-Timing headers, N+1 warnings)
+    SQL_PROFILER_ENABLED = os.getenv("SQL_PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+    SQL_PROFILER_SLOW_MS = float(os.getenv("SQL_PROFILER_SLOW_MS", "500"))
+    SQL_PROFILER_REPEAT_THRESHOLD = int(os.getenv("SQL_PROFILER_REPEAT_THRESHOLD", "10"))
+
+    # Invoice auto-approval rules (JSON list, first match wins - see utils/approval.py)
+    INVOICE_APPROVAL_RULES = os.getenv(
+        "INVOICE_APPROVAL_RULES",
+        '[{"name": "auto_approve_under_500", "action": "approve", "max_amount": 500}]'
+    )
+
+    # Rate limiting per route class (see utils/rate_limit.py).
+    # Limits are "requests/seconds[/burst]"; "memory" buckets are per worker,
+    # "database" buckets are shared through the rate_limit_buckets table.
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMITS = os.getenv(
+        "RATE_LIMITS",
+        '{"ai": "30/60/10", "notify": "10/60", "automation": "20/60"}'
+    )
+    # Max concurrent requests per route class in each worker (503 beyond that)
+    RATE_LIMIT_CONCURRENCY = os.getenv(
+        "RATE_LIMIT_CONCURRENCY",
+        '{"ai": 2, "notify": 2, "automation": 2}'
+    )
+
+    # Single-flight coalescing of identical concurrent GETs (see utils/singleflight.py).
+    # "local" shares work within a worker; "database" also across workers.
+    SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+    SINGLEFLIGHT_BACKEND = os.getenv("SINGLEFLIGHT_BACKEND", "local")
+    SINGLEFLIGHT_WAIT_SECONDS = float(os.getenv("SINGLEFLIGHT_WAIT_SECONDS", "30"))
+    SINGLEFLIGHT_LEASE_SECONDS = float(os.getenv("SINGLEFLIGHT_LEASE_SECONDS", "60"))
+
+    # Response compression negotiated from Accept-Encoding (see utils/compression.py).
+    # Brotli is used when the package is installed and the client accepts it.
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+    COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    # Streamed responses flush compressed output after this much input (event streams: every event)
+    COMPRESSION_STREAM_FLUSH_BYTES = int(os.getenv("COMPRESSION_STREAM_FLUSH_BYTES", "8192"))
+
+    # Monthly partitions for maintenance_records / invoices (PostgreSQL) and
+    # cold-data archival to gzip JSONL (see utils/partitions.py)
+    PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+    ARCHIVE_RETENTION_MONTHS = int(os.getenv("ARCHIVE_RETENTION_MONTHS", "12"))
+    ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive"))
+
+    # Logging (see utils/logging_setup.py). Records go through a queue to a
+    # background thread; LOG_FILE rotates at LOG_MAX_BYTES or every
+    # LOG_ROTATE_SECONDS. LOG_DEBUG_SAMPLE_RATE keeps that fraction of DEBUG
+    # lines per call site.
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FILE = os.getenv("LOG_FILE", "")
+    LOG_JSON = os.getenv("LOG_JSON", "false").lower() in ("1", "true", "yes")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_ROTATE_SECONDS = int(os.getenv("LOG_ROTATE_SECONDS", "86400"))
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
@@ -0,0 +1,65 @@
+# gunicorn.conf.py - loaded automatically when gunicorn starts from this directory
+import gc
+import os
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "2"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+# Import the app once in the master and fork workers from it, so module
+# imports are paid once and the pages are shared copy-on-write.
+# Set GUNICORN_PRELOAD=0 to go back to per-worker imports (e.g. with --reload).
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").lower() in ("1", "true", "yes")
+
+
+# ----------------------------------------------------------
+# 📈 PROMETHEUS MULTIPROCESS MODE
+# ----------------------------------------------------------
+def on_starting(server):
+    # Stale files from a previous run would be aggregated into /metrics.
+    # With preload_app the master has already imported the app and holds
+    # its own files open, so only files of other pids are removed.
+    metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        own_suffix = f"_{os.getpid()}.db"
+        for name in os.listdir(metrics_dir):
+            if not name.endswith(own_suffix):
+                try:
+                    os.remove(os.path.join(metrics_dir, name))
+                except OSError:
+                    pass
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+# ----------------------------------------------------------
+# 🚀 PRELOAD / COPY-ON-WRITE
+# ----------------------------------------------------------
+def when_ready(server):
+    if not preload_app:
+        return
+    # Pull in the provider SDKs the workers would otherwise import lazily
+    from utils.notification import preload_providers
+    preload_providers()
+    # Move everything imported so far out of the GC's reach; collections in
+    # the workers would otherwise touch (and copy) every shared page.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    # Pooled connections opened in the master must not be shared with
+    # workers; drop them without closing the parent's sockets.
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
+    router = app.extensions.get("db_router")
+    if router is not None:
+        router.dispose(close=False)
@@ -0,0 +1,100 @@
+"""Create base tables
+
+Revision ID: 0b3e1c7d4a21
+Revises: 
+Create Date: 2026-10-19 11:02:17.604113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b3e1c7d4a21'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases bootstrapped by the old import-time db.create_all() already
+    # have these tables; only create what is missing so a fresh database can
+    # be built with `flask db upgrade` alone.
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('users'):
+        # role starts as VARCHAR; 27c223273716 converts it to the userrole enum
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=120), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password', sa.String(length=200), nullable=False),
+            sa.Column('role', sa.String(length=50), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email')
+        )
+
+    if not inspector.has_table('projects'):
+        op.create_table(
+            'projects',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=120), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('status', sa.String(length=50), nullable=True),
+            sa.Column('start_date', sa.DateTime(), nullable=True),
+            sa.Column('expected_completion', sa.DateTime(), nullable=True),
+            sa.Column('completion_forecast', sa.Float(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not inspector.has_table('suppliers'):
+        op.create_table(
+            'suppliers',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=120), nullable=False),
+            sa.Column('contact', sa.String(length=120), nullable=True),
+            sa.Column('rating', sa.Float(), nullable=True),
+            sa.Column('last_bid_price', sa.Float(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not inspector.has_table('invoices'):
+        op.create_table(
+            'invoices',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('supplier_id', sa.Integer(), nullable=True),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('status', sa.String(length=50), nullable=True),
+            sa.Column('approval_level', sa.String(length=50), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['supplier_id'], ['suppliers.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not inspector.has_table('maintenance_records'):
+        op.create_table(
+            'maintenance_records',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('vehicle_id', sa.String(length=50), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('severity', sa.String(length=20), nullable=True),
+            sa.Column('image_path', sa.String(length=200), nullable=True),
+            sa.Column('status', sa.String(length=50), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('maintenance_records')
+    op.drop_table('invoices')
+    op.drop_table('suppliers')
+    op.drop_table('projects')
+    op.drop_table('users')
@@ -1,7 +1,7 @@
 """Rebuild initial migration
 
 Revision ID: 27c223273716
-Revises: 
+Revises: 0b3e1c7d4a21
 Create Date: 2025-10-30 13:35:03.477248
 
 """
@@ -11,12 +11,16 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = '27c223273716'
-down_revision = None
+down_revision = '0b3e1c7d4a21'
 branch_labels = None
 depends_on = None
 
 
 def upgrade():
+    # Native enums only exist on PostgreSQL; SQLite keeps role as VARCHAR
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
     # Recreate ENUM in lowercase to match Python model
     op.execute("""
         DO $$
@@ -34,6 +38,9 @@ def upgrade():
     """)
 
 def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
     op.execute("""
         ALTER TABLE users ALTER COLUMN role TYPE VARCHAR(50);
         DROP TYPE IF EXISTS userrole CASCADE;
@@ -0,0 +1,42 @@
+"""Add invoice approval audit trail
+
+Revision ID: 5d1f8a2c9b47
+Revises: 27c223273716
+Create Date: 2026-10-19 09:12:44.318201
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1f8a2c9b47'
+down_revision = '27c223273716'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tables may already exist when they were created by db.create_all()
+    if sa.inspect(op.get_bind()).has_table('invoice_approval_audit'):
+        return
+
+    op.create_table(
+        'invoice_approval_audit',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('invoice_id', sa.Integer(), nullable=False),
+        sa.Column('rule_name', sa.String(length=120), nullable=False),
+        sa.Column('action', sa.String(length=20), nullable=False),
+        sa.Column('approval_level', sa.String(length=50), nullable=True),
+        sa.Column('amount', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        op.f('ix_invoice_approval_audit_invoice_id'), 'invoice_approval_audit', ['invoice_id'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_invoice_approval_audit_invoice_id'), table_name='invoice_approval_audit')
+    op.drop_table('invoice_approval_audit')
@@ -0,0 +1,34 @@
+"""Add shared rate limit buckets
+
+Revision ID: 8e2d4f6a1c33
+Revises: 5d1f8a2c9b47
+Create Date: 2026-10-19 14:27:05.118930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2d4f6a1c33'
+down_revision = '5d1f8a2c9b47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('rate_limit_buckets'):
+        return
+
+    op.create_table(
+        'rate_limit_buckets',
+        sa.Column('key', sa.String(length=200), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+        sa.Column('allowed', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('rate_limit_buckets')
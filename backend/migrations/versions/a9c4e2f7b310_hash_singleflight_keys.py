@@ -0,0 +1,40 @@
+"""Hash single-flight keys and index lease expiry
+
+Revision ID: a9c4e2f7b310
+Revises: d7a3e5c1f902
+Create Date: 2026-10-21 10:12:47.306518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c4e2f7b310'
+down_revision = 'd7a3e5c1f902'
+branch_labels = None
+depends_on = None
+
+INDEX = 'ix_singleflight_results_lease_until'
+
+
+def _has_index(bind):
+    return any(index['name'] == INDEX for index in sa.inspect(bind).get_indexes('singleflight_results'))
+
+
+def upgrade():
+    if _has_index(op.get_bind()):
+        return
+
+    # Rows are short-lived leases keyed by the raw request key; drop them
+    # rather than re-key them, since no worker will look them up again
+    op.execute('DELETE FROM singleflight_results')
+    with op.batch_alter_table('singleflight_results') as batch_op:
+        batch_op.alter_column('key', existing_type=sa.String(length=255), type_=sa.String(length=64))
+        batch_op.create_index(INDEX, ['lease_until'])
+
+
+def downgrade():
+    with op.batch_alter_table('singleflight_results') as batch_op:
+        batch_op.drop_index(INDEX)
+        batch_op.alter_column('key', existing_type=sa.String(length=64), type_=sa.String(length=255))
@@ -0,0 +1,38 @@
+"""Add single-flight lease and result table
+
+Revision ID: c41f9b7e2d58
+Revises: 8e2d4f6a1c33
+Create Date: 2026-10-19 16:48:31.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f9b7e2d58'
+down_revision = '8e2d4f6a1c33'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('singleflight_results'):
+        return
+
+    op.create_table(
+        'singleflight_results',
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('owner', sa.String(length=64), nullable=False),
+        sa.Column('state', sa.String(length=10), nullable=False),
+        sa.Column('lease_until', sa.Float(), nullable=False),
+        sa.Column('done_at', sa.Float(), nullable=True),
+        sa.Column('status', sa.Integer(), nullable=True),
+        sa.Column('mimetype', sa.String(length=100), nullable=True),
+        sa.Column('body', sa.LargeBinary(), nullable=True),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('singleflight_results')
@@ -0,0 +1,119 @@
+"""Partition maintenance_records and invoices by month
+
+Revision ID: d7a3e5c1f902
+Revises: c41f9b7e2d58
+Create Date: 2026-10-20 09:41:12.550317
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3e5c1f902'
+down_revision = 'c41f9b7e2d58'
+branch_labels = None
+depends_on = None
+
+TABLES = ('maintenance_records', 'invoices')
+MONTHS_AHEAD = 3
+# LIKE does not copy foreign keys, so they are re-created on the new tables
+FOREIGN_KEYS = {
+    'maintenance_records': ('user_id', 'users'),
+    'invoices': ('supplier_id', 'suppliers'),
+}
+
+
+def _month_starts(first, last):
+    month = date(first.year, first.month, 1)
+    while month <= last:
+        yield month
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _is_partitioned(bind, table):
+    return bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table"
+    ), {"table": table}).first() is not None
+
+
+def _add_foreign_key(table):
+    column, referenced = FOREIGN_KEYS[table]
+    op.execute(
+        f'ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey '
+        f'FOREIGN KEY ({column}) REFERENCES {referenced} (id)'
+    )
+
+
+def upgrade():
+    # Declarative partitioning is PostgreSQL-only; other databases keep plain tables
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    today = date.today()
+    for table in TABLES:
+        if _is_partitioned(bind, table):
+            continue
+        legacy = f'{table}_unpartitioned'
+        sequence = f'{table}_id_seq'
+
+        op.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+        # Index names are global, so free up "<table>_pkey" for the new parent
+        op.execute(f'ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey')
+        # Keep the id sequence alive when the old table is dropped
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY NONE')
+        op.execute(f'UPDATE {legacy} SET created_at = now() WHERE created_at IS NULL')
+
+        op.execute(f"""
+            CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+            PARTITION BY RANGE (created_at)
+        """)
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL')
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN created_at SET DEFAULT now()')
+        # The partition key has to be part of the primary key
+        op.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id, created_at)')
+        op.execute(f'CREATE INDEX ix_{table}_created_at ON {table} (created_at)')
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+
+        oldest = bind.execute(sa.text(f'SELECT min(created_at) FROM {legacy}')).scalar() or today
+        last = date(today.year + (today.month + MONTHS_AHEAD - 1) // 12, (today.month + MONTHS_AHEAD - 1) % 12 + 1, 1)
+        for start in _month_starts(oldest, last):
+            end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+            op.execute(
+                f"CREATE TABLE {table}_p{start:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        # Catches rows outside the pre-created months; `flask ensure-partitions` (run on
+        # every release) moves them out when it creates their month's partition
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+        op.execute(f'INSERT INTO {table} SELECT * FROM {legacy}')
+        op.execute(f'DROP TABLE {legacy}')
+        _add_foreign_key(table)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    for table in TABLES:
+        if not _is_partitioned(bind, table):
+            continue
+        partitioned = f'{table}_partitioned'
+        sequence = f'{table}_id_seq'
+
+        op.execute(f'ALTER TABLE {table} RENAME TO {partitioned}')
+        op.execute(f'ALTER TABLE {partitioned} RENAME CONSTRAINT {table}_pkey TO {partitioned}_pkey')
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY NONE')
+        op.execute(f'CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN created_at DROP NOT NULL')
+        op.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id)')
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+        op.execute(f'INSERT INTO {table} SELECT * FROM {partitioned}')
+        op.execute(f'DROP TABLE {partitioned} CASCADE')
+        _add_foreign_key(table)
@@ -24,3 +24,30 @@ class Invoice(db.Model):
             "approval_level": self.approval_level,
             "created_at": self.created_at.isoformat()
         }
+
+
+class InvoiceApprovalAudit(db.Model):
+    __tablename__ = "invoice_approval_audit"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Plain indexed column (no FK) so the trail survives invoice deletion
+    invoice_id = db.Column(db.Integer, nullable=False, index=True)
+    rule_name = db.Column(db.String(120), nullable=False)
+    action = db.Column(db.String(20), nullable=False)  # approve, reject, route
+    approval_level = db.Column(db.String(50))
+    amount = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<InvoiceApprovalAudit invoice={self.invoice_id} rule={self.rule_name}>"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "invoice_id": self.invoice_id,
+            "rule_name": self.rule_name,
+            "action": self.action,
+            "approval_level": self.approval_level,
+            "amount": self.amount,
+            "created_at": self.created_at.isoformat()
+        }
@@ -0,0 +1,14 @@
+from app import db
+
+
+class RateLimitBucket(db.Model):
+    __tablename__ = "rate_limit_buckets"
+
+    # "<route class>:<user:id | ip:addr>"
+    key = db.Column(db.String(200), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False)  # unix time of the last refill
+    allowed = db.Column(db.Boolean, nullable=False, default=True)  # outcome of the last take
+
+    def __repr__(self):
+        return f"<RateLimitBucket {self.key} - {self.tokens:.2f}>"
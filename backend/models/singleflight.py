@@ -0,0 +1,18 @@
+from app import db
+
+
+class SingleFlightResult(db.Model):
+    __tablename__ = "singleflight_results"
+
+    # sha256 hex of "<path>?<sorted query string>"
+    key = db.Column(db.String(64), primary_key=True)
+    owner = db.Column(db.String(64), nullable=False)  # worker-generated token of the lease holder
+    state = db.Column(db.String(10), nullable=False)  # running, done
+    lease_until = db.Column(db.Float, nullable=False, index=True)  # unix time the lease expires
+    done_at = db.Column(db.Float)
+    status = db.Column(db.Integer)
+    mimetype = db.Column(db.String(100))
+    body = db.Column(db.LargeBinary)
+
+    def __repr__(self):
+        return f"<SingleFlightResult {self.key} - {self.state}>"
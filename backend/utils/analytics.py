@@ -1,11 +1,15 @@
+import logging
 from datetime import datetime, timedelta
 from sqlalchemy import func
 from utils.ai_agents import chancellor_agent
+from utils.db_routing import replica_reads
 
+logger = logging.getLogger(__name__)
 
 # --------------------------------------------------------
 # 📊 CORE AGGREGATION: Dashboard Summary
 # --------------------------------------------------------
+@replica_reads
 def get_dashboard_stats(db):
     """
     Aggregate summarized data for dashboard KPIs.
@@ -57,6 +61,7 @@ def get_dashboard_stats(db):
 # --------------------------------------------------------
 # 📈 TREND DATA: For line or bar charts
 # --------------------------------------------------------
+@replica_reads
 def get_trend_data(db, days=30):
     """
     Generate daily trends for maintenance, projects, and invoices.
@@ -124,5 +129,5 @@ def generate_analytics_insight(stats, trend):
         insight = chancellor_agent(ai_input)
         return insight
     except Exception as e:
-        print(f"AI insight error: {e}")
+        logger.error(f"AI insight error: {e}")
         return "Unable to generate AI insight at this time."
@@ -0,0 +1,166 @@
+# utils/approval.py
+import json
+from datetime import datetime
+from sqlalchemy import select, update, insert, case, and_, or_, true, func
+
+
+APPROVAL_ACTIONS = {"approve": "approved", "reject": "rejected", "route": None}
+
+# Invoice ids per UPDATE ... WHERE id IN (...) statement
+BULK_CHUNK_SIZE = 1000
+
+
+# --------------------------------------------------------
+# 📜 RULE LOADING: Declarative rules from config
+# --------------------------------------------------------
+def load_approval_rules(raw_rules):
+    """
+    Normalize the declarative auto-approval rules.
+
+    Rules are evaluated in order and the first match wins. Each rule is a dict:
+        {
+            "name": "small_invoices",        # required, recorded in the audit trail
+            "action": "approve",             # approve | reject | route
+            "min_amount": 0,                 # inclusive
+            "max_amount": 500,               # exclusive
+            "min_supplier_rating": 3.5,      # supplier.rating >= value
+            "supplier_ids": [1, 2],          # supplier allow-list
+            "approval_level": "auto"         # written to invoices.approval_level
+        }
+    `route` rules only set `approval_level` and leave the invoice pending.
+    """
+    if isinstance(raw_rules, str):
+        raw_rules = json.loads(raw_rules)
+
+    rules = []
+    for position, raw in enumerate(raw_rules or []):
+        action = raw.get("action", "approve").lower()
+        if action not in APPROVAL_ACTIONS:
+            raise ValueError(f"Approval rule #{position}: unknown action '{action}'")
+        if not raw.get("name"):
+            raise ValueError(f"Approval rule #{position}: 'name' is required")
+        if action == "route" and not raw.get("approval_level"):
+            raise ValueError(f"Approval rule '{raw['name']}': route rules need an 'approval_level'")
+
+        rules.append({
+            "name": raw["name"],
+            "action": action,
+            "min_amount": raw.get("min_amount"),
+            "max_amount": raw.get("max_amount"),
+            "min_supplier_rating": raw.get("min_supplier_rating"),
+            "supplier_ids": list(raw.get("supplier_ids") or []),
+            "approval_level": raw.get("approval_level") or "auto",
+        })
+    return rules
+
+
+def _rule_condition(rule, Invoice, Supplier):
+    """
+    Compile one rule into a SQL boolean expression.
+    """
+    clauses = []
+    if rule["min_amount"] is not None:
+        clauses.append(Invoice.amount >= rule["min_amount"])
+    if rule["max_amount"] is not None:
+        clauses.append(Invoice.amount < rule["max_amount"])
+    if rule["min_supplier_rating"] is not None:
+        clauses.append(func.coalesce(Supplier.rating, 0) >= rule["min_supplier_rating"])
+    if rule["supplier_ids"]:
+        clauses.append(Invoice.supplier_id.in_(rule["supplier_ids"]))
+    return and_(true(), *clauses)
+
+
+# --------------------------------------------------------
+# ⚖️ RULES ENGINE: Evaluate all pending invoices at once
+# --------------------------------------------------------
+def apply_approval_rules(db, rules, invoice_ids=None):
+    """
+    Evaluate pending, unrouted invoices against the rules in a single SELECT,
+    then write decisions and the audit trail in bulk.
+
+    The first matching rule is chosen inside the database with a CASE
+    expression, so only matched invoices are returned to Python.
+    Pass `invoice_ids` to restrict evaluation (e.g. right after creation).
+    """
+    from models.finance import Invoice, InvoiceApprovalAudit
+    from models.supplier import Supplier
+
+    summary = {"matched": 0, "approved": 0, "rejected": 0, "routed": 0, "rules": {}, "invoice_ids": []}
+    if not rules:
+        return summary
+
+    conditions = [_rule_condition(rule, Invoice, Supplier) for rule in rules]
+    matched_rule = case(
+        *[(condition, index) for index, condition in enumerate(conditions)],
+        else_=None,
+    )
+
+    query = (
+        select(Invoice.id, Invoice.amount, matched_rule.label("rule_index"))
+        .outerjoin(Supplier, Supplier.id == Invoice.supplier_id)
+        .where(
+            Invoice.status == "pending",
+            Invoice.approval_level.is_(None),
+            or_(*conditions),
+        )
+        # Concurrent runs (schedule + create hook) skip rows another run holds
+        .with_for_update(skip_locked=True, of=Invoice)
+    )
+    if invoice_ids is not None:
+        query = query.where(Invoice.id.in_(invoice_ids))
+
+    rows = db.session.execute(query).all()
+    if not rows:
+        return summary
+
+    groups = {}
+    for invoice_id, amount, rule_index in rows:
+        groups.setdefault(rule_index, []).append((invoice_id, amount))
+
+    now = datetime.utcnow()
+    audit_rows = []
+    try:
+        for rule_index, matches in groups.items():
+            rule = rules[rule_index]
+            values = {"approval_level": rule["approval_level"]}
+            if APPROVAL_ACTIONS[rule["action"]]:
+                values["status"] = APPROVAL_ACTIONS[rule["action"]]
+
+            ids = [invoice_id for invoice_id, _ in matches]
+            for start in range(0, len(ids), BULK_CHUNK_SIZE):
+                db.session.execute(
+                    update(Invoice)
+                    .where(Invoice.id.in_(ids[start:start + BULK_CHUNK_SIZE]), Invoice.status == "pending")
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+
+            audit_rows.extend(
+                {
+                    "invoice_id": invoice_id,
+                    "rule_name": rule["name"],
+                    "action": rule["action"],
+                    "approval_level": rule["approval_level"],
+                    "amount": amount,
+                    "created_at": now,
+                }
+                for invoice_id, amount in matches
+            )
+
+            summary["rules"][rule["name"]] = summary["rules"].get(rule["name"], 0) + len(ids)
+            summary["invoice_ids"].extend(ids)
+            if rule["action"] == "approve":
+                summary["approved"] += len(ids)
+            elif rule["action"] == "reject":
+                summary["rejected"] += len(ids)
+            else:
+                summary["routed"] += len(ids)
+
+        db.session.execute(insert(InvoiceApprovalAudit), audit_rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    summary["matched"] = len(audit_rows)
+    return summary
@@ -1,8 +1,11 @@
+import logging
 import os
 import requests
 from dotenv import load_dotenv
+from utils.metrics import track_outbound
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 N8N_WEBHOOK_URL = os.getenv("N8N_WEBHOOK_URL")
 
 def trigger_workflow(event_name, payload):
@@ -10,12 +13,14 @@ def trigger_workflow(event_name, payload):
     Trigger an external automation (n8n, Zapier, etc.)
     """
     if not N8N_WEBHOOK_URL:
-        print(f"⚙️ [Automation Simulation] {event_name} => {payload}")
+        logger.info(f"⚙️ [Automation Simulation] {event_name} => {payload}")
         return {"status": "simulated", "event": event_name}
 
     try:
-        response = requests.post(N8N_WEBHOOK_URL, json={"event": event_name, "data": payload})
-        print(f"✅ Automation triggered: {event_name}")
+        with track_outbound("n8n") as call:
+            response = requests.post(N8N_WEBHOOK_URL, json={"event": event_name, "data": payload})
+            call["ok"] = response.ok
+        logger.info(f"✅ Automation triggered: {event_name}")
 
         # Safely parse JSON if available
         try:
@@ -26,5 +31,5 @@ def trigger_workflow(event_name, payload):
         return {"status": "triggered", "response": resp_data, "code": response.status_code}
 
     except Exception as e:
-        print(f"⚠️ Automation failed: {e}")
+        logger.warning(f"⚠️ Automation failed: {e}")
         return {"status": "failed", "error": str(e)}
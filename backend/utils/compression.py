@@ -0,0 +1,145 @@
+# utils/compression.py
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/csv",
+    "text/event-stream",
+    "text/html",
+    "text/plain",
+}
+
+
+# --------------------------------------------------------
+# 🤝 NEGOTIATION: Pick an encoding from Accept-Encoding
+# --------------------------------------------------------
+def choose_encoding(accept_encoding):
+    """
+    Return "br", "gzip" or None for an Accept-Encoding header value.
+    Brotli wins ties when it is installed; q=0 disables an encoding.
+    """
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+
+    candidates = []
+    if brotli is not None:
+        candidates.append("br")
+    candidates.append("gzip")
+
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = offered.get(encoding, offered.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+# --------------------------------------------------------
+# 🗜️ COMPRESSORS: Whole bodies and incremental streams
+# --------------------------------------------------------
+def compress(data, encoding, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    # wbits=31 -> gzip container
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding, level, flush_bytes=0):
+    """
+    Compress a generator chunk by chunk. Output is flushed once at least
+    `flush_bytes` of input has accumulated (0 = after every chunk), so
+    clients still receive NDJSON exports and event streams as they are
+    produced without paying a flush per tiny chunk.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        compress_chunk, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        compress_chunk = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)  # noqa: E731
+        finish = compressor.flush
+
+    pending = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compress_chunk(chunk)
+        pending += len(chunk)
+        if pending >= flush_bytes:
+            data += flush()
+            pending = 0
+        if data:
+            yield data
+    yield finish()
+
+
+def init_compression(app):
+    """
+    Compress responses negotiated from Accept-Encoding.
+
+    Buffered responses smaller than COMPRESSION_MIN_BYTES are sent as-is;
+    streamed responses are always compressed incrementally since their size
+    is unknown up front.
+    """
+    if not app.config.get("COMPRESSION_ENABLED", True):
+        return
+    min_bytes = app.config.get("COMPRESSION_MIN_BYTES", 1024)
+    levels = {
+        "gzip": app.config.get("COMPRESSION_GZIP_LEVEL", 6),
+        "br": app.config.get("COMPRESSION_BROTLI_QUALITY", 4),
+    }
+    stream_flush_bytes = app.config.get("COMPRESSION_STREAM_FLUSH_BYTES", 8192)
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or "Content-Encoding" in response.headers
+            or request.method == "HEAD"
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            # Server-sent events must reach the client one event at a time
+            flush_bytes = 0 if response.mimetype == "text/event-stream" else stream_flush_bytes
+            response.response = compress_stream(
+                response.response, encoding, levels[encoding], flush_bytes=flush_bytes
+            )
+            response.direct_passthrough = False
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            if len(body) < min_bytes:
+                return response
+            response.set_data(compress(body, encoding, levels[encoding]))
+
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,274 @@
+# utils/db_routing.py
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+STICKY_COOKIE = "ss_primary_until"
+
+# Postgres reports zero lag when everything received has been replayed,
+# so an idle primary does not make a healthy replica look stale.
+PG_REPLICATION_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+# --------------------------------------------------------
+# 🔀 SESSION: Send plain SELECTs to a replica when allowed
+# --------------------------------------------------------
+class RoutingSession(Session):
+    """
+    db.session that reads from a replica when the current request (or a
+    `use_replica()` block) allows it. Writes, flushes and explicit binds
+    always use the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+            and _replica_allowed()
+        ):
+            engine = current_app.extensions["db_router"].pick_replica()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _replica_allowed():
+    if not has_app_context() or "db_router" not in current_app.extensions:
+        return False
+    return g.get("db_route") == "replica"
+
+
+@contextmanager
+def use_replica():
+    """
+    Route reads inside the block to a replica (e.g. analytics run from the CLI).
+    """
+    previous = g.get("db_route")
+    g.db_route = "replica"
+    try:
+        yield
+    finally:
+        g.db_route = previous
+
+
+@contextmanager
+def use_primary():
+    """
+    Force reads inside the block to the primary, even during a GET request.
+    """
+    previous = g.get("db_route")
+    g.db_route = "primary"
+    try:
+        yield
+    finally:
+        g.db_route = previous
+
+
+def replica_reads(fn):
+    """
+    Decorator form of `use_replica()` for read-only helpers taking `db`.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not has_app_context():
+            return fn(*args, **kwargs)
+        # Respect an explicit primary pin (read-your-writes)
+        if g.get("db_route") == "primary":
+            return fn(*args, **kwargs)
+        with use_replica():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# --------------------------------------------------------
+# 🩺 ROUTER: Replica selection, health and lag checks
+# --------------------------------------------------------
+class ReplicaRouter:
+    """
+    Round-robins across replica engines, skipping ones that are down or
+    lagging. Health is re-checked at most every `check_interval` seconds.
+    """
+
+    def __init__(self, uris, engine_options=None, max_lag_seconds=10.0,
+                 check_interval=5.0, retry_after=30.0):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+        self._counter = itertools.count()
+        self.replicas = []
+        for uri in uris:
+            engine = create_engine(uri, **(engine_options or {}))
+            replica = {
+                "engine": engine,
+                "down_until": 0.0,
+                "checked_until": 0.0,
+                "lock": threading.Lock(),
+            }
+            event.listen(engine, "handle_error", self._make_error_handler(replica))
+            self.replicas.append(replica)
+
+    def _make_error_handler(self, replica):
+        def on_error(context):
+            # Stop routing to a replica whose connections are failing
+            if context.is_disconnect or context.connection is None:
+                self._mark_down(replica)
+        return on_error
+
+    def _mark_down(self, replica):
+        replica["down_until"] = time.monotonic() + self.retry_after
+        url = replica["engine"].url.render_as_string(hide_password=True)
+        logger.warning(f"⚠️ Replica unavailable, falling back to primary: {url}")
+
+    def dispose(self, close=True):
+        """
+        Drop pooled replica connections (close=False after a fork).
+        """
+        for replica in self.replicas:
+            replica["engine"].dispose(close=close)
+
+    def pick_replica(self):
+        if not self.replicas:
+            return None
+        now = time.monotonic()
+        start = next(self._counter)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if self._is_available(replica, now):
+                return replica["engine"]
+        return None
+
+    def _is_available(self, replica, now):
+        if now < replica["down_until"]:
+            return False
+        if now < replica["checked_until"]:
+            return True
+        # One thread re-checks; the others keep using the last known state
+        if not replica["lock"].acquire(blocking=False):
+            return True
+        try:
+            return self._check(replica, now)
+        finally:
+            replica["lock"].release()
+
+    def _check(self, replica, now):
+        engine = replica["engine"]
+        try:
+            with engine.connect() as conn:
+                if engine.dialect.name == "postgresql":
+                    lag = float(conn.execute(PG_REPLICATION_LAG_SQL).scalar() or 0)
+                else:
+                    conn.execute(text("SELECT 1"))
+                    lag = 0.0
+        except Exception as e:
+            logger.warning(f"⚠️ Replica health check failed: {e}")
+            self._mark_down(replica)
+            return False
+
+        if lag > self.max_lag_seconds:
+            logger.warning(f"⚠️ Replica lagging {lag:.1f}s (max {self.max_lag_seconds}s), using primary")
+            replica["down_until"] = now + self.check_interval
+            return False
+
+        replica["checked_until"] = now + self.check_interval
+        return True
+
+
+# --------------------------------------------------------
+# 📌 READ-YOUR-WRITES: Pin recent writers to the primary
+# --------------------------------------------------------
+class StickyWriters:
+    """
+    Bounded map of identity -> monotonic deadline until which that user's
+    reads go to the primary. Complements the cookie for clients without one.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pin(self, key, seconds):
+        with self._lock:
+            self._entries[key] = time.monotonic() + seconds
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def is_pinned(self, key):
+        deadline = self._entries.get(key)
+        return deadline is not None and deadline > time.monotonic()
+
+
+def _request_identity():
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    return f"user:{identity}" if identity else f"addr:{request.remote_addr}"
+
+
+def init_db_routing(app):
+    """
+    Route read-only requests to the replicas in SQLALCHEMY_REPLICA_URIS.
+    Does nothing when no replica is configured.
+    """
+    uris = app.config.get("SQLALCHEMY_REPLICA_URIS") or []
+    if not uris:
+        return None
+
+    router = ReplicaRouter(
+        uris,
+        engine_options=app.config.get("SQLALCHEMY_ENGINE_OPTIONS"),
+        max_lag_seconds=app.config.get("REPLICA_MAX_LAG_SECONDS", 10.0),
+        check_interval=app.config.get("REPLICA_CHECK_INTERVAL", 5.0),
+        retry_after=app.config.get("REPLICA_RETRY_SECONDS", 30.0),
+    )
+    sticky = StickyWriters()
+    sticky_seconds = app.config.get("REPLICA_STICKY_SECONDS", 5.0)
+    app.extensions["db_router"] = router
+
+    @app.before_request
+    def choose_database_route():
+        if request.method not in READ_METHODS:
+            g.db_route = "primary"
+            return
+        cookie_until = request.cookies.get(STICKY_COOKIE, type=float) or 0
+        if cookie_until > time.time() or sticky.is_pinned(_request_identity()):
+            g.db_route = "primary"
+        else:
+            g.db_route = "replica"
+
+    @app.after_request
+    def remember_writer(response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            sticky.pin(_request_identity(), sticky_seconds)
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(time.time() + sticky_seconds),
+                max_age=int(sticky_seconds) + 1,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    return router
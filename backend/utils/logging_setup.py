@@ -0,0 +1,206 @@
+# utils/logging_setup.py
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_state = {"handler": None, "listener": None, "handlers": (), "queue_size": 0}
+_lock = threading.Lock()
+
+
+# --------------------------------------------------------
+# 🧾 FORMATTING: One JSON object per line
+# --------------------------------------------------------
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# --------------------------------------------------------
+# 🔁 ROTATION: By size or age, whichever comes first
+# --------------------------------------------------------
+class RotatingLogFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that also rolls over every interval_seconds,
+    keeping the app.log.1 ... app.log.N naming for both triggers.
+    """
+
+    def __init__(self, filename, max_bytes=0, backup_count=5, interval_seconds=0):
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.interval_seconds = interval_seconds
+        started = os.stat(filename).st_mtime if os.path.exists(filename) else time.time()
+        self.rollover_at = started + interval_seconds if interval_seconds else None
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return 1
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        if self.interval_seconds:
+            self.rollover_at = time.time() + self.interval_seconds
+
+
+# --------------------------------------------------------
+# 🎲 SAMPLING: Keep 1 in N debug lines per call site
+# --------------------------------------------------------
+class DebugSampler(logging.Filter):
+    """
+    Passes every record above DEBUG, and every Nth DEBUG record from each
+    call site, so a hot loop is thinned without silencing rare lines.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counts = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        if not self.every:
+            return False
+        site = (record.pathname, record.lineno)
+        count = self._counts.get(site, 0)
+        self._counts[site] = count + 1
+        return count % self.every == 0
+
+
+# --------------------------------------------------------
+# 📬 QUEUE: Request threads only enqueue
+# --------------------------------------------------------
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops records instead of blocking when the queue is
+    full; the count is logged as a warning once the queue has drained.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record):
+        # Render the message and traceback here, where args and exc_info are
+        # still valid, but leave formatting to the listener's handlers.
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            # Report drops once the listener has caught up, not on every free slot
+            if self._unreported and self.queue.qsize() <= self.queue.maxsize // 2:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": __name__,
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"Dropped {self._unreported} log records (queue full)",
+                }))
+                self._unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+
+def _start_listener():
+    log_queue = queue.Queue(maxsize=_state["queue_size"])
+    listener = QueueListener(log_queue, *_state["handlers"], respect_handler_level=True)
+    listener.start()
+    _state["handler"].queue = log_queue
+    _state["listener"] = listener
+
+
+def _restart_after_fork():
+    # The listener thread does not survive fork, and the queue's lock may
+    # have been held when it happened: give the child fresh ones.
+    if _state["handler"] is not None:
+        _state["listener"] = None
+        _start_listener()
+
+
+def _stop_listener():
+    if _state["listener"] is not None:
+        _state["listener"].stop()
+        _state["listener"] = None
+
+
+def setup_logging(level="INFO", log_file=None, json_format=False, max_bytes=10 * 1024 * 1024,
+                  backup_count=5, rotate_seconds=86400, debug_sample_rate=1.0, queue_size=10000):
+    """
+    Route the root logger through a queue to a console handler and, when
+    log_file is set, a rotating file handler. Safe to call more than once;
+    later calls replace the earlier setup.
+    """
+    with _lock:
+        root = logging.getLogger()
+        if _state["handler"] is not None:
+            _stop_listener()
+            root.removeHandler(_state["handler"])
+
+        formatter = JsonFormatter() if json_format else logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        )
+        handlers = [logging.StreamHandler(sys.stdout)]
+        if log_file:
+            handlers.append(RotatingLogFileHandler(log_file, max_bytes, backup_count, rotate_seconds))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        queue_handler = NonBlockingQueueHandler(None)  # queue set by _start_listener
+        queue_handler.addFilter(DebugSampler(debug_sample_rate))
+        _state.update(handler=queue_handler, handlers=tuple(handlers), queue_size=queue_size)
+        _start_listener()
+
+        root.addHandler(queue_handler)
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+def init_logging(app):
+    """Set up logging from the LOG_* settings (see config.py)."""
+    setup_logging(
+        level=app.config.get("LOG_LEVEL", "INFO"),
+        log_file=app.config.get("LOG_FILE"),
+        json_format=app.config.get("LOG_JSON", False),
+        max_bytes=app.config.get("LOG_MAX_BYTES", 10 * 1024 * 1024),
+        backup_count=app.config.get("LOG_BACKUP_COUNT", 5),
+        rotate_seconds=app.config.get("LOG_ROTATE_SECONDS", 86400),
+        debug_sample_rate=app.config.get("LOG_DEBUG_SAMPLE_RATE", 1.0),
+        queue_size=app.config.get("LOG_QUEUE_SIZE", 10000),
+    )
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(_stop_listener)
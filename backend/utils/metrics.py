@@ -0,0 +1,159 @@
+# utils/metrics.py
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy.pool import QueuePool
+
+
+# With PROMETHEUS_MULTIPROC_DIR set, every gunicorn worker writes its samples
+# to shared mmap files and /metrics aggregates them (see gunicorn.conf.py).
+# Unlabelled metrics open their file as soon as they are created, which with
+# preload_app (and for `flask db upgrade`) is before any gunicorn hook runs.
+if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_query_duration_seconds_per_request",
+    "Total SQL execution time per HTTP request",
+    ["route"],
+)
+OUTBOUND_LATENCY = Histogram(
+    "outbound_request_duration_seconds",
+    "Latency of calls to external services",
+    ["service"],
+)
+OUTBOUND_REQUESTS = Counter(
+    "outbound_requests_total",
+    "Calls to external services by outcome",
+    ["service", "outcome"],
+)
+RATE_LIMIT_DECISIONS = Counter(
+    "rate_limit_decisions_total",
+    "Rate limiter decisions by route class (allowed, limited, shed, error)",
+    ["route_class", "decision"],
+)
+SINGLEFLIGHT_REQUESTS = Counter(
+    "singleflight_requests_total",
+    "Coalesced GET requests by role (leader ran the view, followers shared its result)",
+    ["route", "role"],
+)
+
+
+# --------------------------------------------------------
+# 🌐 OUTBOUND CALLS: n8n, Resend, Twilio
+# --------------------------------------------------------
+@contextmanager
+def track_outbound(service):
+    """
+    Time a call to an external service. Set call["ok"] = False inside the
+    block to count a completed-but-failed call (e.g. HTTP 5xx) as an error.
+    """
+    call = {"ok": True}
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call["ok"] = False
+        raise
+    finally:
+        OUTBOUND_LATENCY.labels(service).observe(time.perf_counter() - start)
+        OUTBOUND_REQUESTS.labels(service, "success" if call["ok"] else "error").inc()
+
+
+# --------------------------------------------------------
+# 🗄️ DATABASE: Pool wait and per-request query stats
+# --------------------------------------------------------
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waits for a connection.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+def init_metrics(app):
+    """
+    Register request instrumentation and the /metrics endpoint.
+    Call before db.init_app() so the engine picks up the instrumented pool.
+    Per-request query counts come from the engine events in utils/sql_profiler.py.
+    """
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+    if not uri.startswith("sqlite"):
+        engine_options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+        engine_options.setdefault("poolclass", InstrumentedQueuePool)
+
+    @app.before_request
+    def start_request_metrics():
+        if request.path == "/metrics":
+            return
+        g.metrics_route = _route_label()
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_PROGRESS.labels(request.method, g.metrics_route).inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        if "metrics_start" not in g:
+            return response
+        route = g.metrics_route
+        REQUEST_LATENCY.labels(request.method, route, str(response.status_code)).observe(
+            time.perf_counter() - g.metrics_start
+        )
+        DB_QUERIES_PER_REQUEST.labels(route).observe(g.get("sql_query_count", 0))
+        DB_TIME_PER_REQUEST.labels(route).observe(g.get("sql_query_time", 0.0))
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        # Runs even when a view raised, so the gauge never drifts upwards
+        if "metrics_route" in g:
+            REQUESTS_IN_PROGRESS.labels(request.method, g.pop("metrics_route")).dec()
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+        return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
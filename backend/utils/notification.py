@@ -1,21 +1,77 @@
 import datetime
+import json
+import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
-from twilio.rest import Client
-import resend
+from utils.metrics import track_outbound
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 # --- Load credentials ---
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
+# Optional override to point Twilio at a local stub (scripts/stub_servers.py);
+# Resend reads RESEND_API_URL itself.
+TWILIO_API_BASE_URL = os.getenv("TWILIO_API_BASE_URL")
 
-# Initialize clients (if credentials exist)
-twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN) if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN else None
-if RESEND_API_KEY:
-    resend.api_key = RESEND_API_KEY
+# --- Fan-out settings ---
+# Max in-flight calls per provider across all notify_group() calls in this process
+NOTIFY_MAX_CONCURRENCY = {
+    "email": int(os.getenv("NOTIFY_EMAIL_CONCURRENCY", "8")),
+    "sms": int(os.getenv("NOTIFY_SMS_CONCURRENCY", "4")),
+}
+NOTIFY_FANOUT_TIMEOUT = float(os.getenv("NOTIFY_FANOUT_TIMEOUT", "30"))
+# Named recipient groups, e.g.
+# {"maintenance-oncall": [{"name": "Ops", "email": "ops@example.com", "phone": "+1555..."}]}
+NOTIFY_GROUPS = json.loads(os.getenv("NOTIFY_GROUPS") or json.dumps({
+    "maintenance-oncall": [{"name": "Maintenance Team", "email": "maintenance-team@example.com"}],
+    "finance": [{"name": "Finance", "email": "finance@example.com"}],
+}))
+
+# Provider SDKs are slow to import, so clients are built on first use
+# (or in the gunicorn master via preload_providers()).
+_twilio_client = None
+
+
+def get_twilio_client():
+    """
+    Return the Twilio client, creating it on first call (None without credentials).
+    """
+    global _twilio_client
+    if _twilio_client is None and TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
+        from twilio.rest import Client
+        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        if TWILIO_API_BASE_URL:
+            client.api.base_url = TWILIO_API_BASE_URL
+        _twilio_client = client
+    return _twilio_client
+
+
+def get_resend():
+    """
+    Import and configure the Resend SDK on first call.
+    """
+    import resend
+    if resend.api_key != RESEND_API_KEY:
+        resend.api_key = RESEND_API_KEY
+    return resend
+
+
+def preload_providers():
+    """
+    Import the configured provider SDKs up front, e.g. in a preloading
+    gunicorn master so workers share the pages copy-on-write.
+    """
+    if RESEND_API_KEY:
+        get_resend()
+    if TWILIO_PHONE_NUMBER:
+        get_twilio_client()
 
 
 # -------------------------------------------------------
@@ -44,22 +100,23 @@ def send_email(to, subject, message):
     # If Resend API key not available, fallback to print
     if not RESEND_API_KEY:
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"\n📧 [EMAIL - SIMULATION] {timestamp}\nTo: {to}\nSubject: {subject}\nMessage: {message}\n")
+        logger.info(f"📧 [EMAIL - SIMULATION] {timestamp} To: {to}, Subject: {subject}, Message: {message}")
         return {"status": "simulated", "provider": "console", "to": to}
 
     try:
-        email = resend.Emails.send({
-            "from": "SiteSupervisor <noreply@sitesupervisor.ai>",
-            "to": [to],
-            "subject": subject,
-            "html": html_content,
-        })
-        print(f"✅ Email sent to {to} via Resend")
+        with track_outbound("resend"):
+            email = get_resend().Emails.send({
+                "from": "SiteSupervisor <noreply@sitesupervisor.ai>",
+                "to": [to],
+                "subject": subject,
+                "html": html_content,
+            })
+        logger.info(f"✅ Email sent to {to} via Resend")
         return {"status": "sent", "provider": "Resend", "to": to}
     except Exception as e:
         # Fallback if domain not verified or error occurred
-        print(f"⚠️ Resend failed: {e}")
-        print(f"📧 [EMAIL - SIMULATION] To: {to}, Subject: {subject}, Message: {message}")
+        logger.warning(f"⚠️ Resend failed: {e}")
+        logger.info(f"📧 [EMAIL - SIMULATION] To: {to}, Subject: {subject}, Message: {message}")
         return {"status": "simulated", "error": str(e), "to": to}
 
 
@@ -72,23 +129,25 @@ def send_sms(to, message):
     Fallback: print simulated message if Twilio credentials missing.
     """
     # If Twilio credentials not set
-    if not twilio_client or not TWILIO_PHONE_NUMBER:
+    twilio_client = get_twilio_client() if TWILIO_PHONE_NUMBER else None
+    if not twilio_client:
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"\n📱 [SMS - SIMULATION] {timestamp}\nTo: {to}\nMessage: {message}\n")
+        logger.info(f"📱 [SMS - SIMULATION] {timestamp} To: {to}, Message: {message}")
         return {"status": "simulated", "provider": "console", "to": to}
 
     try:
-        sms = twilio_client.messages.create(
-            body=f"🚨 SiteSupervisor Alert:\n{message}",
-            from_=TWILIO_PHONE_NUMBER,
-            to=to,
-        )
-        print(f"✅ SMS sent to {to}, SID: {sms.sid}")
+        with track_outbound("twilio"):
+            sms = twilio_client.messages.create(
+                body=f"🚨 SiteSupervisor Alert:\n{message}",
+                from_=TWILIO_PHONE_NUMBER,
+                to=to,
+            )
+        logger.info(f"✅ SMS sent to {to}, SID: {sms.sid}")
         return {"status": "sent", "provider": "Twilio", "to": to}
     except Exception as e:
         # Fallback on failure
-        print(f"⚠️ Twilio failed: {e}")
-        print(f"📱 [SMS - SIMULATION] To: {to}, Message: {message}")
+        logger.warning(f"⚠️ Twilio failed: {e}")
+        logger.info(f"📱 [SMS - SIMULATION] To: {to}, Message: {message}")
         return {"status": "simulated", "error": str(e), "to": to}
 
 
@@ -105,5 +164,106 @@ def notify_event(channel, recipient, subject, message):
     elif channel == "sms":
         return send_sms(recipient, message)
     else:
-        print(f"ℹ️ [SYSTEM LOG] {message}")
+        logger.info(f"ℹ️ [SYSTEM LOG] {message}")
         return {"status": "logged", "type": "system", "to": recipient}
+
+
+# -------------------------------------------------------
+# 📣 GROUP FAN-OUT (many recipients x many channels)
+# -------------------------------------------------------
+# One pool per provider, sized to its concurrency limit, so a slow provider
+# never holds up the other channel
+_fanout_pools = {}
+_fanout_pools_lock = threading.Lock()
+
+# Which recipient field each channel delivers to
+CHANNEL_ADDRESS_FIELDS = {"email": "email", "sms": "phone"}
+
+
+def _get_fanout_pool(channel):
+    with _fanout_pools_lock:
+        if channel not in _fanout_pools:
+            _fanout_pools[channel] = ThreadPoolExecutor(
+                max_workers=NOTIFY_MAX_CONCURRENCY[channel],
+                thread_name_prefix=f"notify-{channel}",
+            )
+        return _fanout_pools[channel]
+
+
+def resolve_recipients(recipients):
+    """
+    Turn a group name, or a list mixing group names, addresses and
+    recipient dicts, into a list of recipient dicts.
+    """
+    if isinstance(recipients, str):
+        recipients = [recipients]
+
+    resolved = []
+    for entry in recipients or []:
+        if isinstance(entry, dict):
+            resolved.append(entry)
+        elif entry in NOTIFY_GROUPS:
+            resolved.extend(NOTIFY_GROUPS[entry])
+        elif "@" in entry:
+            resolved.append({"email": entry})
+        else:
+            resolved.append({"phone": entry})
+    return resolved
+
+
+def notify_group(recipients, channels, subject, message, timeout=None):
+    """
+    Send one notification to every recipient on every channel concurrently.
+
+    `recipients` is a group name from NOTIFY_GROUPS or a list of group names,
+    addresses and {"email": ..., "phone": ...} dicts. Each provider is capped
+    at NOTIFY_MAX_CONCURRENCY in-flight calls. Returns an aggregate with one
+    result per (channel, address); duplicates are sent once.
+    """
+    timeout = NOTIFY_FANOUT_TIMEOUT if timeout is None else timeout
+    channels = [channels] if isinstance(channels, str) else list(channels)
+    start = time.perf_counter()
+
+    results, jobs, seen = [], {}, set()
+    for recipient in resolve_recipients(recipients):
+        for channel in channels:
+            field = CHANNEL_ADDRESS_FIELDS.get(channel)
+            if field is None:
+                results.append({"status": "failed", "channel": channel, "error": "unknown channel"})
+                continue
+            address = recipient.get(field)
+            if not address:
+                results.append({"status": "skipped", "channel": channel,
+                                "to": recipient.get("name"), "error": f"no {field}"})
+                continue
+            if (channel, address) in seen:
+                continue
+            seen.add((channel, address))
+            future = _get_fanout_pool(channel).submit(notify_event, channel, address, subject, message)
+            jobs[future] = (channel, address)
+
+    done, not_done = wait(jobs, timeout=timeout)
+    for future, (channel, address) in jobs.items():
+        if future in not_done:
+            future.cancel()
+            result = {"status": "failed", "to": address, "error": "timed out"}
+        else:
+            try:
+                result = dict(future.result())
+            except Exception as e:
+                result = {"status": "failed", "to": address, "error": str(e)}
+            # send_email/send_sms fall back to simulation on provider errors
+            if result.get("error"):
+                result["status"] = "failed"
+        result["channel"] = channel
+        results.append(result)
+
+    summary = {"total": len(results), "sent": 0, "simulated": 0, "failed": 0, "skipped": 0}
+    for result in results:
+        status = result["status"] if result["status"] in summary else "sent"
+        summary[status] += 1
+    summary["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    summary["results"] = results
+    logger.info(f"📣 Fan-out: {summary['sent']} sent, {summary['simulated']} simulated, "
+                f"{summary['failed']} failed, {summary['skipped']} skipped in {summary['duration_ms']} ms")
+    return summary
@@ -0,0 +1,237 @@
+# utils/partitions.py
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import date, datetime
+
+from sqlalchemy import select, text
+
+logger = logging.getLogger(__name__)
+
+# Tables partitioned by month on created_at (see migration d7a3e5c1f902)
+PARTITIONED_TABLES = ("maintenance_records", "invoices")
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})_(\d{2})$")
+_ARCHIVE_FILE = re.compile(r"_(\d{4})_(\d{2})\.jsonl\.gz$")
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y_%m}"
+
+
+def archive_path(archive_dir, table, month):
+    return os.path.join(archive_dir, table, f"{table}_{month:%Y_%m}.jsonl.gz")
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(" ")
+    raise TypeError(f"Cannot archive value of type {type(value).__name__}")
+
+
+# --------------------------------------------------------
+# 🗂️ PARTITIONS: Inspect and pre-create monthly partitions
+# --------------------------------------------------------
+def list_partitions(db, table):
+    """
+    Return [(partition_name, month)] for a partitioned table; the DEFAULT
+    partition has month None.
+    """
+    rows = db.session.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+        ORDER BY child.relname
+    """), {"table": table}).scalars().all()
+
+    partitions = []
+    for name in rows:
+        match = _PARTITION_SUFFIX.search(name)
+        month = date(int(match.group(1)), int(match.group(2)), 1) if match else None
+        partitions.append((name, month))
+    return partitions
+
+
+def _create_partition(db, table, month, has_default=True):
+    """
+    Create the partition for `month`. PostgreSQL refuses to while the
+    DEFAULT partition holds rows in that range, so those rows are moved
+    into the new partition in the same transaction. Returns the number of
+    rows moved.
+    """
+    name = partition_name(table, month)
+    default = f"{table}_default"
+    bounds = {"start": month, "end": add_months(month, 1)}
+    in_range = "created_at >= :start AND created_at < :end"
+    create = text(
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+    )
+
+    stranded = has_default and db.session.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})"), bounds
+    ).scalar()
+    if not stranded:
+        db.session.execute(create)
+        return 0
+
+    # DETACH locks the parent until commit, so no row can land in the gap
+    db.session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    db.session.execute(create)
+    moved = db.session.execute(
+        text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_range}"), bounds
+    ).rowcount
+    db.session.execute(text(f"DELETE FROM {default} WHERE {in_range}"), bounds)
+    db.session.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+    return moved
+
+
+def ensure_partitions(db, months_ahead=3):
+    """
+    Create any missing partitions from the current month through
+    `months_ahead` months ahead, moving matching rows out of the DEFAULT
+    partition. Returns the names that were created.
+    """
+    created = []
+    this_month = month_start(date.today())
+    for table in PARTITIONED_TABLES:
+        partitions = list_partitions(db, table)
+        existing = {month for _, month in partitions}
+        for offset in range(months_ahead + 1):
+            month = add_months(this_month, offset)
+            if month in existing:
+                continue
+            name = partition_name(table, month)
+            try:
+                moved = _create_partition(db, table, month, has_default=None in existing)
+                db.session.commit()
+                created.append(name)
+                if moved:
+                    logger.info(f"🗂️ Moved {moved} rows from {table}_default into {name}")
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"⚠️ Could not create partition {name}: {e}")
+    return created
+
+
+# --------------------------------------------------------
+# 🧊 ARCHIVAL: Cold partitions to gzip JSONL on local disk
+# --------------------------------------------------------
+def archive_partitions(db, archive_dir, retention_months=12, dry_run=False, batch_size=5000):
+    """
+    Write every monthly partition older than `retention_months` to
+    <archive_dir>/<table>/<table>_<YYYY>_<MM>.jsonl.gz (plus a .manifest.json
+    with row count and checksum), then detach and drop it.
+    """
+    cutoff = add_months(month_start(date.today()), -retention_months)
+    archived = []
+
+    for table in PARTITIONED_TABLES:
+        for name, month in list_partitions(db, table):
+            if month is None or month >= cutoff:
+                continue
+            path = archive_path(archive_dir, table, month)
+            if dry_run:
+                archived.append({"partition": name, "path": path, "rows": None})
+                continue
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            checksum = hashlib.sha256()
+            rows = 0
+            # The session would buffer the whole partition; stream it instead
+            with db.engine.connect() as conn:
+                result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+                    text(f"SELECT * FROM {name} ORDER BY id")
+                )
+                columns = list(result.keys())
+                with gzip.open(tmp_path, "wb") as f:
+                    for row in result:
+                        line = json.dumps(dict(zip(columns, row)), default=_json_default).encode() + b"\n"
+                        checksum.update(line)
+                        f.write(line)
+                        rows += 1
+
+            os.replace(tmp_path, path)
+            with open(path.replace(".jsonl.gz", ".manifest.json"), "w") as f:
+                json.dump({
+                    "table": table,
+                    "partition": name,
+                    "month": month.isoformat(),
+                    "rows": rows,
+                    "columns": columns,
+                    "sha256": checksum.hexdigest(),
+                    "archived_at": datetime.utcnow().isoformat(timespec="seconds"),
+                }, f, indent=2)
+
+            # Only drop once the file is safely on disk
+            db.session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            db.session.execute(text(f"DROP TABLE {name}"))
+            db.session.commit()
+            logger.info(f"🧊 Archived {name}: {rows} rows → {path}")
+            archived.append({"partition": name, "path": path, "rows": rows})
+    return archived
+
+
+# --------------------------------------------------------
+# 📤 EXPORT: Archived months first, then the hot table
+# --------------------------------------------------------
+def iter_archived_rows(archive_dir, table, start=None, end=None):
+    """
+    Yield archived rows (created_at as datetime) whose created_at falls in
+    [start, end), oldest month first.
+    """
+    folder = os.path.join(archive_dir, table)
+    if not os.path.isdir(folder):
+        return
+
+    files = []
+    for filename in os.listdir(folder):
+        match = _ARCHIVE_FILE.search(filename)
+        if match:
+            files.append((date(int(match.group(1)), int(match.group(2)), 1), filename))
+
+    for month, filename in sorted(files):
+        if end is not None and month >= end.date():
+            continue
+        if start is not None and add_months(month, 1) <= start.date():
+            continue
+        with gzip.open(os.path.join(folder, filename), "rb") as f:
+            for line in f:
+                row = json.loads(line)
+                if row.get("created_at"):
+                    row["created_at"] = datetime.fromisoformat(row["created_at"])
+                created_at = row.get("created_at")
+                if start is not None and (created_at is None or created_at < start):
+                    continue
+                if end is not None and (created_at is None or created_at >= end):
+                    continue
+                yield row
+
+
+def iter_hot_rows(db, fields, created_at, start=None, end=None, batch_size=2000):
+    """
+    Stream rows still in the database as dicts, oldest first.
+    """
+    statement = select(*fields.values()).order_by(created_at)
+    if start is not None:
+        statement = statement.where(created_at >= start)
+    if end is not None:
+        statement = statement.where(created_at < end)
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    names = list(fields)
+    for row in result:
+        yield dict(zip(names, row))
@@ -0,0 +1,216 @@
+# utils/rate_limit.py
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import case, func
+
+from utils.metrics import RATE_LIMIT_DECISIONS
+
+
+def parse_limit(spec):
+    """
+    Parse "30/60" (30 requests per 60 seconds, burst 30) or
+    "30/60/10" (same rate, burst of 10) into (rate_per_second, capacity).
+    """
+    parts = [float(part) for part in str(spec).split("/")]
+    requests_allowed, seconds = parts[0], parts[1]
+    capacity = parts[2] if len(parts) > 2 else requests_allowed
+    return requests_allowed / seconds, capacity
+
+
+# --------------------------------------------------------
+# 🪣 BACKENDS: Token buckets in memory or in the database
+# --------------------------------------------------------
+class MemoryBuckets:
+    """
+    Per-process token buckets. Each gunicorn worker keeps its own, so the
+    effective limit is workers x limit; use DatabaseBuckets to share them.
+    """
+
+    def __init__(self, max_keys=50000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, capacity, now=None):
+        """
+        Try to take one token. Returns (allowed, tokens_left).
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            # Least recently used buckets go first; a dropped bucket is simply full again
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+
+class DatabaseBuckets:
+    """
+    Token buckets shared by every worker, stored in rate_limit_buckets.
+    Refill, check and consume happen in one atomic UPSERT ... RETURNING
+    (PostgreSQL, or SQLite 3.35+).
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def take(self, key, rate, capacity, now=None):
+        from models.rate_limit import RateLimitBucket
+
+        now = time.time() if now is None else now
+        engine = self.db.engine
+        if engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+            smallest = func.least
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+            smallest = func.min
+
+        table = RateLimitBucket.__table__
+        refilled = smallest(capacity, table.c.tokens + (now - table.c.updated_at) * rate)
+        statement = (
+            insert(table)
+            .values(key=key, tokens=capacity - 1, updated_at=now, allowed=True)
+            .on_conflict_do_update(
+                index_elements=[table.c.key],
+                set_={
+                    "tokens": case((refilled >= 1, refilled - 1), else_=refilled),
+                    "allowed": refilled >= 1,
+                    "updated_at": now,
+                },
+            )
+            .returning(table.c.allowed, table.c.tokens)
+        )
+        with engine.begin() as conn:
+            allowed, tokens = conn.execute(statement).one()
+        return bool(allowed), tokens
+
+
+# --------------------------------------------------------
+# 🚦 LIMITER: Rate limits and concurrency caps per route class
+# --------------------------------------------------------
+class RateLimiter:
+    """
+    Token bucket per (route class, caller) plus a per-process cap on
+    concurrent requests per route class.
+    """
+
+    def __init__(self, backend, limits, concurrency=None):
+        self.backend = backend
+        self.limits = {name: parse_limit(spec) for name, spec in limits.items()}
+        self.slots = {
+            name: threading.BoundedSemaphore(int(cap))
+            for name, cap in (concurrency or {}).items() if int(cap) > 0
+        }
+
+    def check(self, route_class, caller):
+        """
+        Returns (allowed, retry_after_seconds, headers).
+        """
+        if route_class not in self.limits:
+            return True, 0, {}
+        rate, capacity = self.limits[route_class]
+        allowed, tokens = self.backend.take(f"{route_class}:{caller}", rate, capacity)
+        headers = {
+            "X-RateLimit-Limit": str(int(capacity)),
+            "X-RateLimit-Remaining": str(max(0, int(tokens))),
+        }
+        retry_after = 0 if allowed else max(1, math.ceil((1 - tokens) / rate))
+        return allowed, retry_after, headers
+
+
+def _caller_identity():
+    """
+    JWT identity when a valid token is sent, otherwise the client address.
+    """
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    return f"user:{identity}" if identity else f"ip:{request.remote_addr}"
+
+
+def _reject(status, message, retry_after, headers):
+    response = jsonify({"error": message, "retry_after": retry_after})
+    response.status_code = status
+    response.headers["Retry-After"] = str(retry_after)
+    response.headers.update(headers)
+    return response
+
+
+def rate_limited(route_class):
+    """
+    Apply the RATE_LIMITS / RATE_LIMIT_CONCURRENCY settings for `route_class`.
+    Example:
+        @app.route("/api/ai/sentinel", methods=["POST"])
+        @rate_limited("ai")
+        def simulate_sentinel(): ...
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            limiter = current_app.extensions.get("rate_limiter")
+            if limiter is None:
+                return fn(*args, **kwargs)
+
+            try:
+                allowed, retry_after, headers = limiter.check(route_class, _caller_identity())
+            except Exception as e:
+                # A broken limiter store must not take the API down with it
+                current_app.logger.warning("Rate limiter unavailable, allowing request: %s", e)
+                RATE_LIMIT_DECISIONS.labels(route_class, "error").inc()
+                allowed, retry_after, headers = True, 0, {}
+
+            if not allowed:
+                RATE_LIMIT_DECISIONS.labels(route_class, "limited").inc()
+                return _reject(429, "Too many requests", retry_after, headers)
+
+            slots = limiter.slots.get(route_class)
+            if slots is not None and not slots.acquire(blocking=False):
+                RATE_LIMIT_DECISIONS.labels(route_class, "shed").inc()
+                return _reject(503, "Server busy, try again shortly", 1, headers)
+
+            RATE_LIMIT_DECISIONS.labels(route_class, "allowed").inc()
+            try:
+                response = current_app.make_response(fn(*args, **kwargs))
+            finally:
+                if slots is not None:
+                    slots.release()
+            response.headers.update(headers)
+            return response
+        return wrapper
+    return decorator
+
+
+def init_rate_limiting(app, db):
+    """
+    Build the limiter from config. RATE_LIMIT_BACKEND=database shares buckets
+    across workers; the default "memory" keeps them per process.
+    """
+    if not app.config.get("RATE_LIMIT_ENABLED", True):
+        return
+    limits = app.config.get("RATE_LIMITS") or {}
+    concurrency = app.config.get("RATE_LIMIT_CONCURRENCY") or {}
+    if isinstance(limits, str):
+        limits = json.loads(limits)
+    if isinstance(concurrency, str):
+        concurrency = json.loads(concurrency)
+
+    if app.config.get("RATE_LIMIT_BACKEND", "memory") == "database":
+        backend = DatabaseBuckets(db)
+    else:
+        backend = MemoryBuckets()
+    app.extensions["rate_limiter"] = RateLimiter(backend, limits, concurrency)
@@ -0,0 +1,80 @@
+# utils/serializers.py
+import json
+
+from flask import Response, request
+from sqlalchemy import select
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder gives the same output, slower
+    orjson = None
+
+
+# --------------------------------------------------------
+# ⚡ JSON ENCODING
+# --------------------------------------------------------
+def dumps(payload):
+    """
+    Encode to JSON bytes, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def json_response(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype="application/json")
+
+
+def format_datetime(value):
+    """
+    "YYYY-MM-DD HH:MM:SS", the format the list endpoints have always used.
+    """
+    return value.isoformat(" ", "seconds") if value is not None else None
+
+
+# --------------------------------------------------------
+# 📋 LIST ENDPOINTS: Column tuples straight to JSON
+# --------------------------------------------------------
+def requested_fields(fields, deferred=()):
+    """
+    Pick the fields to return for this request.
+
+    ?fields=id,status  returns exactly those fields (unknown names are ignored)
+    ?include=description  adds deferred fields to the default set
+    Deferred fields (large text columns) are left out unless asked for.
+    """
+    names = list(fields)
+    wanted = request.args.get("fields")
+    if wanted:
+        wanted = {name.strip() for name in wanted.split(",")}
+        return [name for name in names if name in wanted]
+
+    include = {name.strip() for name in request.args.get("include", "").split(",") if name.strip()}
+    return [name for name in names if name not in deferred or name in include]
+
+
+def serialize_rows(db, fields, deferred=(), order_by=None, formatters=None):
+    """
+    Select only the requested columns as plain tuples (no ORM instances or
+    identity map) and return them as a list of dicts.
+
+    `fields` maps output names to columns, in output order, e.g.
+        {"id": MaintenanceRecord.id, "created_at": MaintenanceRecord.created_at}
+    `formatters` maps output names to functions applied to non-key values.
+    """
+    names = requested_fields(fields, deferred)
+    if not names:
+        return []
+
+    statement = select(*(fields[name] for name in names))
+    if order_by is not None:
+        statement = statement.order_by(order_by)
+    rows = db.session.execute(statement).all()
+
+    convert = [(name, fn) for name, fn in (formatters or {}).items() if name in names]
+    results = [dict(zip(names, row)) for row in rows]
+    for name, fn in convert:
+        for item in results:
+            item[name] = fn(item[name])
+    return results
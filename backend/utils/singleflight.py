@@ -0,0 +1,221 @@
+# utils/singleflight.py
+import hashlib
+import threading
+import time
+import uuid
+from functools import wraps
+
+from flask import Response, current_app, request
+from sqlalchemy import and_, delete, or_, select, update
+
+from utils.metrics import SINGLEFLIGHT_REQUESTS
+
+
+# --------------------------------------------------------
+# 🧵 IN-PROCESS: One computation per key per worker
+# --------------------------------------------------------
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Concurrent callers of do() with the same key share one execution of fn.
+    Nothing is cached: once the leader finishes, the next call runs fn again.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, wait_seconds=30.0):
+        """
+        Returns (result, role) where role is "leader", "follower", or
+        "fallback" when the leader took longer than wait_seconds.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            if not call.done.wait(wait_seconds):
+                return fn(), "fallback"
+            if call.error is not None:
+                raise call.error
+            return call.result, "follower"
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, "leader"
+
+
+# --------------------------------------------------------
+# 🗄️ CROSS-WORKER: Lease + result row in singleflight_results
+# --------------------------------------------------------
+class DatabaseFlight:
+    """
+    Extends coalescing across workers. The first worker to take the lease
+    on a key computes; the others poll the row until its result lands.
+    Rows are keyed by the sha256 of the request key, and rows whose lease
+    ended more than lease_seconds ago are purged every purge_interval.
+    """
+
+    def __init__(self, db, lease_seconds=60.0, poll_interval=0.05, purge_interval=60.0):
+        self.db = db
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+        self._purge_lock = threading.Lock()
+
+    def _insert(self):
+        if self.db.engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert
+
+    def _acquire(self, table, key, owner, now):
+        insert = self._insert()
+        statement = (
+            insert(table)
+            .values(key=key, owner=owner, state="running", lease_until=now + self.lease_seconds)
+            .on_conflict_do_update(
+                index_elements=[table.c.key],
+                set_={"owner": owner, "state": "running", "lease_until": now + self.lease_seconds},
+                # Take over finished keys and leases whose holder died
+                where=or_(table.c.state == "done", table.c.lease_until < now),
+            )
+            .returning(table.c.owner)
+        )
+        with self.db.engine.begin() as conn:
+            row = conn.execute(statement).first()
+        return row is not None and row[0] == owner
+
+    def _purge(self, table, now):
+        # Nobody polls a row this long after its lease: followers give up
+        # at the lease end and newcomers take the row over
+        with self._purge_lock:
+            if time.monotonic() < self._next_purge:
+                return
+            self._next_purge = time.monotonic() + self.purge_interval
+        with self.db.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.lease_until < now - self.lease_seconds))
+
+    def do(self, key, fn, wait_seconds=30.0):
+        from models.singleflight import SingleFlightResult
+
+        table = SingleFlightResult.__table__
+        # Path plus query string can be any length; the hash always fits the column
+        key = hashlib.sha256(key.encode()).hexdigest()
+        owner = uuid.uuid4().hex
+        self._purge(table, time.time())
+        if self._acquire(table, key, owner, time.time()):
+            try:
+                body, status, mimetype = fn()
+            except Exception:
+                # Expire the lease so waiting workers stop polling and compute themselves
+                with self.db.engine.begin() as conn:
+                    conn.execute(
+                        update(table)
+                        .where(and_(table.c.key == key, table.c.owner == owner))
+                        .values(lease_until=0)
+                    )
+                raise
+            with self.db.engine.begin() as conn:
+                conn.execute(
+                    update(table)
+                    .where(and_(table.c.key == key, table.c.owner == owner))
+                    .values(state="done", done_at=time.time(), body=body,
+                            status=status, mimetype=mimetype)
+                )
+            return (body, status, mimetype), "leader"
+
+        deadline = time.monotonic() + wait_seconds
+        query = select(
+            table.c.state, table.c.lease_until, table.c.body, table.c.status, table.c.mimetype
+        ).where(table.c.key == key)
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            with self.db.engine.connect() as conn:
+                row = conn.execute(query).first()
+            if row is not None and row.state == "done":
+                return (bytes(row.body), row.status, row.mimetype), "follower"
+            if row is None or row.lease_until < time.time():
+                break
+        return fn(), "fallback"
+
+
+# --------------------------------------------------------
+# 🎯 DECORATOR: Coalesce identical GET requests
+# --------------------------------------------------------
+def _request_key():
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    return f"{request.path}?{query}"
+
+
+def coalesced(fn):
+    """
+    Let concurrent identical GET requests (same path and query string) share
+    one run of the view. Responses must not depend on who is asking.
+    Example:
+        @app.route("/api/analytics/overview", methods=["GET"])
+        @coalesced
+        def get_analytics_overview(): ...
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        flights = current_app.extensions.get("singleflight")
+        if flights is None or request.method != "GET":
+            return fn(*args, **kwargs)
+
+        def compute():
+            response = current_app.make_response(fn(*args, **kwargs))
+            return response.get_data(), response.status_code, response.mimetype
+
+        def compute_shared():
+            if flights["database"] is None:
+                return compute()
+            result, role = flights["database"].do(key, compute, flights["wait_seconds"])
+            if role != "leader":
+                SINGLEFLIGHT_REQUESTS.labels(route, f"remote_{role}").inc()
+            return result
+
+        key = _request_key()
+        route = request.url_rule.rule if request.url_rule else request.path
+        (body, status, mimetype), role = flights["local"].do(key, compute_shared, flights["wait_seconds"])
+        SINGLEFLIGHT_REQUESTS.labels(route, role).inc()
+
+        response = Response(body, status=status, mimetype=mimetype)
+        response.headers["X-Coalesced"] = role
+        return response
+    return wrapper
+
+
+def init_singleflight(app, db):
+    """
+    SINGLEFLIGHT_BACKEND=local coalesces within each worker;
+    "database" also coalesces across workers via singleflight_results.
+    """
+    if not app.config.get("SINGLEFLIGHT_ENABLED", True):
+        return
+    database = None
+    if app.config.get("SINGLEFLIGHT_BACKEND", "local") == "database":
+        database = DatabaseFlight(db, lease_seconds=app.config.get("SINGLEFLIGHT_LEASE_SECONDS", 60.0))
+    app.extensions["singleflight"] = {
+        "local": SingleFlight(),
+        "database": database,
+        "wait_seconds": app.config.get("SINGLEFLIGHT_WAIT_SECONDS", 30.0),
+    }
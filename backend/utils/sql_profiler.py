@@ -0,0 +1,121 @@
+# utils/sql_profiler.py
+import re
+import time
+from functools import lru_cache
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Collapse literals and expanded IN lists so "same query, different ids"
+# counts as one statement shape.
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement):
+    """
+    Normalize a SQL statement into its shape (literals and IN lists removed).
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+# --------------------------------------------------------
+# ⏱️ ENGINE EVENTS: Per-request query count and DB time
+# --------------------------------------------------------
+# The start time lives on the per-statement execution context: a statement
+# that raises never reaches after_cursor_execute, and anything kept on the
+# pooled connection would be left behind for good.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_profiler_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_sql_profiler_start", None)
+    if start is None or not has_app_context():
+        return
+    elapsed = time.perf_counter() - start
+    g.sql_query_count = g.get("sql_query_count", 0) + 1
+    g.sql_query_time = g.get("sql_query_time", 0.0) + elapsed
+
+    # Statement shapes are only collected while the profiler is on
+    shapes = g.get("sql_statement_shapes")
+    if shapes is not None:
+        entry = shapes.setdefault(statement_shape(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+
+
+def reset_query_stats(profile=False):
+    """
+    Start counting queries for the current request.
+    """
+    g.sql_query_count = 0
+    g.sql_query_time = 0.0
+    g.sql_statement_shapes = {} if profile else None
+
+
+# --------------------------------------------------------
+# 🔎 PROFILER: Headers, slow-request log, N+1 warnings
+# --------------------------------------------------------
+def init_sql_profiler(app):
+    """
+    Opt-in per-request SQL profiler.
+
+    SQL_PROFILER_ENABLED=1 profiles every request; in debug mode a single
+    request can opt in with the `X-Profile-SQL: 1` header.
+    """
+    enabled = app.config.get("SQL_PROFILER_ENABLED", False)
+    slow_ms = app.config.get("SQL_PROFILER_SLOW_MS", 500)
+    repeat_threshold = app.config.get("SQL_PROFILER_REPEAT_THRESHOLD", 10)
+
+    @app.before_request
+    def start_sql_profile():
+        profile = enabled or (app.debug and request.headers.get("X-Profile-SQL") == "1")
+        reset_query_stats(profile=profile)
+        if profile:
+            g.sql_profile_start = time.perf_counter()
+
+    @app.after_request
+    def report_sql_profile(response):
+        if g.get("sql_statement_shapes") is None:
+            return response
+
+        count = g.sql_query_count
+        db_ms = g.sql_query_time * 1000
+        total_ms = (time.perf_counter() - g.sql_profile_start) * 1000
+        route = request.url_rule.rule if request.url_rule else request.path
+
+        response.headers["X-Query-Count"] = str(count)
+        response.headers.add(
+            "Server-Timing", f'db;dur={db_ms:.1f};desc="{count} queries"'
+        )
+        response.headers.add("Server-Timing", f"app;dur={total_ms:.1f}")
+
+        repeated = [
+            (shape, calls, seconds)
+            for shape, (calls, seconds) in g.sql_statement_shapes.items()
+            if calls > repeat_threshold
+        ]
+        for shape, calls, seconds in sorted(repeated, key=lambda item: -item[1]):
+            app.logger.warning(
+                "Possible N+1 on %s %s: statement ran %d times (%.1f ms): %s",
+                request.method, route, calls, seconds * 1000, shape[:300],
+            )
+
+        if total_ms >= slow_ms:
+            app.logger.warning(
+                "Slow request %s %s: %.1f ms total, %d queries, %.1f ms in DB",
+                request.method, route, total_ms, count, db_ms,
+            )
+        return response
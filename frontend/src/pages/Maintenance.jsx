@@ -42,7 +42,7 @@ const Maintenance = () => {
   const fetchReports = async () => {
     setFetching(true);
     try {
-      const response = await axiosInstance.get('/maintenance');
+      const response = await axiosInstance.get('/maintenance?include=description');
       setReports(response.data);
     } catch (error) {
       toast({
@@ -33,7 +33,7 @@ const Projects = () => {
   const fetchProjects = async () => {
     setLoading(true);
     try {
-      const response = await axiosInstance.get('/projects');
+      const response = await axiosInstance.get('/projects?include=description');
       setProjects(response.data);
     } catch (error) {
       console.error('Error fetching projects:', error);
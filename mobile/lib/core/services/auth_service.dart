@@ -156,7 +156,7 @@ class ApiService {
   }
 
   Future<ApiResponse<List<dynamic>>> getMaintenanceReports() async {
-    return get<List<dynamic>>('/api/maintenance');
+    return get<List<dynamic>>('/api/maintenance?include=description');
   }
 
   Future<ApiResponse<dynamic>> updateMaintenanceStatus({
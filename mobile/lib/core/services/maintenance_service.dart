@@ -44,7 +44,7 @@ class MaintenanceService {
 
   Future<List<MaintenanceReport>> getMaintenanceReports() async {
     try {
-      final response = await apiService.get<dynamic>('/api/maintenance');
+      final response = await apiService.get<dynamic>('/api/maintenance?include=description');
 
       if (response.success) {
         final data = response.data;
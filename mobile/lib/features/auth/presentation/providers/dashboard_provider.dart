@@ -77,7 +77,7 @@ class DashboardProvider with ChangeNotifier {
       }
 
       // Load maintenance reports
-      final maintenanceResponse = await _apiService.get<List<dynamic>>('/api/maintenance');
+      final maintenanceResponse = await _apiService.get<List<dynamic>>('/api/maintenance?include=description');
       if (maintenanceResponse.success && maintenanceResponse.data != null) {
         _maintenanceReports = maintenanceResponse.data!
             .map((m) => MaintenanceReport.fromJson(m as Map<String, dynamic>))
@@ -113,7 +113,7 @@ class DashboardProvider with ChangeNotifier {
 
   Future<void> refreshMaintenance() async {
     try {
-      final maintenanceResponse = await _apiService.get<List<dynamic>>('/api/maintenance');
+      final maintenanceResponse = await _apiService.get<List<dynamic>>('/api/maintenance?include=description');
       if (maintenanceResponse.success && maintenanceResponse.data != null) {
         _maintenanceReports = maintenanceResponse.data!
             .map((m) => MaintenanceReport.fromJson(m as Map<String, dynamic>))
@@ -0,0 +1,144 @@
+"""
+CPU-versus-bytes trade-off of response compression for our typical payloads.
+
+    python scripts/bench_compression.py
+    python scripts/bench_compression.py --rows 5000 --link-mbps 2 --output compression.json
+
+For each payload and encoder/level it reports compressed size, compression
+time, throughput, and the estimated time to deliver the response over a
+--link-mbps link (CPU + transfer), which is what a phone on a construction
+site actually waits for.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from utils.compression import brotli, compress, compress_stream  # noqa: E402
+
+
+def build_payloads(rows, seed=42):
+    """
+    Payloads shaped like the real endpoints (see backend/app.py).
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    issues = ["Brake pads worn", "Hydraulic leak on boom", "Engine overheating",
+              "Track tension low", "Cracked windshield", "Oil change overdue"]
+
+    maintenance = [
+        {
+            "id": n + 1,
+            "vehicle_id": f"VH-{rng.randint(1, 500):04d}",
+            "severity": rng.choice(["low", "medium", "high", "critical"]),
+            "status": rng.choice(["pending", "in-progress", "completed"]),
+            "created_at": (start + timedelta(minutes=17 * n)).isoformat(" ", "seconds"),
+        }
+        for n in range(rows)
+    ]
+    maintenance_full = [
+        dict(item, description=f"{rng.choice(issues)}. Reported by operator at site {rng.randint(1, 40)}.")
+        for item in maintenance
+    ]
+    invoices = [
+        {
+            "id": n + 1,
+            "supplier_id": rng.randint(1, 200),
+            "amount": round(rng.lognormvariate(7, 1.2), 2),
+            "status": rng.choice(["pending", "approved", "rejected"]),
+            "created_at": (start + timedelta(minutes=31 * n)).isoformat(" ", "seconds"),
+        }
+        for n in range(rows)
+    ]
+    overview = {"total_projects": 42, "total_maintenance": rows, "total_suppliers": 200, "total_invoices": rows}
+
+    return {
+        "analytics overview": json.dumps(overview).encode(),
+        f"maintenance list ({rows})": json.dumps(maintenance).encode(),
+        f"maintenance + description ({rows})": json.dumps(maintenance_full).encode(),
+        f"invoice list ({rows})": json.dumps(invoices).encode(),
+        f"ndjson export ({rows})": "".join(json.dumps(item) + "\n" for item in maintenance_full).encode(),
+    }
+
+
+def measure(data, encoding, level, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = compress(data, encoding, level)
+        best = min(best, time.perf_counter() - start)
+    # Sanity check that the output round-trips
+    restored = brotli.decompress(out) if encoding == "br" else zlib.decompress(out, 31)
+    assert restored == data
+    return len(out), best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gzip/brotli levels on API payloads")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--link-mbps", type=float, default=1.0, help="client bandwidth for the delivery estimate")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    settings = [("identity", 0)] + [("gzip", level) for level in (1, 4, 6, 9)]
+    if brotli is not None:
+        settings += [("br", quality) for quality in (1, 4, 6, 11)]
+    else:
+        print("ℹ️ brotli not installed, measuring gzip only\n")
+
+    bytes_per_second = args.link_mbps * 1_000_000 / 8
+    results = []
+    for name, data in build_payloads(args.rows).items():
+        print(f"📦 {name}: {len(data) / 1024:,.1f} KiB")
+        print(f"   {'encoder':<10} {'size KiB':>10} {'ratio':>7} {'cpu ms':>8} {'MB/s':>8} {'deliver ms':>11}")
+        for encoding, level in settings:
+            if encoding == "identity":
+                size, seconds = len(data), 0.0
+            else:
+                size, seconds = measure(data, encoding, level, args.repeat)
+            deliver_ms = (seconds + size / bytes_per_second) * 1000
+            throughput = len(data) / seconds / 1_000_000 if seconds else float("inf")
+            label = encoding if encoding == "identity" else f"{encoding}-{level}"
+            print(f"   {label:<10} {size / 1024:>10,.1f} {len(data) / size:>7.1f} "
+                  f"{seconds * 1000:>8.2f} {throughput:>8.0f} {deliver_ms:>11.1f}")
+            results.append({
+                "payload": name, "encoding": encoding, "level": level,
+                "raw_bytes": len(data), "compressed_bytes": size,
+                "cpu_ms": round(seconds * 1000, 3), "deliver_ms": round(deliver_ms, 1),
+            })
+        print()
+
+    # Streamed exports are compressed incrementally; flushing costs ratio
+    ndjson = list(build_payloads(args.rows).values())[-1]
+    lines = ndjson.splitlines(keepends=True)
+    print(f"🌊 streamed ndjson export, {len(lines)} one-line chunks")
+    for encoding, level in [("gzip", 6)] + ([("br", 4)] if brotli is not None else []):
+        for flush_bytes in (0, 8192, 65536):
+            start = time.perf_counter()
+            size = sum(len(part) for part in compress_stream(iter(lines), encoding, level, flush_bytes))
+            seconds = time.perf_counter() - start
+            print(f"   {encoding}-{level} flush every {flush_bytes:>6} B: {size / 1024:>8,.1f} KiB "
+                  f"ratio {len(ndjson) / size:>5.1f}  cpu {seconds * 1000:>7.2f} ms")
+            results.append({
+                "payload": "ndjson stream", "encoding": encoding, "level": level,
+                "flush_bytes": flush_bytes, "raw_bytes": len(ndjson), "compressed_bytes": size,
+                "cpu_ms": round(seconds * 1000, 3),
+            })
+    print()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"link_mbps": args.link_mbps, "results": results}, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare sequential notify_event() calls with notify_group() fan-out against
+the local Resend/Twilio stubs (scripts/stub_servers.py).
+
+    python scripts/bench_notify.py --recipients 20 --latency-ms 150
+    python scripts/bench_notify.py --recipients 50 --error-rate 0.05 --email-concurrency 16
+"""
+import argparse
+import os
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(SCRIPTS_DIR, "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from stub_servers import start_all  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark notification fan-out against local stubs")
+    parser.add_argument("--recipients", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--email-concurrency", type=int, default=8)
+    parser.add_argument("--sms-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    servers, env = start_all(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+    os.environ.update(env)
+    os.environ["NOTIFY_EMAIL_CONCURRENCY"] = str(args.email_concurrency)
+    os.environ["NOTIFY_SMS_CONCURRENCY"] = str(args.sms_concurrency)
+
+    # Import after the environment points at the stubs
+    from utils.notification import notify_event, notify_group
+
+    recipients = [
+        {"name": f"Tech {n}", "email": f"tech{n}@example.com", "phone": f"+1555000{n:04d}"}
+        for n in range(args.recipients)
+    ]
+    subject, message = "Benchmark", "Fan-out benchmark message"
+
+    start = time.perf_counter()
+    for recipient in recipients:
+        notify_event("email", recipient["email"], subject, message)
+        notify_event("sms", recipient["phone"], subject, message)
+    sequential_ms = (time.perf_counter() - start) * 1000
+
+    summary = notify_group(recipients, ["email", "sms"], subject, message)
+
+    sends = args.recipients * 2
+    print(f"\n📊 {sends} sends, stub latency {args.latency_ms} ms (+{args.jitter_ms} jitter)")
+    print(f"   sequential: {sequential_ms:>9.1f} ms")
+    print(f"   fan-out:    {summary['duration_ms']:>9.1f} ms "
+          f"({summary['sent']} sent, {summary['failed']} failed)")
+    print(f"   speedup:    {sequential_ms / max(summary['duration_ms'], 0.001):>9.1f}x")
+    for name, server in servers.items():
+        if name != "n8n":
+            print(f"   {name} stub: {server.stats['requests']} requests, {server.stats['errors']} injected errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Microbenchmark: ORM hydration + strftime + jsonify (the old list path) versus
+column tuples + orjson (utils/serializers.py) for GET /api/maintenance.
+
+    python scripts/bench_serializers.py --rows 50000
+    python scripts/bench_serializers.py --rows 20000 --description-bytes 2000 --repeat 5
+
+Runs against a scratch SQLite file unless DATABASE_URL is set (then the
+maintenance_records table must already hold data and --rows is ignored).
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+
+def fill(db, MaintenanceRecord, rows, description_bytes):
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1)
+    filler = "x" * description_bytes
+    db.session.execute(
+        MaintenanceRecord.__table__.insert(),
+        [
+            {
+                "vehicle_id": f"VH-{rng.randint(1, 500):04d}",
+                "description": filler,
+                "severity": rng.choice(["low", "medium", "high", "critical"]),
+                "status": rng.choice(["pending", "in-progress", "completed"]),
+                "created_at": start + timedelta(minutes=n),
+            }
+            for n in range(rows)
+        ],
+    )
+    db.session.commit()
+
+
+def time_path(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list serialization paths")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--description-bytes", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    scratch = None
+    if not os.getenv("DATABASE_URL"):
+        scratch = tempfile.mkdtemp(prefix="serializers-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench")
+
+    from flask import jsonify
+    from app import app, db
+    from models.maintenance import MaintenanceRecord
+    from utils.serializers import format_datetime, json_response, orjson, serialize_rows
+
+    fields = {
+        "id": MaintenanceRecord.id,
+        "vehicle_id": MaintenanceRecord.vehicle_id,
+        "description": MaintenanceRecord.description,
+        "severity": MaintenanceRecord.severity,
+        "status": MaintenanceRecord.status,
+        "created_at": MaintenanceRecord.created_at,
+    }
+
+    def orm_path():
+        records = MaintenanceRecord.query.order_by(MaintenanceRecord.created_at.desc()).all()
+        results = [
+            {
+                "id": r.id,
+                "vehicle_id": r.vehicle_id,
+                "description": r.description,
+                "severity": r.severity,
+                "status": r.status,
+                "created_at": r.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            for r in records
+        ]
+        body = jsonify(results).get_data()
+        db.session.remove()
+        return len(body)
+
+    def tuple_path():
+        results = serialize_rows(
+            db, fields, deferred={"description"},
+            order_by=MaintenanceRecord.created_at.desc(),
+            formatters={"created_at": format_datetime},
+        )
+        body = json_response(results).get_data()
+        db.session.remove()
+        return len(body)
+
+    with app.app_context():
+        if scratch:
+            db.create_all()
+            fill(db, MaintenanceRecord, args.rows, args.description_bytes)
+        rows = db.session.query(MaintenanceRecord.id).count()
+
+        print(f"📊 {rows} maintenance rows, encoder: {'orjson' if orjson else 'json (orjson not installed)'}")
+        paths = [
+            ("ORM + strftime + jsonify", "/", orm_path),
+            ("tuples + orjson, description included", "/?include=description", tuple_path),
+            ("tuples + orjson, description deferred", "/", tuple_path),
+        ]
+        baseline = None
+        for label, url, fn in paths:
+            with app.test_request_context(url):
+                seconds, size = time_path(fn, args.repeat)
+            rate = rows / seconds
+            baseline = baseline or rate
+            print(f"  {label:<40} {seconds * 1000:>8.1f} ms  {rate:>11,.0f} rows/s  "
+                  f"{size / 1024:>8.0f} KiB  {rate / baseline:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
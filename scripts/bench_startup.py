@@ -0,0 +1,184 @@
+"""
+Startup benchmark for the backend: how long a fresh worker takes to import
+app.py, which modules dominate, and (optionally) how long gunicorn takes to
+answer its first request.
+
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 10 --top 15 --output startup.json
+    python scripts/bench_startup.py --gunicorn --workers 4
+    python scripts/bench_startup.py --max-ms 1500     # exit 1 if slower (CI gate)
+
+Every measurement runs in a new interpreter against a scratch SQLite DB, so
+nothing is cached between runs and no real database is touched.
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+# Prints wall time of the import in ms; run with -X importtime for the breakdown
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import app; "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+
+def scratch_env(workdir):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'startup.db')}")
+    env.setdefault("JWT_SECRET_KEY", "startup-bench")
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    return env
+
+
+# ----------------------------------------------------------
+# ⏱️ MEASUREMENTS
+# ----------------------------------------------------------
+def time_import(env):
+    """
+    Return (import_ms, process_ms) for one cold `import app`.
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    process_ms = (time.perf_counter() - start) * 1000
+    return float(result.stdout.strip().splitlines()[-1]), process_ms
+
+
+def import_breakdown(env, top):
+    """
+    Top-level packages ranked by cumulative import time (from -X importtime).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    packages = {}
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        cumulative = cumulative.strip()
+        if not cumulative.isdigit():
+            continue
+        # Nesting is two spaces per level after the separator's own space;
+        # depth 1 is what app.py imported directly
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            root = name.strip()
+            packages[root] = max(packages.get(root, 0), int(cumulative))
+    ranked = sorted(packages.items(), key=lambda item: -item[1])
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in ranked[:top]]
+
+
+def time_gunicorn_boot(env, workers, port):
+    """
+    Milliseconds from spawning gunicorn until "/" answers 200.
+    """
+    env = dict(env)
+    env.update({
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "GUNICORN_WORKERS": str(workers),
+    })
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app"],
+        cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    try:
+        deadline = start + 60
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("gunicorn exited during startup")
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/", timeout=1).ok:
+                    return (time.perf_counter() - start) * 1000
+            except requests.RequestException:
+                time.sleep(0.02)
+        raise RuntimeError("gunicorn did not become ready within 60s")
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait()
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "runs": len(values),
+        "min_ms": round(values[0], 1),
+        "median_ms": round(statistics.median(values), 1),
+        "max_ms": round(values[-1], 1),
+    }
+
+
+# ----------------------------------------------------------
+# 🚀 ENTRYPOINT
+# ----------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend import and boot latency")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="modules to list in the breakdown")
+    parser.add_argument("--gunicorn", action="store_true", help="also time gunicorn until first response")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--max-ms", type=float, help="fail if median import time exceeds this")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="startup-") as workdir:
+        env = scratch_env(workdir)
+        # Build the schema up front, as a deploy would with `flask db upgrade`
+        subprocess.run(
+            [sys.executable, "-m", "flask", "--app", "app", "db", "upgrade"],
+            cwd=BACKEND_DIR, env=env, check=True, capture_output=True,
+        )
+
+        imports, processes = zip(*(time_import(env) for _ in range(args.runs)))
+        results = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "import": summarize(imports),
+            "process": summarize(processes),
+            "top_imports": import_breakdown(env, args.top),
+        }
+        if args.gunicorn:
+            boots = [time_gunicorn_boot(env, args.workers, args.port) for _ in range(args.runs)]
+            results["gunicorn_first_response"] = dict(summarize(boots), workers=args.workers)
+
+    print(f"⏱️  import app:      median {results['import']['median_ms']} ms "
+          f"(min {results['import']['min_ms']}, max {results['import']['max_ms']})")
+    print(f"⏱️  whole process:   median {results['process']['median_ms']} ms")
+    if "gunicorn_first_response" in results:
+        print(f"⏱️  gunicorn ready:  median {results['gunicorn_first_response']['median_ms']} ms")
+    print("\nSlowest imports:")
+    for entry in results["top_imports"]:
+        print(f"  {entry['cumulative_ms']:>8.1f} ms  {entry['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📝 Results written to {args.output}")
+
+    if args.max_ms is not None and results["import"]["median_ms"] > args.max_ms:
+        print(f"\n❌ Median import time {results['import']['median_ms']} ms exceeds {args.max_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
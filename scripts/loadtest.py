@@ -0,0 +1,404 @@
+"""
+Reproducible load test for the SiteSupervisor REST API.
+
+Runs weighted, role-based scenarios (drivers reporting maintenance, managers
+on dashboards, finance approving invoices, AI agent calls) against a backend
+and reports p50/p95/p99 latency and requests/s per route.
+
+Against a running instance:
+    python scripts/loadtest.py --base-url http://127.0.0.1:5000 --users 20 --duration 60
+
+Spawn gunicorn locally (SQLite + stub n8n/Resend/Twilio) to compare settings:
+    python scripts/loadtest.py --spawn --workers 4 --threads 2 --duration 60
+    python scripts/loadtest.py --spawn --workers 2 --threads 8 --compare loadtest_results/<previous>.json
+
+Every virtual user shares one of three identities, so a spawned backend runs
+with rate limiting off (RATE_LIMIT_ENABLED=false); otherwise the /api/ai/*
+routes mostly answer 429/503 and the run measures the limiter instead of the
+routes. Pass --rate-limit to keep the configured limits on. A running
+instance (--base-url) is tested with whatever limits it was started with.
+
+Results are written as JSON to loadtest_results/ (or --output).
+"""
+import argparse
+import json
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import stub_servers  # noqa: E402
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(REPO_ROOT, "backend")
+PASSWORD = "loadtest-password"
+
+VEHICLES = [f"TRK-{n:03d}" for n in range(1, 41)]
+# Critical reports trigger n8n + email, so their share is set by --critical-rate
+SEVERITIES = ["low"] * 6 + ["medium"] * 3 + ["high"]
+
+
+# ----------------------------------------------------------
+# 📡 HTTP CLIENT: One per virtual user, records every call
+# ----------------------------------------------------------
+class VirtualUser:
+    def __init__(self, base_url, token, recorder):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {token}"
+        self.recorder = recorder
+
+    def call(self, method, route, path=None, **kwargs):
+        """
+        `route` is the template used for grouping (e.g. /api/maintenance/<id>).
+        """
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + (path or route), timeout=30, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.recorder.record(f"{method} {route}", time.perf_counter() - start, ok)
+        return response
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, route, seconds, ok):
+        with self._lock:
+            entry = self.samples.setdefault(route, {"latencies": [], "errors": 0})
+            entry["latencies"].append(seconds)
+            if not ok:
+                entry["errors"] += 1
+
+
+def _json(response, default):
+    try:
+        return response.json() if response is not None and response.ok else default
+    except ValueError:
+        return default
+
+
+# ----------------------------------------------------------
+# 🎭 SCENARIOS: What each role does in one iteration
+# ----------------------------------------------------------
+def driver_scenario(user, rng, options):
+    severity = "critical" if rng.random() < options.critical_rate else rng.choice(SEVERITIES)
+    user.call("POST", "/api/maintenance", json={
+        "vehicle_id": rng.choice(VEHICLES),
+        "description": f"Driver report: {rng.choice(['brake noise', 'oil leak', 'tyre wear', 'engine light'])}",
+        "severity": severity,
+    })
+    user.call("GET", "/api/maintenance")
+    user.call("POST", "/api/ai/sentinel", json={
+        "temperature": round(rng.gauss(75, 10), 1),
+        "oil_pressure": round(rng.gauss(45, 8), 1),
+        "vibration": round(rng.gauss(3, 1), 2),
+    })
+
+
+def manager_scenario(user, rng, options):
+    user.call("GET", "/api/analytics/overview")
+    user.call("GET", "/api/projects")
+    user.call("GET", "/api/ai/foreman")
+    records = _json(user.call("GET", "/api/maintenance"), [])
+    if records:
+        record = rng.choice(records[:50])
+        user.call("PATCH", "/api/maintenance/<id>", f"/api/maintenance/{record['id']}",
+                  json={"status": rng.choice(["in-progress", "completed"])})
+
+
+def finance_scenario(user, rng, options):
+    invoices = _json(user.call("GET", "/api/finance/invoices"), [])
+    user.call("POST", "/api/finance/invoices", json={
+        "supplier_id": rng.randint(1, options.suppliers),
+        "amount": round(rng.lognormvariate(6.5, 1.0), 2),
+    })
+    pending = [i for i in invoices if i.get("status") == "pending"]
+    if pending:
+        invoice = rng.choice(pending[:50])
+        user.call("PATCH", "/api/finance/invoices/<id>", f"/api/finance/invoices/{invoice['id']}",
+                  json={"status": rng.choice(["approved", "approved", "rejected"])})
+    user.call("GET", "/api/ai/chancellor")
+
+
+def ai_scenario(user, rng, options):
+    user.call("GET", "/api/ai/quartermaster")
+    user.call("GET", "/api/ai/chancellor")
+    user.call("GET", "/api/ai/foreman")
+    user.call("POST", "/api/ai/sentinel", json={"temperature": 95, "oil_pressure": 28, "vibration": 5.5})
+
+
+SCENARIOS = {
+    # name: (role used to log in, default weight, function)
+    "driver": ("driver", 4, driver_scenario),
+    "manager": ("manager", 3, manager_scenario),
+    "finance": ("manager", 2, finance_scenario),
+    "ai": ("admin", 1, ai_scenario),
+}
+
+
+# ----------------------------------------------------------
+# 🧰 SETUP: Users, reference data, optional local server
+# ----------------------------------------------------------
+def login_tokens(base_url):
+    tokens = {}
+    for role in ("driver", "manager", "admin"):
+        email = f"loadtest-{role}@example.com"
+        requests.post(f"{base_url}/api/auth/register", json={
+            "name": f"Load Test {role.title()}", "email": email, "password": PASSWORD, "role": role,
+        }, timeout=30)
+        response = requests.post(f"{base_url}/api/auth/login", json={"email": email, "password": PASSWORD}, timeout=30)
+        response.raise_for_status()
+        tokens[role] = response.json()["token"]
+    return tokens
+
+
+def ensure_reference_data(base_url, token, options):
+    headers = {"Authorization": f"Bearer {token}"}
+    existing = requests.get(f"{base_url}/api/suppliers", headers=headers, timeout=30).json()
+    for n in range(len(existing), options.suppliers):
+        requests.post(f"{base_url}/api/suppliers", json={"name": f"Supplier {n + 1}"}, headers=headers, timeout=30)
+    if not requests.get(f"{base_url}/api/projects", headers=headers, timeout=30).json():
+        for n in range(10):
+            requests.post(f"{base_url}/api/projects", json={"name": f"Project {n + 1}"}, headers=headers, timeout=30)
+
+
+def spawn_backend(options, stub_env):
+    """
+    Start gunicorn with the requested worker/thread settings on a scratch DB.
+    """
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    env = dict(os.environ)
+    env.update(stub_env)
+    env.update({
+        "DATABASE_URL": options.database_url or f"sqlite:///{os.path.join(workdir, 'loadtest.db')}",
+        "JWT_SECRET_KEY": env.get("JWT_SECRET_KEY", "loadtest-secret"),
+        "GUNICORN_BIND": f"127.0.0.1:{options.port}",
+        "GUNICORN_WORKERS": str(options.workers),
+        "GUNICORN_THREADS": str(options.threads),
+        "PROMETHEUS_MULTIPROC_DIR": os.path.join(workdir, "prometheus"),
+        "RATE_LIMIT_ENABLED": "true" if options.rate_limit else "false",
+    })
+    os.makedirs(env["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+    # The app no longer creates tables on import; build the schema first
+    subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "app", "db", "upgrade"],
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL if not options.verbose else None,
+        stderr=subprocess.DEVNULL if not options.verbose else None,
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL if not options.verbose else None,
+        stderr=subprocess.DEVNULL if not options.verbose else None,
+        start_new_session=True,
+    )
+
+    base_url = f"http://127.0.0.1:{options.port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup (run with --verbose)")
+        try:
+            if requests.get(base_url + "/", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    os.killpg(process.pid, signal.SIGTERM)
+    raise RuntimeError("backend did not become ready within 60s")
+
+
+# ----------------------------------------------------------
+# 📊 REPORTING
+# ----------------------------------------------------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples, duration):
+    routes = {}
+    all_latencies, all_errors = [], 0
+    for route, entry in sorted(samples.items()):
+        latencies = sorted(entry["latencies"])
+        all_latencies.extend(latencies)
+        all_errors += entry["errors"]
+        routes[route] = {
+            "count": len(latencies),
+            "errors": entry["errors"],
+            "rps": round(len(latencies) / duration, 2),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+        }
+    all_latencies.sort()
+    total = {
+        "count": len(all_latencies),
+        "errors": all_errors,
+        "rps": round(len(all_latencies) / duration, 2),
+        "p50_ms": round(percentile(all_latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(all_latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(all_latencies, 99) * 1000, 2),
+    }
+    return routes, total
+
+
+def print_report(routes, total, baseline=None):
+    header = f"{'route':<44} {'count':>7} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    if baseline:
+        header += f" {'Δreq/s':>8} {'Δp95':>8}"
+    print(header)
+    print("-" * len(header))
+    rows = list(routes.items()) + [("TOTAL", total)]
+    for route, stats in rows:
+        line = (f"{route:<44} {stats['count']:>7} {stats['errors']:>5} {stats['rps']:>8.1f} "
+                f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+        if baseline:
+            before = baseline["total"] if route == "TOTAL" else baseline["routes"].get(route)
+            if before:
+                line += f" {_delta(before['rps'], stats['rps']):>8} {_delta(before['p95_ms'], stats['p95_ms']):>8}"
+        print(line)
+    print("(latencies in ms)")
+
+
+def _delta(before, after):
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.0f}%"
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+# ----------------------------------------------------------
+# 🚀 MAIN
+# ----------------------------------------------------------
+def run(options, base_url):
+    tokens = login_tokens(base_url)
+    ensure_reference_data(base_url, tokens["admin"], options)
+
+    weights = {name: spec[1] for name, spec in SCENARIOS.items()}
+    for item in options.mix.split(",") if options.mix else []:
+        name, weight = item.split("=")
+        weights[name] = float(weight)
+    names = [name for name in SCENARIOS if weights.get(name, 0) > 0]
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    deadline = started + options.duration
+
+    def user_loop(index):
+        rng = random.Random(options.seed * 1000 + index)
+        clients = {role: VirtualUser(base_url, token, recorder) for role, token in tokens.items()}
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights=[weights[n] for n in names])[0]
+            role, _, scenario = SCENARIOS[name]
+            scenario(clients[role], rng, options)
+            if options.think_ms:
+                time.sleep(rng.expovariate(1000 / options.think_ms))
+
+    with ThreadPoolExecutor(max_workers=options.users) as pool:
+        list(pool.map(user_loop, range(options.users)))
+    elapsed = time.perf_counter() - started
+
+    routes, total = summarize(recorder.samples, elapsed)
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_commit": _git_commit(),
+            "base_url": base_url,
+            "spawned": options.spawn,
+            "workers": options.workers if options.spawn else None,
+            "threads": options.threads if options.spawn else None,
+            "rate_limit": options.rate_limit if options.spawn else None,
+            "users": options.users,
+            "duration_s": round(elapsed, 2),
+            "seed": options.seed,
+            "scenario_weights": {name: weights[name] for name in names},
+            "stub_latency_ms": options.stub_latency_ms if options.spawn else None,
+        },
+        "routes": routes,
+        "total": total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Role-based load test for the backend API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mix", help="scenario weights, e.g. driver=4,manager=3,finance=2,ai=1")
+    parser.add_argument("--think-ms", type=float, default=0, help="mean pause between iterations")
+    parser.add_argument("--critical-rate", type=float, default=0.02, help="share of critical maintenance reports")
+    parser.add_argument("--suppliers", type=int, default=20)
+    parser.add_argument("--output", help="result file (default loadtest_results/<timestamp>.json)")
+    parser.add_argument("--compare", help="previous result file to diff against")
+    parser.add_argument("--spawn", action="store_true", help="start gunicorn + stubs locally")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--database-url", help="DB for --spawn (default: scratch SQLite file)")
+    parser.add_argument("--rate-limit", action="store_true", help="keep rate limiting on in the spawned backend")
+    parser.add_argument("--stub-latency-ms", type=float, default=50.0)
+    parser.add_argument("--verbose", action="store_true")
+    options = parser.parse_args()
+
+    process = None
+    base_url = options.base_url
+    if options.spawn:
+        _, stub_env = stub_servers.start_all(latency_ms=options.stub_latency_ms, jitter_ms=options.stub_latency_ms / 4)
+        process, base_url = spawn_backend(options, stub_env)
+
+    try:
+        result = run(options, base_url)
+    finally:
+        if process is not None:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=30)
+
+    baseline = None
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+    print_report(result["routes"], result["total"], baseline)
+
+    output = options.output or os.path.join(
+        "loadtest_results", f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Local stand-ins for the external services the backend calls (n8n, Resend, Twilio).
+
+Each stub answers with the same shape the real API returns, after a
+configurable delay, so load tests and notification tests never leave the
+machine or spend money.
+
+    python scripts/stub_servers.py --latency-ms 80 --error-rate 0.01
+
+Point the backend at them with the environment printed on startup:
+    N8N_WEBHOOK_URL, RESEND_API_URL, TWILIO_API_BASE_URL
+
+The n8n stub also serves the REST routes ai-agents' N8NIntegration uses
+(N8N_BASE_URL): /rest/health, /rest/workflows[/<id>] and
+POST /rest/workflows/<id>/run.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Shared request handling: delay, optional injected failure, JSON reply.
+    Subclasses implement `respond(path, body)` -> (status, payload).
+    """
+
+    server_version = "SiteSupervisorStub/1.0"
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, keep-alive
+    # requests stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        stats = self.server.stats
+        with stats["lock"]:
+            stats["connections"] += 1
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _handle(self):
+        body = self._read_body()
+        stats = self.server.stats
+        with stats["lock"]:
+            stats["requests"] += 1
+
+        latency = self.server.latency_s
+        if self.server.jitter_s:
+            latency += random.uniform(0, self.server.jitter_s)
+        if latency:
+            time.sleep(latency)
+
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            status, payload = 503, {"message": "stub: injected failure"}
+            with stats["lock"]:
+                stats["errors"] += 1
+        else:
+            status, payload = self.respond(self.path, body)
+
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def respond(self, path, body):
+        raise NotImplementedError
+
+
+class N8NStubHandler(StubHandler):
+    """Webhook triggers, plus the REST routes; `server.stats["runs"]` keeps each run's body."""
+
+    workflows = [{"id": str(i), "name": f"Workflow {i}", "active": True} for i in range(1, 21)]
+
+    def respond(self, path, body):
+        if not path.startswith("/rest/"):
+            return 200, {"message": "Workflow was started", "executionId": uuid.uuid4().hex[:12]}
+
+        run = re.fullmatch(r"/rest/workflows/([^/]+)/run", path)
+        if self.command == "POST" and run:
+            stats = self.server.stats
+            with stats["lock"]:
+                stats["runs"].append(json.loads(body or b"{}"))
+                execution_id = len(stats["runs"])
+            return 200, {"data": {"executionId": execution_id}}
+        if self.command != "GET":
+            return 404, {"message": "stub: unknown path"}
+
+        if path == "/rest/health":
+            return 200, {"status": "ok"}
+        if path == "/rest/workflows":
+            return 200, {"data": self.workflows}
+        workflow_id = re.fullmatch(r"/rest/workflows/([^/]+)", path)
+        workflow = workflow_id and next((w for w in self.workflows if w["id"] == workflow_id.group(1)), None)
+        if workflow:
+            return 200, {"data": workflow}
+        return 404, {"message": "stub: unknown path"}
+
+
+class ResendStubHandler(StubHandler):
+    def respond(self, path, body):
+        if not path.startswith("/emails"):
+            return 404, {"message": "stub: unknown path"}
+        return 200, {"id": str(uuid.uuid4())}
+
+
+class TwilioStubHandler(StubHandler):
+    def respond(self, path, body):
+        if not path.endswith("/Messages.json"):
+            return 404, {"message": "stub: unknown path"}
+        form = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+        account_sid = path.split("/Accounts/")[1].split("/")[0] if "/Accounts/" in path else ""
+        now = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")
+        return 201, {
+            "sid": "SM" + uuid.uuid4().hex,
+            "account_sid": account_sid,
+            "to": form.get("To"),
+            "from": form.get("From"),
+            "body": form.get("Body"),
+            "status": "queued",
+            "num_segments": "1",
+            "direction": "outbound-api",
+            "date_created": now,
+            "date_updated": now,
+            "api_version": "2010-04-01",
+        }
+
+
+STUBS = {
+    "n8n": N8NStubHandler,
+    "resend": ResendStubHandler,
+    "twilio": TwilioStubHandler,
+}
+
+
+def start_stub(name, port=0, latency_ms=50.0, jitter_ms=0.0, error_rate=0.0, verbose=False):
+    """
+    Start one stub server in a daemon thread and return the server.
+    `server.url` holds its base URL and `server.stats` its request and
+    connection counters (keep-alive reuse shows as connections < requests).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), STUBS[name])
+    server.daemon_threads = True
+    server.latency_s = latency_ms / 1000
+    server.jitter_s = jitter_ms / 1000
+    server.error_rate = error_rate
+    server.verbose = verbose
+    server.stats = {"requests": 0, "errors": 0, "connections": 0, "runs": [], "lock": threading.Lock()}
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name=f"{name}-stub", daemon=True).start()
+    return server
+
+
+def start_all(base_port=0, **options):
+    """
+    Start every stub and return ({name: server}, env) where env points the
+    backend at them.
+    """
+    servers = {}
+    for offset, name in enumerate(STUBS):
+        port = base_port + offset if base_port else 0
+        servers[name] = start_stub(name, port=port, **options)
+
+    env = {
+        "N8N_WEBHOOK_URL": servers["n8n"].url + "/webhook/site-supervisor",
+        "RESEND_API_URL": servers["resend"].url,
+        "RESEND_API_KEY": "re_stub_key",
+        "TWILIO_API_BASE_URL": servers["twilio"].url,
+        "TWILIO_ACCOUNT_SID": "AC" + "0" * 32,
+        "TWILIO_AUTH_TOKEN": "stub-token",
+        "TWILIO_PHONE_NUMBER": "+15005550006",
+    }
+    return servers, env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run local n8n / Resend / Twilio stubs")
+    parser.add_argument("--base-port", type=int, default=9100, help="n8n=base, resend=base+1, twilio=base+2")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    servers, env = start_all(
+        base_port=args.base_port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        verbose=args.verbose,
+    )
+    for name, server in servers.items():
+        print(f"🧪 {name:<7} stub on {server.url}")
+    print("\nExport for the backend:")
+    for key, value in env.items():
+        print(f"export {key}={value}")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()